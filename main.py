@@ -1,15 +1,21 @@
 # main.py
 import os
-from flask import Flask, request, render_template, redirect, url_for, flash, jsonify
+import base64
+import csv
+import io
+import json
+import uuid
+import click
+from flask import Flask, Response, request, render_template, redirect, url_for, flash, jsonify
 from werkzeug.utils import secure_filename
-from spendwise.utils.csv_parser import parse_csv
-from spendwise.utils.excel_parser import parse_excel
-from spendwise.utils.pdf_parser import parse_pdf
-from spendwise.utils.data_storage import save_transactions_jsonl, load_transactions_jsonl, DEFAULT_TRANSACTIONS_FILE
+from spendwise.utils.data_storage import migrate_transaction_dates, sync_parquet_dataset, DEFAULT_TRANSACTIONS_FILE
+from spendwise.utils.storage_backends import (get_storage_backend, migrate_jsonl_to_sqlite, STORAGE_BACKEND_ENV,
+                                              STORAGE_PATH_ENV, DEFAULT_STORAGE_BACKEND)
+from spendwise.utils.import_jobs import submit_import, get_import_job
+from spendwise.utils.aggregates import monthly_trend, category_breakdown
+from spendwise.utils.date_normalizer import month_ordinal_range
 import logging
-from collections import defaultdict
-from datetime import datetime
-import re # For date parsing fallback in monthly_trend
+from datetime import date, datetime
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -23,6 +29,9 @@ app = Flask(__name__,
             static_folder=os.path.join(BASE_DIR, 'spendwise', 'static'))
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Transaction store: 'jsonl' (default), 'sqlite' or 'parquet'; STORAGE_PATH overrides the backend's default file.
+app.config['STORAGE_BACKEND'] = os.environ.get(STORAGE_BACKEND_ENV, DEFAULT_STORAGE_BACKEND)
+app.config['STORAGE_PATH'] = os.environ.get(STORAGE_PATH_ENV)
 app.secret_key = 'supersecretkey_for_spendwise_app'
 
 ALLOWED_EXTENSIONS = {'csv', 'xls', 'xlsx', 'pdf'}
@@ -30,6 +39,10 @@ ALLOWED_EXTENSIONS = {'csv', 'xls', 'xlsx', 'pdf'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def storage():
+    """The configured StorageBackend (one shared instance per backend and file)."""
+    return get_storage_backend(app.config['STORAGE_BACKEND'], app.config['STORAGE_PATH'])
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -45,133 +58,274 @@ def upload_file():
         return redirect(url_for('index'))
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        # Prefix with a unique token so concurrent uploads of the same name don't overwrite each other while queued.
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex[:8]}_{filename}")
         try:
             file.save(file_path)
-            parser_result = {'transactions': [], 'success_count': 0, 'skipped_count': 0}
-            file_ext = filename.rsplit('.', 1)[1].lower(); file_processed = False
-            if file_ext == 'csv':
-                parser_result = parse_csv(file_path); file_processed = True
-            elif file_ext in ['xls', 'xlsx']:
-                parser_result = parse_excel(file_path); file_processed = True
-            elif file_ext == 'pdf':
-                parser_result = parse_pdf(file_path); file_processed = True
-
-            transactions = parser_result.get('transactions', [])
-            success_count = parser_result.get('success_count', 0)
-            skipped_count = parser_result.get('skipped_count', 0)
-
-            if file_processed:
-                if success_count > 0:
-                    flash(f"Successfully imported {success_count} records from {filename}.", 'success')
-                    if skipped_count > 0:
-                        flash(f"{skipped_count} records from {filename} were skipped or could not be fully processed.", 'warning') # Changed to warning
-                    if save_transactions_jsonl(transactions, DEFAULT_TRANSACTIONS_FILE):
-                        logging.info(f"Saved {success_count} transactions.")
-                    else:
-                        flash("Critical: Failed to save processed transactions.", 'error')
-                        logging.error(f"Critical: Failed to save {success_count} transactions from {filename} to storage.")
-                elif skipped_count > 0:
-                     flash(f"Processed {filename}: No records were imported. {skipped_count} records were skipped or could not be fully processed.", 'warning') # Changed to warning
-                     logging.info(f"From {filename}: No records imported, {skipped_count} skipped.")
-                else:
-                    flash(f"Could not extract any transaction data from {filename}. The file might be empty, not contain recognizable transaction information, or be in an unsupported structure for its type.", 'info')
-                    logging.info(f"No transactions or processable data found in {filename}.")
+            job_id = submit_import(file_path, filename, storage())
         except Exception as e:
-            logging.error(f"Critical error during upload/processing for {filename}: {e}", exc_info=True)
+            logging.error(f"Critical error during upload of {filename}: {e}", exc_info=True)
             flash(f'Critical error processing {filename}: {e}', 'error')
-        return redirect(url_for('index'))
+            return redirect(url_for('index'))
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'job_id': job_id, 'status_url': url_for('import_status', job_id=job_id)}), 202
+        flash(f"{filename} was uploaded and is being imported.", 'info')
+        return redirect(url_for('index', import_job=job_id))
     else:
         file_ext_raw = file.filename.rsplit(".", 1);
         file_type_msg = f'"{file_ext_raw[1]}"' if len(file_ext_raw) > 1 else "selected"
         flash(f'File type {file_type_msg} not allowed. Please upload CSV, Excel, or PDF files.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/api/imports/<job_id>')
+def import_status(job_id):
+    job = get_import_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown import job."}), 404
+    return jsonify(job)
+
 @app.route('/view_data')
 def view_data_page():
     return render_template('data_view.html')
 
+TRANSACTION_QUERY_ARGS = ('offset', 'limit', 'sort', 'order', 'category', 'date_from', 'date_to', 'q', 'cursor')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(sort, order, row_id):
+    payload = json.dumps({'sort': sort, 'order': order, 'row': int(row_id)}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_cursor(cursor):
+    """Returns the {'sort', 'order', 'row'} dict of an encode_cursor string. Raises ValueError if malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Malformed cursor: {e}")
+    if not isinstance(payload, dict) or 'row' not in payload:
+        raise ValueError("Malformed cursor: expected an object with a 'row'")
+    try:
+        payload['row'] = int(payload['row'])
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor: 'row' must be an integer")
+    return payload
+
+def query_transactions_page(store, args):
+    """
+    Applies the /api/transactions query parameters to `store` and returns the response body.
+    Raises ValueError for invalid parameters.
+    """
+    sort = args.get('sort', 'date')
+    order = args.get('order', 'desc' if sort == 'date' else 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    offset = max(int(args.get('offset', 0)), 0)
+    filters = {'category': args.get('category') or None, 'query': args.get('q') or None}
+    for name in ('date_from', 'date_to'):
+        if args.get(name):
+            filters[name] = datetime.strptime(args[name], '%Y-%m-%d').date()
+
+    after_row = None
+    if args.get('cursor'):
+        cursor = decode_cursor(args['cursor'])
+        if cursor.get('sort') != sort or cursor.get('order') != order:
+            raise ValueError("cursor does not match the requested sort order")
+        after_row = cursor['row']
+
+    # One extra row tells whether another page follows, so the last page has no cursor
+    records, total = store.query_page(sort=sort, descending=order == 'desc', offset=offset, limit=limit + 1,
+                                      after_row=after_row, **filters)
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(sort, order, records[-1]['id'])
+    return {'transactions': records, 'total': total, 'limit': limit, 'next_cursor': next_cursor}
+
 @app.route('/api/transactions', methods=['GET'])
 def get_transactions():
+    """
+    Without query parameters, returns every transaction as a JSON array. With any of
+    offset/limit/sort/order/category/date_from/date_to/q/cursor, returns one page:
+    {'transactions': [...], 'total': n, 'limit': n, 'next_cursor': str or null}.
+    """
     logging.info("API call to /api/transactions received.")
     try:
-        transactions = load_transactions_jsonl(DEFAULT_TRANSACTIONS_FILE)
-        for tx in transactions:
-            if hasattr(tx.get('amount'), 'quantize'):
-                tx['amount'] = float(tx['amount'])
-        return jsonify(transactions)
+        store = storage()
+        if not any(name in request.args for name in TRANSACTION_QUERY_ARGS):
+            return jsonify(store.all_transactions())
+        try:
+            return jsonify(query_transactions_page(store, request.args))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid query: {e}"}), 400
     except Exception as e:
         logging.error(f"Error loading transactions for API: {e}", exc_info=True)
         return jsonify({"error": "Could not load transactions"}), 500
 
+@app.route('/api/transactions/search', methods=['GET'])
+def search_transactions_api():
+    """
+    Full-text search over descriptions: ?q=<words> matches transactions having, for every
+    word, a word that starts with it (case-insensitive). Returns one page, newest first:
+    {'transactions': [...], 'total': n, 'limit': n}; offset/limit page as in /api/transactions.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query (q)."}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+    try:
+        results = storage().search(query, offset=offset, limit=limit)
+    except Exception as e:
+        logging.error(f"Error searching transactions for '{query}': {e}", exc_info=True)
+        return jsonify({"error": "Could not search transactions"}), 500
+    results['limit'] = limit
+    return jsonify(results)
+
+EXPORT_FIELDS = ('date', 'description', 'amount', 'category')
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def iter_export_chunks(transactions, export_format):
+    """
+    Serializes transactions as NDJSON or CSV, yielding ~EXPORT_CHUNK_BYTES strings so the
+    response is sent chunked without materializing the whole export.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(EXPORT_FIELDS)
+    for tx in transactions:
+        if writer:
+            writer.writerow([tx.get(field, '') for field in EXPORT_FIELDS])
+        else:
+            buffer.write(json.dumps(tx))
+            buffer.write('\n')
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@app.route('/api/transactions/stream', methods=['GET'])
+def stream_transactions():
+    """
+    Streams the ledger straight from storage as NDJSON (default) or CSV (?format=csv).
+    With date_from/date_to (YYYY-MM-DD), only that range is streamed, in date order.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be 'ndjson' or 'csv'"}), 400
+    try:
+        date_range = {name: datetime.strptime(request.args[name], '%Y-%m-%d').date()
+                      for name in ('date_from', 'date_to') if request.args.get(name)}
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date: {e}"}), 400
+    logging.info(f"Streaming transaction export as {export_format}.")
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    chunks = iter_export_chunks(storage().iter_transactions(**date_range), export_format)
+    return Response(chunks, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=transactions.{export_format}'})
+
+@app.route('/api/transactions/month/<year_month>', methods=['GET'])
+def get_month_transactions(year_month):
+    """
+    Drilldown for one month of the trend: {'month', 'transactions' (in date order),
+    'total_spent'}. Only that month's rows are read (through the date index, or an
+    indexed range query on SQLite).
+    """
+    try:
+        first, last = month_ordinal_range(year_month)
+    except ValueError:
+        return jsonify({"error": "month must be YYYY-MM"}), 400
+    transactions = list(storage().iter_transactions(date.fromordinal(first), date.fromordinal(last)))
+    total_spent = 0.0
+    for tx in transactions:
+        try:
+            amount = float(tx.get('amount') or 0)
+        except (ValueError, TypeError):
+            continue
+        if amount > 0:
+            total_spent += amount
+    return jsonify({'month': year_month, 'transactions': transactions, 'total_spent': round(total_spent, 2)})
+
 @app.route('/dashboard')
 def dashboard_page():
     """Renders the dashboard page."""
     return render_template('dashboard.html')
 
 # --- Dashboard API Endpoints ---
+DASHBOARD_FILTER_ARGS = ('date_from', 'date_to', 'category')
+
+def dashboard_filters():
+    """
+    Returns the optional date_from/date_to (YYYY-MM-DD) and category filters of the request.
+    Without filters the backends answer from their precomputed or indexed totals.
+    Raises ValueError on a malformed date.
+    """
+    filters = {name: request.args.get(name) for name in DASHBOARD_FILTER_ARGS if request.args.get(name)}
+    for name in ('date_from', 'date_to'):
+        if name in filters:
+            filters[name] = datetime.strptime(filters[name], '%Y-%m-%d').date()
+    return filters
+
 @app.route('/api/dashboard/total_spent', methods=['GET'])
 def get_total_spent():
-    transactions = load_transactions_jsonl(DEFAULT_TRANSACTIONS_FILE)
-    total = sum(float(tx['amount']) for tx in transactions if tx.get('amount') and float(tx['amount']) > 0)
-    return jsonify({'total_spent': round(total, 2)})
+    try:
+        filters = dashboard_filters()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid filter: {e}'}), 400
+    return jsonify({'total_spent': round(storage().total_spent(**filters), 2)})
 
 @app.route('/api/dashboard/monthly_trend', methods=['GET'])
 def get_monthly_trend():
-    transactions = load_transactions_jsonl(DEFAULT_TRANSACTIONS_FILE)
-    monthly_data = defaultdict(float)
-    for tx in transactions:
-        try:
-            amount = float(tx.get('amount', 0))
-            if amount <= 0:
-                continue
-            date_str = tx.get('date')
-            if not date_str: continue
-
-            year_month = None
-            try:
-                dt_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                year_month = dt_obj.strftime('%Y-%m')
-            except ValueError:
-                try:
-                    dt_obj = datetime.strptime(date_str, '%m/%d/%Y')
-                    year_month = dt_obj.strftime('%Y-%m')
-                except ValueError:
-                    try:
-                         dt_obj = datetime.strptime(date_str, '%d/%m/%Y')
-                         year_month = dt_obj.strftime('%Y-%m')
-                    except ValueError:
-                        if re.match(r'^\d{4}-\d{2}', date_str): # Check YYYY-MM...
-                             year_month = date_str[:7]
-                        else:
-                            logging.warning(f"Could not parse date '{date_str}' for monthly trend.")
-                            continue
-            if year_month:
-                monthly_data[year_month] += amount
-        except (ValueError, TypeError) as e:
-            logging.warning(f"Skipping transaction in monthly trend due to data error: {tx}, Error: {e}")
-            continue
-
-    trend = [{'month': month, 'total': round(total, 2)} for month, total in sorted(monthly_data.items())]
-    return jsonify(trend)
+    try:
+        filters = dashboard_filters()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid filter: {e}'}), 400
+    return jsonify(monthly_trend({'monthly': storage().monthly_totals(**filters)}))
 
 @app.route('/api/dashboard/category_breakdown', methods=['GET'])
 def get_category_breakdown():
-    transactions = load_transactions_jsonl(DEFAULT_TRANSACTIONS_FILE)
-    category_data = defaultdict(float)
-    for tx in transactions:
-        try:
-            amount = float(tx.get('amount', 0))
-            if amount <= 0:
-                continue
-            category = tx.get('category', 'Miscellaneous')
-            category_data[category] += amount
-        except (ValueError, TypeError) as e:
-            logging.warning(f"Skipping transaction in category breakdown due to data error: {tx}, Error: {e}")
-            continue
+    try:
+        filters = dashboard_filters()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid filter: {e}'}), 400
+    return jsonify(category_breakdown({'categories': storage().category_totals(**filters)}))
+
+# --- Maintenance commands (run with `flask --app main <command>`) ---
+@app.cli.command('migrate-dates')
+def migrate_dates_command():
+    """Rewrites transactions saved before date normalization with ISO dates and day ordinals."""
+    summary = migrate_transaction_dates(DEFAULT_TRANSACTIONS_FILE)
+    click.echo(f"Normalized {summary['migrated']} of {summary['rows']} transactions in {DEFAULT_TRANSACTIONS_FILE}.")
+
+@app.cli.command('migrate-to-sqlite')
+@click.argument('jsonl_files', nargs=-1, type=click.Path(dir_okay=False))
+@click.option('--database', default=None, help='SQLite database to import into (default: the configured one).')
+def migrate_to_sqlite_command(jsonl_files, database):
+    """Imports JSONL transaction logs (default: the main one) into the SQLite backend."""
+    path = database or (app.config['STORAGE_PATH'] if app.config['STORAGE_BACKEND'] == 'sqlite' else None)
+    backend = get_storage_backend('sqlite', path)
+    summary = migrate_jsonl_to_sqlite(jsonl_files or [DEFAULT_TRANSACTIONS_FILE], backend)
+    click.echo(f"Imported {summary['saved']} of {summary['rows']} transactions into {backend.db_path} "
+               f"({summary['duplicate_count']} already present).")
+    click.echo(f"Set {STORAGE_BACKEND_ENV}=sqlite to serve them from the database.")
 
-    breakdown = [{'category': cat, 'total': round(total, 2)} for cat, total in sorted(category_data.items(), key=lambda item: item[1], reverse=True)]
-    return jsonify(breakdown)
+@app.cli.command('export-parquet')
+@click.argument('jsonl_file', required=False, type=click.Path(dir_okay=False))
+def export_parquet_command(jsonl_file):
+    """Writes (or brings up to date) the month-partitioned Parquet dataset of a JSONL log."""
+    jsonl_file = jsonl_file or DEFAULT_TRANSACTIONS_FILE
+    manifest = sync_parquet_dataset(jsonl_file)
+    if manifest is None:
+        raise click.ClickException("pyarrow is not installed; install it to export Parquet.")
+    click.echo(f"Parquet dataset for {jsonl_file} holds {manifest['rows']} transactions in "
+               f"{len(manifest['months'])} month partitions; it is kept up to date on every import.")
+    click.echo(f"Set {STORAGE_BACKEND_ENV}=parquet to answer filtered dashboard totals from it.")
 
 # Add this context processor to make current_year available to all templates
 @app.context_processor
@@ -0,0 +1,123 @@
+# spendwise/utils/aggregates.py
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from spendwise.utils.categorizer import DEFAULT_CATEGORY
+from spendwise.utils.date_normalizer import ordinal_month
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+AGGREGATES_VERSION = 1
+AGGREGATES_SUFFIX = '.aggregates.json'
+
+def aggregates_path(file_path):
+    """Returns the path of the aggregates sidecar kept next to a transactions file."""
+    return os.path.splitext(file_path)[0] + AGGREGATES_SUFFIX
+
+def empty_aggregates():
+    return {'total_spent': 0.0, 'monthly': {}, 'categories': {}}
+
+def parse_transaction_date(date_str):
+    """
+    Parses a stored date string (ISO, then US, then day-first), returning a date or None.
+    """
+    if not date_str or not isinstance(date_str, str):
+        return None
+    for date_format in ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(date_str, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+def transaction_month(date_str):
+    """
+    Returns the 'YYYY-MM' bucket for a stored date string, or None if it cannot be parsed.
+    """
+    parsed = parse_transaction_date(date_str)
+    if parsed:
+        return parsed.strftime('%Y-%m')
+    if date_str and isinstance(date_str, str) and re.match(r'^\d{4}-\d{2}', date_str): # Check YYYY-MM...
+        return date_str[:7]
+    return None
+
+def apply_transactions(aggregates, transactions):
+    """
+    Folds a batch of transactions into the running totals in place.
+    Only positive amounts count as spending, matching the dashboard endpoints.
+    Rows normalized at ingest are bucketed by their 'date_ordinal'; only rows written
+    before normalization fall back to parsing the date string.
+    """
+    monthly = aggregates['monthly']
+    categories = aggregates['categories']
+    months = {} # Statements repeat dates heavily; bucket each distinct date once
+    for tx in transactions:
+        try:
+            amount = float(tx.get('amount') or 0)
+        except (ValueError, TypeError) as e:
+            logging.warning(f"Skipping transaction in aggregates due to data error: {tx}, Error: {e}")
+            continue
+        if amount <= 0:
+            continue
+
+        aggregates['total_spent'] += amount
+        category = tx.get('category', DEFAULT_CATEGORY)
+        categories[category] = categories.get(category, 0.0) + amount
+
+        if 'date_ordinal' in tx:
+            ordinal = tx['date_ordinal']
+            year_month = months.get(ordinal)
+            if year_month is None and ordinal:
+                year_month = months[ordinal] = ordinal_month(ordinal)
+        else:
+            date_str = tx.get('date')
+            year_month = months.get(date_str) if isinstance(date_str, str) else None
+            if year_month is None:
+                year_month = transaction_month(date_str)
+                if isinstance(date_str, str):
+                    months[date_str] = year_month
+        if year_month:
+            monthly[year_month] = monthly.get(year_month, 0.0) + amount
+        elif tx.get('date'):
+            logging.warning(f"Could not parse date '{tx.get('date')}' for monthly trend.")
+    return aggregates
+
+def read_aggregates(file_path, log_identity):
+    """
+    Reads the sidecar for `file_path`. Returns None if it is missing, unreadable, or was
+    built from a different state of the log than `log_identity` ((inode, size)).
+    """
+    sidecar = aggregates_path(file_path)
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (IOError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable aggregates sidecar {sidecar}: {e}")
+        return None
+    if data.get('version') != AGGREGATES_VERSION or data.get('log_identity') != list(log_identity):
+        return None
+    return data['aggregates']
+
+def write_aggregates(file_path, aggregates, log_identity):
+    """Atomically replaces the sidecar for `file_path`."""
+    sidecar = aggregates_path(file_path)
+    tmp_path = sidecar + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': AGGREGATES_VERSION, 'log_identity': list(log_identity), 'aggregates': aggregates}, f)
+        os.replace(tmp_path, sidecar)
+        return True
+    except (IOError, OSError, TypeError) as e:
+        logging.error(f"Could not write aggregates sidecar {sidecar}: {e}")
+        return False
+
+def monthly_trend(aggregates):
+    return [{'month': month, 'total': round(total, 2)} for month, total in sorted(aggregates['monthly'].items())]
+
+def category_breakdown(aggregates):
+    return [{'category': cat, 'total': round(total, 2)}
+            for cat, total in sorted(aggregates['categories'].items(), key=lambda item: item[1], reverse=True)]
@@ -1,5 +1,8 @@
 # spendwise/utils/categorizer.py
+import functools
 import logging
+import re
+from collections import deque
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -21,6 +24,157 @@ CATEGORIES_KEYWORDS = {
 
 DEFAULT_CATEGORY = 'Miscellaneous'
 
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over every keyword in a categories->keywords mapping.
+
+    A single pass over the (lowercased) text finds all keyword occurrences. Each automaton
+    state carries the best (lowest) priority of any keyword ending there, where a keyword's
+    priority is the position of its category in the mapping. The result is therefore the
+    same as checking categories in order and returning the first with a keyword in the
+    text, but the cost no longer grows with the number of keywords.
+    """
+
+    def __init__(self, categories_keywords):
+        self.categories = list(categories_keywords)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None] # Best category priority for a match ending in each state
+        self._always = None # Priority of a category with an empty keyword, which matches anything
+
+        alphabet = set()
+        for priority, keywords in enumerate(categories_keywords.values()):
+            for keyword in keywords:
+                if keyword == '':
+                    self._always = priority if self._always is None else min(self._always, priority)
+                else:
+                    self._add_keyword(keyword, priority)
+                    alphabet.update(keyword)
+        self._build_failure_links()
+        # Runs of characters that appear in no keyword (typically the digits and punctuation of
+        # store numbers, dates and reference IDs) can never be part of a match.
+        self._noise = re.compile('[^' + ''.join(re.escape(char) for char in sorted(alphabet)) + ']+') if alphabet else None
+
+    def _add_keyword(self, keyword, priority):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][char] = next_state
+            state = next_state
+        if self._output[state] is None or priority < self._output[state]:
+            self._output[state] = priority
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end here via a shorter keyword (a suffix of this path).
+                inherited = self._output[self._fail[next_state]]
+                if inherited is not None and (self._output[next_state] is None or inherited < self._output[next_state]):
+                    self._output[next_state] = inherited
+
+    def normalize(self, text):
+        """
+        Collapses every run of characters that no keyword uses into a single NUL, e.g.
+        'starbucks #1234' -> 'starbucks \\x00'. Keyword matches are unaffected,
+        so the normalized text categorizes exactly like the original.
+        """
+        if self._noise is None:
+            return ''
+        return self._noise.sub('\x00', text)
+
+    def match(self, text):
+        """Returns the highest-priority category with a keyword in `text`, or None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        best = self._always
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            priority = output[state]
+            if priority is not None and (best is None or priority < best):
+                best = priority
+                if best == 0:
+                    break
+        return self.categories[best] if best is not None else None
+
+CATEGORY_CACHE_SIZE = 65536
+
+_matcher = None
+_matcher_version = None
+
+def _keywords_version():
+    # Cheap enough to check on every call: changes when a category or keyword list is
+    # added, removed or replaced, or a list grows or shrinks.
+    return tuple((category, id(keywords), len(keywords)) for category, keywords in CATEGORIES_KEYWORDS.items())
+
+def get_keyword_matcher():
+    """
+    Returns the matcher compiled from CATEGORIES_KEYWORDS, building it on first use and
+    rebuilding it (and dropping cached categorizations) when the map has changed since.
+    """
+    global _matcher, _matcher_version
+    version = _keywords_version()
+    if _matcher is None or version != _matcher_version:
+        if _matcher is not None:
+            _categorize_description.cache_clear()
+            _categorize_merchant.cache_clear()
+        _matcher, _matcher_version = KeywordMatcher(CATEGORIES_KEYWORDS), version
+    return _matcher
+
+def reset_keyword_matcher():
+    """
+    Discards the compiled matcher and all cached categorizations. Edits to
+    CATEGORIES_KEYWORDS are picked up automatically; call this only after replacing a
+    keyword in place (e.g. keywords[0] = 'new'), which leaves the list length unchanged.
+    """
+    global _matcher
+    _matcher = None
+    _categorize_description.cache_clear()
+    _categorize_merchant.cache_clear()
+
+def add_category_keywords(category, keywords):
+    """
+    Adds keywords (lowercase) to a category at runtime, creating the category if needed.
+    New categories rank after the existing ones.
+    """
+    CATEGORIES_KEYWORDS.setdefault(category, [])
+    CATEGORIES_KEYWORDS[category].extend(keyword for keyword in keywords if keyword not in CATEGORIES_KEYWORDS[category])
+    reset_keyword_matcher()
+
+def categorization_cache_info():
+    """
+    Returns hit/miss counters for both cache levels: 'description' (exact description
+    strings) and 'merchant' (normalized descriptions, shared across store numbers, dates
+    and reference IDs).
+    """
+    return {'description': _categorize_description.cache_info()._asdict(),
+            'merchant': _categorize_merchant.cache_info()._asdict()}
+
+# Both caches are only reached through categorize_transaction, which has already brought
+# _matcher up to date with CATEGORIES_KEYWORDS.
+@functools.lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _categorize_merchant(normalized_description):
+    return _matcher.match(normalized_description) or DEFAULT_CATEGORY
+
+@functools.lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _categorize_description(description):
+    # Exact repeats ("UBER TRIP") stop here; variants that differ only in numbers
+    # ("STARBUCKS #1234", "STARBUCKS #5678") share one entry in the merchant cache.
+    return _categorize_merchant(_matcher.normalize(description.lower()))
+
 def categorize_transaction(description):
     """
     Categorizes a transaction based on keywords in its description.
@@ -34,13 +188,30 @@ def categorize_transaction(description):
     if not description or not isinstance(description, str):
         return DEFAULT_CATEGORY
 
-    desc_lower = description.lower()
+    get_keyword_matcher() # Rebuilds the matcher and clears the caches if the keywords changed
+    return _categorize_description(description)
 
-    for category, keywords in CATEGORIES_KEYWORDS.items():
-        if any(keyword in desc_lower for keyword in keywords):
-            return category
+def categorize_list(descriptions):
+    """
+    Categorizes an iterable of descriptions.
 
-    return DEFAULT_CATEGORY
+    Returns:
+        list: Category names, in the same order as `descriptions`.
+    """
+    return [categorize_transaction(description) for description in descriptions]
+
+def categorize_series(descriptions):
+    """
+    Categorizes a pandas Series of descriptions.
+
+    Bank exports repeat a small set of descriptions many times, so each distinct value is
+    categorized once and the results are broadcast back with Series.map.
+
+    Returns:
+        pandas.Series: Category names, aligned with the index of `descriptions`.
+    """
+    categories = {description: categorize_transaction(description) for description in descriptions.unique()}
+    return descriptions.map(categories).fillna(DEFAULT_CATEGORY)
 
 if __name__ == '__main__':
     logging.info("Testing categorizer...")
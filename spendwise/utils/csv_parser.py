@@ -11,22 +11,56 @@ if not __package__ and not hasattr(sys, 'frozen'):
 
 import csv
 import logging
+import warnings
 from spendwise.utils.categorizer import categorize_transaction # Import
+from spendwise.utils.date_normalizer import DateNormalizer, normalize_transactions, DATE_SAMPLE_SIZE
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def parse_csv(file_path):
-    result = {'transactions': [], 'success_count': 0, 'skipped_count': 0}
+CSV_ENGINES = ('python', 'pandas')
+CSV_REQUIRED_HEADERS = {'date', 'description', 'amount'}
+
+def iter_csv_transactions(file_path, result=None):
+    """
+    Parses a CSV file row by row, yielding categorized transaction dicts as they are read
+    so callers can stream them to storage without holding the whole file. Dates are
+    normalized to ISO plus 'date_ordinal', with the format detected from the first rows.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        result (dict): Optional dict whose 'success_count' and 'skipped_count' are
+                       incremented as rows are processed.
+    """
+    normalizer = DateNormalizer.from_samples(_sample_csv_dates(file_path))
+    for transaction in _iter_csv_rows(file_path, result):
+        yield normalizer.apply(transaction)
+
+def _sample_csv_dates(file_path):
+    """Reads the date column of the first DATE_SAMPLE_SIZE rows (empty on any error)."""
+    samples = []
+    try:
+        with open(file_path, mode='r', encoding='utf-8-sig') as csvfile:
+            for row in csv.DictReader(csvfile):
+                samples.append({str(k).lower(): v for k, v in row.items() if k}.get('date'))
+                if len(samples) >= DATE_SAMPLE_SIZE:
+                    break
+    except Exception:
+        pass
+    return samples
+
+def _iter_csv_rows(file_path, result=None):
+    if result is None:
+        result = {'success_count': 0, 'skipped_count': 0}
     try:
         with open(file_path, mode='r', encoding='utf-8-sig') as csvfile:
             reader = csv.DictReader(csvfile)
-            required_headers = {'date', 'description', 'amount'}
+            required_headers = CSV_REQUIRED_HEADERS
             # Ensure reader.fieldnames is not None before processing
             fieldnames_lower = [str(f).lower() for f in reader.fieldnames] if reader.fieldnames else []
             if not required_headers.issubset(set(fieldnames_lower)):
                 logging.error(f"CSV file {file_path} is missing required headers. "
                               f"Expected variations of {', '.join(required_headers)}. Found: {reader.fieldnames}")
-                return result
+                return
 
             for i, row in enumerate(reader):
                 try:
@@ -52,31 +86,163 @@ def parse_csv(file_path):
                         continue
 
                     category = categorize_transaction(desc_val) # Categorize
-
-                    result['transactions'].append({
+                    transaction = {
                         'date': date_val,
                         'description': desc_val,
                         'amount': amount_val,
                         'category': category # Add category
-                    })
-                    result['success_count'] += 1
+                    }
                 except Exception as e:
                     logging.warning(f"Error processing CSV row {i+1} in {file_path}: {e}. Row: {row}")
                     result['skipped_count'] += 1
                     continue
+                result['success_count'] += 1
+                yield transaction
     except FileNotFoundError:
         logging.error(f"CSV file not found: {file_path}")
-        return result # Return dict on error
+        return
     except Exception as e:
         logging.error(f"Failed to read or parse CSV file {file_path}: {e}")
-        return result # Return dict on error
+        return
 
-    if result['success_count'] == 0 and result['skipped_count'] == 0 and not result['transactions']:
+    if result['success_count'] == 0 and result['skipped_count'] == 0:
         logging.info(f"No data found or all rows failed very early in CSV {file_path}.")
     else:
         logging.info(f"CSV parsing for {file_path} complete. Success: {result['success_count']}, Skipped: {result['skipped_count']}")
+
+def parse_csv(file_path, engine='python'):
+    """
+    Parses a CSV file into transactions.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        engine (str): 'python' reads row by row with csv.DictReader; 'pandas' reads the
+                      whole file with pandas.read_csv (pyarrow engine when installed) and
+                      converts it column-wise. Both give the same rows and counts.
+
+    Returns:
+        dict: {'transactions': [...], 'success_count': int, 'skipped_count': int}
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine '{engine}'. Expected one of {', '.join(CSV_ENGINES)}.")
+    if engine == 'pandas':
+        result = _parse_csv_pandas(file_path)
+        if result is not None:
+            return result
+    result = {'transactions': [], 'success_count': 0, 'skipped_count': 0}
+    result['transactions'].extend(iter_csv_transactions(file_path, result))
     return result
 
+def _read_csv_frame(file_path):
+    """Reads the whole CSV as text columns, with empty cells kept as '' (as csv.DictReader does)."""
+    import pandas as pd
+    try:
+        return _read_csv_frame_pyarrow(file_path)
+    except ImportError:
+        pass
+    except (ValueError, OSError) as e: # Includes pyarrow's ArrowInvalid, e.g. for ragged rows
+        logging.info(f"pyarrow could not read CSV {file_path} ({e}); retrying with the C engine.")
+    with warnings.catch_warnings():
+        # index_col=False: extra trailing fields are dropped (DictReader ignores them too)
+        # instead of the first column silently becoming the index.
+        warnings.simplefilter('ignore', pd.errors.ParserWarning)
+        return pd.read_csv(file_path, dtype=str, keep_default_na=False, encoding='utf-8-sig', index_col=False)
+
+def _read_csv_frame_pyarrow(file_path):
+    # pandas' own engine='pyarrow' infers column types before applying dtype=str (so '5'
+    # would come back as '5.0'); reading with pyarrow.csv lets every column be typed as text.
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    with open(file_path, mode='r', encoding='utf-8-sig', newline='') as csvfile:
+        header = next(csv.reader(csvfile), None)
+    if header is None:
+        import pandas as pd
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    table = pa_csv.read_csv(file_path, convert_options=pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in header},
+        strings_can_be_null=False, quoted_strings_can_be_null=False))
+    return table.to_pandas()
+
+def _parse_csv_pandas(file_path):
+    """
+    Column-wise version of iter_csv_transactions. Returns None when the file needs the
+    row-by-row reader to keep its exact semantics: ragged rows or empty required cells
+    (pandas can't tell a missing trailing field from an empty one) and read errors
+    (the row reader keeps the rows before the error).
+    """
+    import numpy as np
+    import pandas as pd
+    from spendwise.utils.categorizer import categorize_series
+
+    result = {'transactions': [], 'success_count': 0, 'skipped_count': 0}
+    if not os.path.exists(file_path):
+        logging.error(f"CSV file not found: {file_path}")
+        return result
+    try:
+        df = _read_csv_frame(file_path)
+    except pd.errors.EmptyDataError:
+        logging.error(f"CSV file {file_path} is missing required headers. "
+                      f"Expected variations of {', '.join(CSV_REQUIRED_HEADERS)}. Found: None")
+        return result
+    except Exception as e:
+        logging.info(f"pandas could not read CSV {file_path} ({e}); falling back to the row-by-row reader.")
+        return None
+
+    header = _read_csv_header(file_path)
+    if header is None or len(header) != len(df.columns):
+        logging.info(f"CSV {file_path} header doesn't line up with its columns; using the row-by-row reader.")
+        return None
+    # Columns are picked by position: pandas renames repeated names ('Amount.1') and pyarrow
+    # keeps them, so df[name] could return several columns. The last match wins, as in a DictReader row.
+    positions = {name.lower(): position for position, name in enumerate(header) if name}
+    if not CSV_REQUIRED_HEADERS.issubset(positions):
+        logging.error(f"CSV file {file_path} is missing required headers. "
+                      f"Expected variations of {', '.join(CSV_REQUIRED_HEADERS)}. Found: {header}")
+        return result
+    dates, descriptions, amount_strs = (df.iloc[:, positions[key]] for key in ('date', 'description', 'amount'))
+    if (dates == '').any() or (descriptions == '').any() or (amount_strs == '').any():
+        logging.info(f"CSV {file_path} has empty required cells; using the row-by-row reader.")
+        return None
+
+    cleaned = amount_strs.str.replace(r'[$,]', '', regex=True) # Same characters the row reader strips
+    amounts = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=float, copy=True)
+    valid = ~np.isnan(amounts)
+    if not valid.all():
+        # float() accepts a few spellings to_numeric doesn't ('nan', '1_000', ...); only the
+        # failures are retried, one by one.
+        for pos in np.flatnonzero(~valid):
+            amount_val = _float_or_none(cleaned.iat[pos])
+            if amount_val is None:
+                logging.warning(f"Skipping CSV row {pos+1} in {file_path} due to invalid amount: '{amount_strs.iat[pos]}'. Row: {df.iloc[pos].to_dict()}")
+            else:
+                amounts[pos], valid[pos] = amount_val, True
+    result['skipped_count'] = int((~valid).sum())
+
+    descriptions = descriptions[valid]
+    categories = categorize_series(descriptions)
+    result['transactions'] = [
+        {'date': date_val, 'description': desc_val, 'amount': amount_val, 'category': category}
+        for date_val, desc_val, amount_val, category in zip(dates[valid].tolist(), descriptions.tolist(),
+                                                           amounts[valid].tolist(), categories.tolist())
+    ]
+    normalize_transactions(result['transactions'])
+    result['success_count'] = len(result['transactions'])
+    if result['success_count'] == 0 and result['skipped_count'] == 0:
+        logging.info(f"No data found or all rows failed very early in CSV {file_path}.")
+    else:
+        logging.info(f"CSV parsing for {file_path} complete. Success: {result['success_count']}, Skipped: {result['skipped_count']}")
+    return result
+
+def _read_csv_header(file_path):
+    with open(file_path, mode='r', encoding='utf-8-sig', newline='') as csvfile:
+        return next(csv.reader(csvfile), None)
+
+def _float_or_none(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
 if __name__ == '__main__':
     # Example usage (for testing purposes) - now includes category
     dummy_csv_path = 'dummy_transactions_cat.csv'
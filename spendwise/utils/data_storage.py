@@ -1,6 +1,20 @@
+import sys
+import os
+if not __package__ and not hasattr(sys, 'frozen'):
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
 import json
 import logging
-import os
+import threading
+from spendwise.utils import aggregates as aggregate_store
+from spendwise.utils import dedup_index as dedup_store
+from spendwise.utils import date_index as date_store
+from spendwise.utils import search_index as search_store
+from spendwise.utils.categorizer import DEFAULT_CATEGORY
+from spendwise.utils.jsonl_writer import TransactionLogWriter, is_header_line, repair_torn_tail
+from spendwise.utils.date_normalizer import DateNormalizer, parse_date
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,40 +25,802 @@ DEFAULT_TRANSACTIONS_FILE = os.path.join(STORAGE_DIR, 'transactions.jsonl')
 if not os.path.exists(STORAGE_DIR):
     os.makedirs(STORAGE_DIR)
 
-def save_transactions_jsonl(transactions, file_path=DEFAULT_TRANSACTIONS_FILE):
+# In-process caches of decoded transactions (as dicts, and as TransactionTables), keyed by
+# absolute file path. Each entry records the file identity it was built from and the byte
+# offset decoded so far.
+_TRANSACTIONS_CACHE = {}
+_TABLE_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+# Dedup keys of stored transactions (see dedup_index), keyed by absolute file path. Loaded
+# lazily from the .dedup sidecar and kept in step with the log as rows are appended.
+_DEDUP_CACHE = {}
+_DEDUP_LOCK = threading.Lock() # Held from the duplicate check until the index records the append
+
+# Date indexes ({'stat', 'index', 'covered', 'sorted', 'unsorted'}; see date_index), keyed by
+# absolute file path. Writers extend them under _DEDUP_LOCK and the log lock; _DATE_INDEX_LOCK
+# only guards the dict, so a query against an unchanged log never waits on a writer.
+_DATE_INDEX_CACHE = {}
+_DATE_INDEX_LOCK = threading.Lock()
+
+# Search indexes (search_index.SearchIndex, updated in place), keyed by absolute file path.
+# Writers extend them like the date indexes; _SEARCH_LOCK is held while one is read or changed.
+_SEARCH_CACHE = {}
+_SEARCH_LOCK = threading.Lock()
+
+# Held while a Parquet dataset (see parquet_dataset) is written or read, so an in-process
+# query never opens a part that a concurrent sync is merging away.
+_PARQUET_LOCK = threading.Lock()
+
+# Background snapshot compactions (threads), keyed by absolute file path; at most one runs per file.
+_COMPACTIONS = {}
+_COMPACTIONS_LOCK = threading.Lock()
+
+STREAM_BATCH_SIZE = 5000 # Transactions written and folded into the aggregates per batch when streaming
+STREAM_WRITE_BUFFER_BYTES = 1024 * 1024
+REFRESH_READ_BYTES = 4 * 1024 * 1024 # Bytes of JSONL decoded at a time when loading or refreshing caches
+PARQUET_SYNC_ROWS = 200000 # Log rows converted per Parquet write when syncing the dataset
+
+# Amount of JSONL (in bytes) allowed to accumulate after the binary snapshot before it is rewritten.
+SNAPSHOT_COMPACT_BYTES = 16 * 1024 * 1024
+
+def save_transactions_jsonl(transactions, file_path=DEFAULT_TRANSACTIONS_FILE, result=None):
     """
     Appends a list of transaction dictionaries to a JSON Lines file.
     Each transaction is stored as a JSON object on a new line.
 
+    The rows are written as one locked batch (see jsonl_writer), so concurrent writers
+    never interleave partial lines. Transactions already in the file (same date,
+    description and amount, counting repeats; see dedup_index) are dropped as duplicates,
+    so re-importing an overlapping statement only appends the rows that are new.
+
     Args:
         transactions (list): A list of transaction dictionaries.
         file_path (str): The path to the JSONL file.
+        result (dict, optional): If given, its 'duplicate_count' is incremented by the
+                                 number of transactions dropped as duplicates.
+
+    Returns:
+        bool: True if every transaction was either appended or already stored.
     """
     if not transactions:
         logging.info("No transactions provided to save.")
         return False
 
     try:
-        with open(file_path, 'a', encoding='utf-8') as f:
-            for transaction in transactions:
-                json.dump(transaction, f)
-                f.write('\n')
-        logging.info(f"Successfully appended {len(transactions)} transactions to {file_path}")
+        with _DEDUP_LOCK, TransactionLogWriter(file_path) as log, log.locked():
+            dedup = _dedup_entry(file_path)
+            fresh, new_keys = _drop_duplicates(dedup, transactions, {}, result)
+            if not fresh:
+                logging.info(f"All {len(transactions)} transactions are already in {file_path}.")
+                return True
+            identity_before = _log_identity(file_path)
+            offsets = log.append(fresh)
+            logging.info(f"Successfully appended {len(fresh)} transactions to {file_path}")
+            _record_dedup_keys(file_path, dedup, new_keys)
+            _update_aggregates(file_path, fresh, identity_before)
+            _update_date_index(file_path, fresh, offsets, identity_before)
+            _update_search_index(file_path, fresh, offsets, identity_before)
+        _schedule_snapshot_compaction(file_path)
+        _maybe_sync_parquet(file_path)
         return True
     except IOError as e:
         logging.error(f"IOError writing to {file_path}: {e}")
-    except TypeError as e:
+        _forget_dedup(file_path) # A failed write may leave rows the index hasn't seen
+    except (TypeError, ValueError) as e:
         logging.error(f"TypeError: Could not serialize transaction to JSON. Ensure transactions are JSON serializable. Error: {e}")
     except Exception as e:
         logging.error(f"An unexpected error occurred while saving transactions to {file_path}: {e}")
     return False
 
-def load_transactions_jsonl(file_path=DEFAULT_TRANSACTIONS_FILE):
+def save_transaction_batches(batches, file_path=DEFAULT_TRANSACTIONS_FILE, result=None):
+    """
+    Appends transactions from an iterable of batches (lists of transaction dicts), e.g.
+    the chunks produced by a streaming parser, without holding more than one batch.
+    Each batch is written with a single locked write and folded into the aggregates
+    sidecar before the next is read; the lock is released between batches.
+
+    Duplicates are dropped as in save_transactions_jsonl, with repeats counted across the
+    whole stream rather than per batch.
+
+    Returns:
+        int: The number of transactions successfully saved (duplicates excluded).
+    """
+    saved_count = 0
+    running = None
+    occurrences = {}
+    try:
+        with TransactionLogWriter(file_path) as log:
+            for batch in batches:
+                if not batch:
+                    continue
+                with _DEDUP_LOCK, log.locked():
+                    dedup = _dedup_entry(file_path)
+                    fresh, new_keys = _drop_duplicates(dedup, batch, occurrences, result)
+                    if not fresh:
+                        continue
+                    identity_before = _log_identity(file_path)
+                    try:
+                        offsets = log.append(fresh)
+                    except (TypeError, ValueError) as e:
+                        logging.error(f"Skipping batch of {len(fresh)} transactions that could not be serialized to JSON: {e}")
+                        continue
+                    _record_dedup_keys(file_path, dedup, new_keys)
+                    running = _update_aggregates(file_path, fresh, identity_before, running)
+                    _update_date_index(file_path, fresh, offsets, identity_before)
+                    _update_search_index(file_path, fresh, offsets, identity_before)
+                saved_count += len(fresh)
+    except IOError as e:
+        logging.error(f"IOError writing to {file_path} after {saved_count} transactions: {e}")
+        _forget_dedup(file_path)
+    if saved_count:
+        logging.info(f"Successfully appended {saved_count} transactions to {file_path}")
+        _schedule_snapshot_compaction(file_path)
+        _maybe_sync_parquet(file_path)
+    return saved_count
+
+def save_transaction_stream(transactions, file_path=DEFAULT_TRANSACTIONS_FILE, batch_size=STREAM_BATCH_SIZE, result=None):
+    """
+    Appends transactions from any iterable (e.g. a parser generator) in batches of
+    `batch_size`, so memory stays bounded regardless of how many rows are streamed.
+
+    Returns:
+        int: The number of transactions successfully saved (duplicates excluded).
+    """
+    return save_transaction_batches(_batched(transactions, batch_size), file_path, result)
+
+def _batched(iterable, batch_size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _log_identity(file_path):
+    """Returns (inode, size) for the transactions file, or None if it doesn't exist."""
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size)
+
+def _dedup_entry(file_path):
+    """
+    Returns the dedup entry ({'stat', 'keys', 'covered'}) for `file_path`, current with the
+    log. It is loaded from the sidecar on first use (or when the log changed behind our back),
+    and complete lines the sidecar doesn't cover yet are hashed and added; if the sidecar is
+    missing or belongs to another log, it is rebuilt from the whole file.
+    Caller holds _DEDUP_LOCK.
+    """
+    cache_key = os.path.abspath(file_path)
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        st = None
+    stat_key = (st.st_ino, st.st_size, st.st_mtime_ns) if st else None
+    entry = _DEDUP_CACHE.get(cache_key)
+    if entry is not None and entry['stat'] == stat_key:
+        return entry
+    if st is None or st.st_size == 0:
+        entry = {'stat': stat_key, 'keys': set(), 'covered': 0}
+        _DEDUP_CACHE[cache_key] = entry
+        return entry
+
+    loaded = dedup_store.read_index(file_path, st.st_ino)
+    entry = {'stat': stat_key, 'keys': set(), 'covered': 0}
+    if loaded is not None and _ends_on_line(file_path, loaded[1], st.st_size):
+        entry['keys'], entry['covered'] = loaded
+    rebuild = entry['covered'] == 0
+    new_keys = []
+    for rows, _, offset in _iter_jsonl_blocks(file_path, entry['covered']):
+        for transaction in rows:
+            _, key = dedup_store.next_occurrence(entry['keys'], dedup_store.transaction_fingerprint(transaction))
+            entry['keys'].add(key)
+            if not rebuild:
+                new_keys.append(key)
+        entry['covered'] = offset
+    if rebuild:
+        logging.info(f"Rebuilt dedup index for {file_path} ({len(entry['keys'])} transactions).")
+        dedup_store.write_index(file_path, entry['keys'], (st.st_ino, entry['covered']))
+    elif new_keys:
+        dedup_store.append_index(file_path, new_keys, (st.st_ino, entry['covered']))
+    _DEDUP_CACHE[cache_key] = entry
+    return entry
+
+def _drop_duplicates(dedup, transactions, occurrences, result=None):
+    """
+    Splits `transactions` into the ones not yet stored and their dedup keys. `occurrences`
+    counts copies of each fingerprint seen so far in this save, so it carries across batches.
+    """
+    keys = dedup['keys']
+    fresh, new_keys = [], []
+    for transaction in transactions:
+        fingerprint = dedup_store.transaction_fingerprint(transaction)
+        occurrence = occurrences.get(fingerprint, 0)
+        occurrences[fingerprint] = occurrence + 1
+        key = dedup_store.occurrence_key(fingerprint, occurrence)
+        if key in keys:
+            continue
+        fresh.append(transaction)
+        new_keys.append(key)
+    duplicate_count = len(transactions) - len(fresh)
+    if duplicate_count:
+        logging.info(f"Dropped {duplicate_count} duplicate transactions.")
+        if result is not None:
+            result['duplicate_count'] = result.get('duplicate_count', 0) + duplicate_count
+    return fresh, new_keys
+
+def _record_dedup_keys(file_path, dedup, new_keys):
+    """Adds the keys of rows just appended to the in-memory entry and the sidecar."""
+    st = os.stat(file_path)
+    identity = (st.st_ino, st.st_size)
+    dedup['keys'].update(new_keys)
+    if dedup['covered'] == 0:
+        dedup_store.write_index(file_path, dedup['keys'], identity)
+    else:
+        dedup_store.append_index(file_path, new_keys, identity)
+    dedup['covered'] = st.st_size
+    dedup['stat'] = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def _forget_dedup(file_path):
+    with _DEDUP_LOCK:
+        _DEDUP_CACHE.pop(os.path.abspath(file_path), None)
+
+def _ends_on_line(file_path, offset, size):
+    """True if `offset` is within the file and falls just after a newline (or at 0)."""
+    if offset > size:
+        return False
+    if offset == 0:
+        return True
+    with open(file_path, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+def _iter_jsonl_blocks(file_path, offset):
+    """
+    Yields (transactions, their line offsets, end offset) for the complete lines after
+    `offset`, a block at a time.
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        partial = b''
+        while True:
+            block = f.read(REFRESH_READ_BYTES)
+            if not block:
+                return
+            data = partial + block
+            last_newline = data.rfind(b'\n')
+            complete, partial = data[:last_newline + 1], data[last_newline + 1:]
+            if complete:
+                rows, line_offsets = [], []
+                _decode_jsonl_chunk(complete, file_path, rows, line_offsets, offset)
+                offset += len(complete)
+                yield rows, line_offsets, offset
+
+def file_already_imported(sha256, file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Returns the record ({'filename', 'rows', 'imported_at'}) of an earlier import of a file
+    with this SHA-256 into `file_path`, or None if it hasn't been imported.
+    """
+    identity = _log_identity(file_path)
+    if identity is None:
+        return None
+    return dedup_store.read_imported_files(file_path, identity[0]).get(sha256)
+
+def record_file_import(sha256, filename, rows, file_path=DEFAULT_TRANSACTIONS_FILE):
+    """Remembers that a file with this SHA-256 has been imported into `file_path`."""
+    identity = _log_identity(file_path)
+    if identity is None:
+        return False
+    return dedup_store.record_imported_file(file_path, sha256, filename, rows, identity[0])
+
+def _update_aggregates(file_path, transactions, identity_before, running=None):
+    """
+    Folds a freshly appended batch into the aggregates sidecar. If the sidecar did not
+    match the log before the append, it is left stale and rebuilt on the next read.
+
+    `running` is the value returned for the previous batch appended to the same log; when
+    the log hasn't changed since, it saves re-reading the sidecar.
+
+    Returns:
+        tuple: (log identity, aggregates) as written, or None if the sidecar was left stale.
+    """
+    if identity_before is None or identity_before[1] == 0:
+        current = aggregate_store.empty_aggregates()
+    elif running is not None and running[0] == identity_before:
+        current = running[1]
+    else:
+        current = aggregate_store.read_aggregates(file_path, identity_before)
+        if current is None:
+            return None
+    aggregate_store.apply_transactions(current, transactions)
+    identity = _log_identity(file_path)
+    aggregate_store.write_aggregates(file_path, current, identity)
+    return identity, current
+
+def load_aggregates(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Returns the running totals (total spent, per-month and per-category totals) for a
+    transactions file. They are read from the sidecar maintained by save_transactions_jsonl
+    and rebuilt from the log if the sidecar is missing or stale.
+
+    Returns:
+        dict: {'total_spent': float, 'monthly': {month: total}, 'categories': {category: total}}
+    """
+    identity = _log_identity(file_path)
+    if identity is None:
+        return aggregate_store.empty_aggregates()
+    current = aggregate_store.read_aggregates(file_path, identity)
+    if current is not None:
+        return current
+
+    logging.info(f"Rebuilding aggregates for {file_path}.")
+    current = aggregate_store.apply_transactions(aggregate_store.empty_aggregates(), iter_transactions_jsonl(file_path))
+    # Only persist if the log didn't change while we were rebuilding.
+    if _log_identity(file_path) == identity:
+        aggregate_store.write_aggregates(file_path, current, identity)
+    return current
+
+def _transaction_ordinal(transaction):
+    """Day ordinal to index a stored row under; rows saved before normalization are parsed, undated rows get 0."""
+    if 'date_ordinal' in transaction:
+        return transaction['date_ordinal'] or 0
+    parsed = parse_date(transaction.get('date'))
+    return parsed.toordinal() if parsed else 0
+
+def _update_date_index(file_path, transactions, offsets, identity_before):
+    """
+    Adds a freshly appended batch to the date index sidecar (and the cached index). If the
+    sidecar did not match the log before the append, it is left stale and rebuilt on the
+    next query. Caller holds _DEDUP_LOCK and the log lock.
+    """
+    ordinals = [_transaction_ordinal(transaction) for transaction in transactions]
+    st = os.stat(file_path)
+    identity = (st.st_ino, st.st_size)
+    cache_key = os.path.abspath(file_path)
+    with _DATE_INDEX_LOCK:
+        entry = _DATE_INDEX_CACHE.pop(cache_key, None)
+        if identity_before is None or identity_before[1] == 0:
+            entry = {'index': date_store.DateIndex.from_entries(ordinals, offsets), 'unsorted': 0}
+            date_store.write_date_index(file_path, entry['index'], identity)
+            entry['sorted'] = len(entry['index'])
+        else:
+            header = date_store.read_date_index_header(file_path)
+            if header is None or header[:2] != identity_before:
+                return
+            if entry is None or entry['stat'][:2] != identity_before:
+                entry = _read_date_entry(file_path, identity_before[0])
+                if entry is None:
+                    return
+            entry['index'] = entry['index'].merged(ordinals, offsets)
+            if date_store.needs_merge(entry['sorted'], entry['unsorted'] + len(ordinals)):
+                date_store.write_date_index(file_path, entry['index'], identity)
+                entry['sorted'], entry['unsorted'] = len(entry['index']), 0
+            else:
+                date_store.append_date_index(file_path, ordinals, offsets, identity)
+                entry['unsorted'] += len(ordinals)
+        entry['covered'] = st.st_size
+        entry['stat'] = (st.st_ino, st.st_size, st.st_mtime_ns)
+        _DATE_INDEX_CACHE[cache_key] = entry
+
+def _read_date_entry(file_path, log_inode):
+    loaded = date_store.read_date_index(file_path, log_inode)
+    if loaded is None:
+        return None
+    index, covered, unsorted = loaded
+    return {'stat': None, 'index': index, 'covered': covered, 'sorted': len(index) - unsorted, 'unsorted': unsorted}
+
+def load_date_index(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Returns the DateIndex (day ordinal -> line offset) of every complete line in the
+    transactions file, or None if the file doesn't exist.
+
+    The index is kept in memory and in a sidecar that save_transactions_jsonl extends on
+    every append. If the log changed behind our back, lines the sidecar doesn't cover yet
+    are indexed and added; if the sidecar is missing or belongs to another log, it is
+    rebuilt from the whole file.
+    """
+    cache_key = os.path.abspath(file_path)
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    with _DATE_INDEX_LOCK:
+        entry = _DATE_INDEX_CACHE.get(cache_key)
+        if entry is not None and entry['stat'] == (st.st_ino, st.st_size, st.st_mtime_ns):
+            return entry['index']
+
+    with _DEDUP_LOCK, TransactionLogWriter(file_path) as log, log.locked():
+        st = os.stat(file_path)
+        stat_key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        with _DATE_INDEX_LOCK:
+            entry = _DATE_INDEX_CACHE.get(cache_key)
+            if entry is not None and entry['stat'] == stat_key:
+                return entry['index']
+            # Another process may have extended the sidecar since our copy was read.
+            entry = _read_date_entry(file_path, st.st_ino)
+            if entry is None or not _ends_on_line(file_path, entry['covered'], st.st_size):
+                entry = {'stat': None, 'index': date_store.DateIndex(), 'covered': 0, 'sorted': 0, 'unsorted': 0}
+            rebuild = entry['covered'] == 0
+            ordinals, offsets = [], []
+            for rows, line_offsets, end in _iter_jsonl_blocks(file_path, entry['covered']):
+                ordinals.extend(_transaction_ordinal(transaction) for transaction in rows)
+                offsets.extend(line_offsets)
+                entry['covered'] = end
+            entry['index'] = entry['index'].merged(ordinals, offsets)
+            identity = (st.st_ino, entry['covered'])
+            if rebuild or date_store.needs_merge(entry['sorted'], entry['unsorted'] + len(ordinals)):
+                if rebuild:
+                    logging.info(f"Rebuilt date index for {file_path} ({len(entry['index'])} transactions).")
+                date_store.write_date_index(file_path, entry['index'], identity)
+                entry['sorted'], entry['unsorted'] = len(entry['index']), 0
+            elif ordinals:
+                date_store.append_date_index(file_path, ordinals, offsets, identity)
+                entry['unsorted'] += len(ordinals)
+            entry['stat'] = stat_key
+            _DATE_INDEX_CACHE[cache_key] = entry
+            return entry['index']
+
+def iter_transactions_by_date(date_from=None, date_to=None, file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Yields the transactions dated `date_from`..`date_to` (inclusive dates; None leaves that
+    end open) in date order, oldest first. The matching lines are found in the date index
+    and read with a seek each, so the cost grows with the number of matches rather than
+    with the size of the ledger. Rows without a parseable date are never returned.
+
+    Args:
+        date_from (datetime.date, optional): First date to include.
+        date_to (datetime.date, optional): Last date to include.
+        file_path (str): The path to the JSONL file.
+    """
+    if not os.path.exists(file_path):
+        logging.info(f"Transaction file {file_path} not found. Nothing to iterate.")
+        return
+    repair_torn_tail(file_path)
+    index = load_date_index(file_path)
+    if index is None:
+        return
+    offsets = index.range_offsets(date_from.toordinal() if date_from else None,
+                                  date_to.toordinal() if date_to else None)
+    with open(file_path, 'rb') as f:
+        for offset in offsets.tolist():
+            f.seek(offset)
+            line = f.readline().strip()
+            try:
+                yield json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as jde:
+                logging.warning(f"Skipping malformed JSON line at byte {offset} of {file_path}. Error: {jde}")
+
+def _update_search_index(file_path, transactions, offsets, identity_before):
+    """
+    Adds a freshly appended batch to the search index sidecar (and the cached index), as
+    _update_date_index does for the date index. Caller holds _DEDUP_LOCK and the log lock.
+    """
+    st = os.stat(file_path)
+    identity = (st.st_ino, st.st_size)
+    cache_key = os.path.abspath(file_path)
+    with _SEARCH_LOCK:
+        index = _SEARCH_CACHE.pop(cache_key, None)
+        if identity_before is None or identity_before[1] == 0:
+            index = search_store.SearchIndex()
+            index.add(transactions, offsets)
+            search_store.write_search_index(file_path, index, identity)
+        else:
+            header = search_store.read_search_index_header(file_path)
+            if header is None or header[:2] != identity_before:
+                return
+            if index is None or index.stat[:2] != identity_before or len(index) != header[2]:
+                index = search_store.read_search_index(file_path, identity_before[0])
+                if index is None:
+                    return
+            first_row, segment = index.add(transactions, offsets)
+            if index.segments >= search_store.MAX_SEGMENTS:
+                search_store.write_search_index(file_path, index, identity)
+            else:
+                search_store.append_search_segment(file_path, index, first_row, segment, identity)
+        index.covered = st.st_size
+        index.stat = (st.st_ino, st.st_size, st.st_mtime_ns)
+        _SEARCH_CACHE[cache_key] = index
+
+def load_search_index(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Returns the SearchIndex of every complete line in the transactions file, or None if the
+    file doesn't exist. Kept current like load_date_index: from memory, then the sidecar,
+    then by indexing the lines the sidecar doesn't cover (or the whole file).
+    The returned index is shared; use it while holding _SEARCH_LOCK.
+    """
+    cache_key = os.path.abspath(file_path)
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    with _SEARCH_LOCK:
+        index = _SEARCH_CACHE.get(cache_key)
+        if index is not None and index.stat == (st.st_ino, st.st_size, st.st_mtime_ns):
+            return index
+
+    with _DEDUP_LOCK, TransactionLogWriter(file_path) as log, log.locked():
+        st = os.stat(file_path)
+        stat_key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        with _SEARCH_LOCK:
+            index = _SEARCH_CACHE.get(cache_key)
+            if index is not None and index.stat == stat_key:
+                return index
+            index = search_store.read_search_index(file_path, st.st_ino)
+            if index is None or not _ends_on_line(file_path, index.covered, st.st_size):
+                index = search_store.SearchIndex()
+            rebuild = index.covered == 0
+            rewrite = rebuild
+            for rows, line_offsets, end in _iter_jsonl_blocks(file_path, index.covered):
+                first_row, segment = index.add(rows, line_offsets)
+                index.covered = end
+                rewrite = rewrite or index.segments >= search_store.MAX_SEGMENTS
+                if not rewrite:
+                    search_store.append_search_segment(file_path, index, first_row, segment, (st.st_ino, end))
+            if rewrite:
+                if rebuild:
+                    logging.info(f"Rebuilt search index for {file_path} ({len(index)} transactions).")
+                search_store.write_search_index(file_path, index, (st.st_ino, index.covered))
+            index.stat = stat_key
+            _SEARCH_CACHE[cache_key] = index
+            return index
+
+def search_transactions(query, file_path=DEFAULT_TRANSACTIONS_FILE, offset=0, limit=50):
+    """
+    Finds transactions whose description contains, for every word of `query`, a word
+    starting with it (case-insensitive), e.g. 'star mar' matches 'STAR MARKET #12'.
+    Matching row ids come from the search index; only the requested page of rows is read
+    from the log, newest first.
+
+    Returns:
+        dict: {'transactions': [...] (each with its row 'id'), 'total': number of matches}
+    """
+    index = load_search_index(file_path)
+    if index is None:
+        return {'transactions': [], 'total': 0}
+    with _SEARCH_LOCK:
+        rows = index.lookup(query)
+        page = rows[::-1][offset:offset + limit].tolist()
+        offsets = [index.row_offsets[row] for row in page]
+    transactions = []
+    with open(file_path, 'rb') as f:
+        for row, line_offset in zip(page, offsets):
+            f.seek(line_offset)
+            try:
+                transaction = json.loads(f.readline())
+            except (json.JSONDecodeError, UnicodeDecodeError) as jde:
+                logging.warning(f"Skipping malformed JSON line at byte {line_offset} of {file_path}. Error: {jde}")
+                continue
+            transaction['id'] = row
+            transactions.append(transaction)
+    return {'transactions': transactions, 'total': len(rows)}
+
+def _parquet_store():
+    """The parquet_dataset module, or None when pyarrow isn't installed."""
+    try:
+        from spendwise.utils import parquet_dataset
+    except ImportError:
+        return None
+    return parquet_dataset
+
+def sync_parquet_dataset(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Brings the Parquet dataset of a transactions file (see parquet_dataset) up to date:
+    complete lines the manifest doesn't cover yet are converted and appended, PARQUET_SYNC_ROWS
+    rows per write. If the dataset is missing or belongs to another log, it is rebuilt from
+    the whole file. Once a dataset exists, every save keeps it in step with the log.
+
+    Returns:
+        dict: The dataset manifest (empty if the log doesn't exist), or None if pyarrow is
+              not installed.
+    """
+    parquet_store = _parquet_store()
+    if parquet_store is None:
+        logging.info("pyarrow is not installed; the Parquet dataset is unavailable.")
+        return None
+    if not os.path.exists(file_path):
+        return parquet_store.empty_manifest(None)
+    repair_torn_tail(file_path)
+    st = os.stat(file_path)
+    with _PARQUET_LOCK:
+        manifest = parquet_store.read_manifest(file_path, st.st_ino)
+        if manifest is not None and manifest['covered'] == st.st_size:
+            return manifest
+
+    with _DEDUP_LOCK, TransactionLogWriter(file_path) as log, log.locked(), _PARQUET_LOCK:
+        st = os.stat(file_path)
+        manifest = parquet_store.read_manifest(file_path, st.st_ino)
+        if manifest is None or not _ends_on_line(file_path, manifest['covered'], st.st_size):
+            manifest = parquet_store.reset_dataset(file_path, st.st_ino)
+        rebuild = manifest['covered'] == 0
+        rows, ordinals = [], []
+        covered = manifest['covered']
+        for block, _, end in _iter_jsonl_blocks(file_path, covered):
+            rows.extend(block)
+            ordinals.extend(_transaction_ordinal(transaction) for transaction in block)
+            if len(rows) >= PARQUET_SYNC_ROWS:
+                table = parquet_store.transactions_table(rows, ordinals, manifest['rows'], DEFAULT_CATEGORY)
+                rows, ordinals = [], []
+                if not parquet_store.append_table(file_path, manifest, table, end):
+                    return manifest
+            covered = end
+        if rows:
+            table = parquet_store.transactions_table(rows, ordinals, manifest['rows'], DEFAULT_CATEGORY)
+            parquet_store.append_table(file_path, manifest, table, covered)
+        elif rebuild or covered != manifest['covered']: # Nothing to convert (e.g. only batch headers)
+            manifest['covered'] = covered
+            parquet_store.write_manifest(file_path, manifest)
+        if rebuild:
+            logging.info(f"Rebuilt Parquet dataset for {file_path} ({manifest['rows']} transactions).")
+        return manifest
+
+def _maybe_sync_parquet(file_path):
+    """Keeps an existing Parquet dataset in step with the log after a save; never creates one."""
+    parquet_store = _parquet_store()
+    if parquet_store is None or not os.path.isdir(parquet_store.dataset_path(file_path)):
+        return
+    try:
+        sync_parquet_dataset(file_path)
+    except Exception as e: # The log is the source of truth; the next query retries the sync
+        logging.error(f"Could not update the Parquet dataset for {file_path}: {e}")
+
+def query_transactions_parquet(columns=None, date_from=None, date_to=None, category=None, spending=False,
+                               file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Reads transactions from the Parquet dataset (synced first) as a pyarrow Table, opening
+    only the month partitions within the date range and reading only `columns`; the date,
+    category and `spending` (amount > 0) filters are pushed down to the Parquet files.
+
+    Args:
+        columns (list, optional): Any of 'id', 'date', 'date_ordinal', 'description',
+                                  'amount', 'category' and 'month'. Defaults to all.
+        date_from (datetime.date, optional): First date to include.
+        date_to (datetime.date, optional): Last date to include.
+        category (str, optional): Only rows of this category.
+        spending (bool): Only rows with a positive amount.
+        file_path (str): The path to the JSONL file.
+
+    Returns:
+        pyarrow.Table, or None if pyarrow is not installed.
+    """
+    manifest = sync_parquet_dataset(file_path)
+    if manifest is None:
+        return None
+    with _PARQUET_LOCK:
+        return _parquet_store().read_table(file_path, manifest, columns,
+                                           date_from.toordinal() if date_from else None,
+                                           date_to.toordinal() if date_to else None, category, spending)
+
+def load_spending_totals(date_from=None, date_to=None, category=None, file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Filtered counterpart of load_aggregates, answered from the Parquet dataset: only the
+    amount and category columns of the months in range are read.
+
+    Returns:
+        dict: {'total_spent', 'monthly', 'categories'} as load_aggregates, or None if
+              pyarrow is not installed.
+    """
+    table = query_transactions_parquet(['amount', 'category', 'month'], date_from, date_to, category,
+                                       spending=True, file_path=file_path)
+    if table is None:
+        return None
+    return _parquet_store().spending_totals(table)
+
+def _decode_jsonl_chunk(data, file_path, transactions, offsets=None, base=0):
+    """
+    Decodes a chunk of raw JSON Lines bytes, appending each valid object to `transactions`.
+    Batch header lines are skipped; malformed lines are logged and skipped. If `offsets` is
+    given, the file offset of each decoded line (`data` starting at `base`) is appended to it.
+    """
+    position = base
+    for raw_line in data.split(b'\n'):
+        line_start = position
+        position += len(raw_line) + 1
+        line = raw_line.strip()
+        if not line or is_header_line(line):
+            continue
+        try:
+            transactions.append(json.loads(line))
+        except (json.JSONDecodeError, UnicodeDecodeError) as jde:
+            logging.warning(f"Skipping malformed JSON line in {file_path}: {line.decode('utf-8', 'replace')}. Error: {jde}")
+            continue
+        if offsets is not None:
+            offsets.append(line_start)
+
+def _append_to_list(rows, blocks):
+    for new_rows in blocks:
+        rows.extend(new_rows)
+    return rows
+
+def _refresh_cache_entry(cache, file_path, st, empty_rows=list, append_rows=_append_to_list, seed=None):
+    """
+    Brings the entry for `file_path` in `cache` up to date with the file described by `st`.
+
+    The file is only ever appended to, so when its identity (device, inode) is unchanged
+    and it has grown, only the byte range after the last decoded newline is read.
+    Anything else (new inode, truncation, same-size rewrite) triggers a full reload.
+    Decoded rows are accumulated with `append_rows(rows, blocks)`, where `blocks` yields
+    lists of new rows, starting from `empty_rows()`.
+    When there is no entry yet, `seed(file_path, st)` may supply one covering a prefix of the file.
+    """
+    entry = cache.get(file_path)
+    identity = (st.st_dev, st.st_ino)
+    if entry and entry['identity'] == identity and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+        return entry
+    if entry is None and seed is not None:
+        entry = seed(file_path, st)
+
+    with open(file_path, 'rb') as f:
+        # A seeded entry has no mtime; otherwise an unchanged size with a new mtime means a rewrite.
+        rewritten = entry is not None and entry['size'] == st.st_size and entry['mtime_ns'] is not None
+        reuse = (entry is not None and entry['identity'] == identity
+                 and entry['offset'] <= st.st_size and not rewritten)
+        if reuse and entry['offset'] > 0:
+            # Make sure the bytes we already decoded still end on a line boundary.
+            f.seek(entry['offset'] - 1)
+            reuse = f.read(1) == b'\n'
+        if not reuse:
+            entry = {'identity': identity, 'offset': 0, 'rows': empty_rows(), 'tail': []}
+        # The new bytes are decoded in blocks of REFRESH_READ_BYTES and handed to append_rows
+        # lazily, so only one block of dicts needs to be alive at a time. Only complete lines
+        # advance the offset; a trailing partial line (e.g. a writer mid-append) is decoded
+        # separately and re-read on the next refresh.
+        f.seek(entry['offset'])
+        progress = {'offset': entry['offset'], 'partial': b''}
+        def blocks():
+            while True:
+                block = f.read(REFRESH_READ_BYTES)
+                if not block:
+                    return
+                data = progress['partial'] + block
+                last_newline = data.rfind(b'\n')
+                complete, progress['partial'] = data[:last_newline + 1], data[last_newline + 1:]
+                if complete:
+                    new_rows = []
+                    _decode_jsonl_chunk(complete, file_path, new_rows)
+                    progress['offset'] += len(complete)
+                    del data, complete
+                    yield new_rows
+                    del new_rows # Don't hold this block while decoding the next one
+        entry['rows'] = append_rows(entry['rows'], blocks())
+        entry['offset'] = progress['offset']
+        partial = progress['partial']
+
+    entry['tail'] = []
+    if partial.strip():
+        _decode_jsonl_chunk(partial, file_path, entry['tail'])
+    entry['size'] = entry['offset'] + len(partial)
+    entry['mtime_ns'] = st.st_mtime_ns
+    cache[file_path] = entry
+    return entry
+
+def clear_transactions_cache(file_path=None):
+    """
+    Drops cached transactions for `file_path`, or for every file if no path is given.
+    """
+    with _CACHE_LOCK, _DEDUP_LOCK, _DATE_INDEX_LOCK, _SEARCH_LOCK:
+        for cache in (_TRANSACTIONS_CACHE, _TABLE_CACHE, _DEDUP_CACHE, _DATE_INDEX_CACHE, _SEARCH_CACHE):
+            if file_path is None:
+                cache.clear()
+            else:
+                cache.pop(os.path.abspath(file_path), None)
+
+def load_transactions_jsonl(file_path=DEFAULT_TRANSACTIONS_FILE, use_cache=True):
     """
     Loads all transactions from a JSON Lines file.
 
+    Decoded transactions are kept in an in-process cache keyed on the file's identity
+    (inode, size, mtime), so repeated loads of an unchanged file skip JSON decoding and
+    loads after an append only decode the newly appended lines. The returned list is a
+    fresh copy, but the transaction dictionaries are shared with the cache and should be
+    treated as read-only.
+
     Args:
         file_path (str): The path to the JSONL file.
+        use_cache (bool): Set to False to bypass the cache and decode the whole file.
 
     Returns:
         list: A list of transaction dictionaries. Returns an empty list if the file
@@ -56,15 +832,15 @@ def load_transactions_jsonl(file_path=DEFAULT_TRANSACTIONS_FILE):
         return transactions
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        transactions.append(json.loads(line))
-                    except json.JSONDecodeError as jde:
-                        logging.warning(f"Skipping malformed JSON line in {file_path}: {line}. Error: {jde}")
-                        continue
+        repair_torn_tail(file_path)
+        if use_cache:
+            cache_key = os.path.abspath(file_path)
+            with _CACHE_LOCK:
+                entry = _refresh_cache_entry(_TRANSACTIONS_CACHE, cache_key, os.stat(cache_key))
+                transactions = entry['rows'] + entry['tail']
+        else:
+            with open(file_path, 'rb') as f:
+                _decode_jsonl_chunk(f.read(), file_path, transactions)
         logging.info(f"Successfully loaded {len(transactions)} transactions from {file_path}")
     except IOError as e:
         logging.error(f"IOError reading from {file_path}: {e}")
@@ -73,6 +849,183 @@ def load_transactions_jsonl(file_path=DEFAULT_TRANSACTIONS_FILE):
 
     return transactions
 
+def iter_transactions_jsonl(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Yields transactions from a JSON Lines file one at a time, without building a list or
+    touching the in-process cache, so memory use stays flat regardless of file size.
+    Malformed lines are logged and skipped.
+
+    Args:
+        file_path (str): The path to the JSONL file.
+    """
+    if not os.path.exists(file_path):
+        logging.info(f"Transaction file {file_path} not found. Nothing to iterate.")
+        return
+    repair_torn_tail(file_path)
+    yield from _iter_jsonl_lines(file_path)
+
+def _iter_jsonl_lines(file_path):
+    with open(file_path, 'rb') as f:
+        for raw_line in f:
+            line = raw_line.strip()
+            if not line or is_header_line(line):
+                continue
+            try:
+                transaction = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as jde:
+                logging.warning(f"Skipping malformed JSON line in {file_path}: {line.decode('utf-8', 'replace')}. Error: {jde}")
+                continue
+            yield transaction
+
+def migrate_transaction_dates(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Rewrites the log so that rows saved before dates were normalized at ingest get an ISO
+    'date' and a 'date_ordinal' like new rows. Their date strings are read the way the
+    read paths used to (ISO, then month-first, then day-first). The rewritten log replaces
+    the old one atomically under the writer lock; the sidecars are rebuilt from it on next
+    use. Running it again once every row is normalized does nothing.
+
+    Returns:
+        dict: {'rows': total rows, 'migrated': rows that were rewritten}
+    """
+    summary = {'rows': 0, 'migrated': 0}
+    if not os.path.exists(file_path):
+        logging.info(f"Transaction file {file_path} not found. Nothing to migrate.")
+        return summary
+    normalizer = DateNormalizer()
+    tmp_path = file_path + '.migrating'
+    with _DEDUP_LOCK, TransactionLogWriter(file_path) as log, log.locked():
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path) # Left over from an interrupted run
+        old_inode = os.stat(file_path).st_ino
+        with TransactionLogWriter(tmp_path) as out, out.locked():
+            for batch in _batched(_iter_jsonl_lines(file_path), STREAM_BATCH_SIZE):
+                for transaction in batch:
+                    if 'date_ordinal' not in transaction:
+                        normalizer.apply(transaction)
+                        summary['migrated'] += 1
+                summary['rows'] += len(batch)
+                out.append(batch)
+        if not summary['migrated']:
+            os.remove(tmp_path)
+            logging.info(f"All {summary['rows']} transactions in {file_path} already have normalized dates.")
+            return summary
+        os.replace(tmp_path, file_path)
+        dedup_store.rebind_imported_files(file_path, old_inode, os.stat(file_path).st_ino)
+    clear_transactions_cache(file_path)
+    logging.info(f"Normalized dates of {summary['migrated']} of {summary['rows']} transactions in {file_path}.")
+    _maybe_compact_snapshot(file_path)
+    return summary
+
+def _snapshot_seed(file_path, st):
+    """Starts a table cache entry from the memory-mapped snapshot, if it matches the log."""
+    from spendwise.utils.snapshot import open_snapshot, log_boundary_crc
+    try:
+        opened = open_snapshot(file_path)
+    except (IOError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable snapshot for {file_path}: {e}")
+        return None
+    if opened is None:
+        return None
+    table, header = opened
+    if (header['log_inode'] != st.st_ino or header['log_offset'] > st.st_size
+            or header['log_crc'] != log_boundary_crc(file_path, header['log_offset'])):
+        logging.info(f"Snapshot for {file_path} does not match the current log; decoding the full file.")
+        return None
+    return {'identity': (st.st_dev, st.st_ino), 'offset': header['log_offset'], 'size': header['log_offset'],
+            'mtime_ns': None, 'rows': table, 'tail': []}
+
+def load_transaction_table(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Loads the transactions file as a columnar TransactionTable.
+
+    On first load in a process the table is started from the memory-mapped snapshot (see
+    compact_transactions_snapshot), so only the JSONL written after the snapshot is decoded.
+    The table is then cached and extended incrementally as the file grows, in the same way
+    as load_transactions_jsonl, but without keeping the decoded dicts around.
+
+    Args:
+        file_path (str): The path to the JSONL file.
+
+    Returns:
+        TransactionTable: The table; empty if the file doesn't exist or an error occurs.
+    """
+    # Imported here so the plain JSONL API doesn't pull in NumPy.
+    from spendwise.utils.transaction_table import TransactionTable
+
+    if not os.path.exists(file_path):
+        logging.info(f"Transaction file {file_path} not found. Returning empty table.")
+        return TransactionTable()
+    try:
+        repair_torn_tail(file_path)
+        cache_key = os.path.abspath(file_path)
+        with _CACHE_LOCK:
+            entry = _refresh_cache_entry(_TABLE_CACHE, cache_key, os.stat(cache_key),
+                                         empty_rows=TransactionTable,
+                                         append_rows=lambda table, blocks: table.extended_blocks(blocks),
+                                         seed=_snapshot_seed)
+            return entry['rows'].extended(entry['tail'])
+    except IOError as e:
+        logging.error(f"IOError reading from {file_path}: {e}")
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while loading transaction table from {file_path}: {e}")
+    return TransactionTable()
+
+def compact_transactions_snapshot(file_path=DEFAULT_TRANSACTIONS_FILE):
+    """
+    Writes a binary columnar snapshot of every complete line currently in the transactions file.
+    Returns True if a snapshot was written.
+    """
+    from spendwise.utils.snapshot import write_snapshot
+
+    if not os.path.exists(file_path):
+        return False
+    load_transaction_table(file_path)
+    with _CACHE_LOCK:
+        entry = _TABLE_CACHE.get(os.path.abspath(file_path))
+        if entry is None:
+            return False
+        table, log_inode, log_offset = entry['rows'], entry['identity'][1], entry['offset']
+    return write_snapshot(file_path, table, log_inode, log_offset)
+
+def _snapshot_is_stale(file_path):
+    """True once more than SNAPSHOT_COMPACT_BYTES of JSONL sit outside the snapshot."""
+    identity = _log_identity(file_path)
+    if identity is None or identity[1] < SNAPSHOT_COMPACT_BYTES:
+        return False
+    from spendwise.utils.snapshot import read_snapshot_header
+    header = read_snapshot_header(file_path)
+    covered = header['log_offset'] if header and header['log_inode'] == identity[0] else 0
+    return identity[1] - covered >= SNAPSHOT_COMPACT_BYTES
+
+def _maybe_compact_snapshot(file_path):
+    if _snapshot_is_stale(file_path):
+        compact_transactions_snapshot(file_path)
+
+def _schedule_snapshot_compaction(file_path):
+    """
+    Re-snapshots a stale log on a background thread, so the save that crossed
+    SNAPSHOT_COMPACT_BYTES doesn't wait for the whole table to be rewritten. Does nothing
+    while a compaction of the same file is still running.
+    """
+    if not _snapshot_is_stale(file_path):
+        return
+    cache_key = os.path.abspath(file_path)
+    with _COMPACTIONS_LOCK:
+        running = _COMPACTIONS.get(cache_key)
+        if running is not None and running.is_alive():
+            return
+        # Not a daemon thread: the snapshot is replaced atomically, but finishing it at exit saves redoing the work
+        thread = threading.Thread(target=_run_snapshot_compaction, args=(file_path,), name='snapshot-compaction')
+        _COMPACTIONS[cache_key] = thread
+        thread.start()
+
+def _run_snapshot_compaction(file_path):
+    try:
+        compact_transactions_snapshot(file_path)
+    except Exception as e:
+        logging.error(f"Background snapshot compaction of {file_path} failed: {e}", exc_info=True)
+
 if __name__ == '__main__':
     # Example Usage for testing data_storage
     logging.info("Testing data_storage functions...")
@@ -84,8 +1037,10 @@ if __name__ == '__main__':
     test_file = os.path.join(STORAGE_DIR, 'test_transactions.jsonl')
 
     # Clean up old test file if it exists
-    if os.path.exists(test_file):
-        os.remove(test_file)
+    for path in (test_file, aggregate_store.aggregates_path(test_file), dedup_store.dedup_path(test_file),
+                 date_store.date_index_path(test_file), search_store.search_index_path(test_file)):
+        if os.path.exists(path):
+            os.remove(path)
 
     sample_transactions1 = [
         {'date': '2023-01-01', 'description': 'Test A', 'amount': 10.0},
@@ -125,7 +1080,16 @@ if __name__ == '__main__':
     logging.info("Testing saving an empty list of transactions...")
     save_transactions_jsonl([], test_file) # Should just log and return False
 
-    # Clean up test file
-    if os.path.exists(test_file):
-        os.remove(test_file)
+    # Saving the first batch again only drops duplicates
+    save_transactions_jsonl(sample_transactions1, test_file)
+    if len(load_transactions_jsonl(test_file)) == expected_total:
+        logging.info("Re-saved transactions were dropped as duplicates.")
+    else:
+        logging.error("Re-saved transactions were appended again.")
+
+    # Clean up test file and its sidecars
+    for path in (test_file, aggregate_store.aggregates_path(test_file), dedup_store.dedup_path(test_file),
+                 date_store.date_index_path(test_file), search_store.search_index_path(test_file)):
+        if os.path.exists(path):
+            os.remove(path)
     logging.info("Data storage tests complete.")
@@ -0,0 +1,166 @@
+# spendwise/utils/date_index.py
+"""
+Sorted (date ordinal -> byte offset) index over transactions.jsonl.
+
+Layout (little-endian):
+    header   magic, version, log inode, log bytes covered, number of leading sorted entries
+    entries  (ordinal i4, offset u8) records: a sorted run, then entries appended unsorted
+
+Appends add records for the new rows to the end of the file; readers sort that (small)
+tail and merge it with the sorted run. Once the tail grows past the sorted run it is
+merged and the file rewritten. Rows without a date are indexed under ordinal 0, so they
+never fall inside a date range.
+"""
+import logging
+import os
+import struct
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DATE_INDEX_SUFFIX = '.dateidx'
+DATE_INDEX_MAGIC = b'SWDATE01'
+DATE_INDEX_VERSION = 1
+MIN_MERGE_ENTRIES = 4096 # Unsorted entries tolerated before the file is rewritten sorted
+ENTRY_DTYPE = np.dtype([('ordinal', '<i4'), ('offset', '<u8')])
+_HEADER = struct.Struct('<8sIQQQ')
+
+def date_index_path(file_path):
+    """Returns the path of the date index kept next to a transactions file."""
+    return os.path.splitext(file_path)[0] + DATE_INDEX_SUFFIX
+
+class DateIndex:
+    """Entries sorted by (ordinal, offset), searched with binary search."""
+
+    def __init__(self, ordinals=None, offsets=None):
+        self.ordinals = ordinals if ordinals is not None else np.empty(0, dtype=np.int32)
+        self.offsets = offsets if offsets is not None else np.empty(0, dtype=np.uint64)
+
+    @classmethod
+    def from_entries(cls, ordinals, offsets):
+        ordinals = np.asarray(ordinals, dtype=np.int32)
+        offsets = np.asarray(offsets, dtype=np.uint64)
+        order = np.lexsort((offsets, ordinals))
+        return cls(ordinals[order], offsets[order])
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def merged(self, ordinals, offsets):
+        """
+        Returns a new index with the (unsorted) entries added. The new rows must lie after
+        every row already indexed, as appended rows do, so each one goes after the existing
+        entries of its date and a linear insert replaces a full re-sort.
+        """
+        if len(ordinals) == 0:
+            return self
+        added = DateIndex.from_entries(ordinals, offsets)
+        positions = np.searchsorted(self.ordinals, added.ordinals, side='right')
+        return DateIndex(np.insert(self.ordinals, positions, added.ordinals),
+                         np.insert(self.offsets, positions, added.offsets))
+
+    def range_offsets(self, first=None, last=None):
+        """
+        Byte offsets of the rows dated first..last (inclusive day ordinals; None = open),
+        in date order with ties in file order. Undated rows are never included.
+        """
+        lower = max(first if first is not None else 1, 1)
+        start = int(np.searchsorted(self.ordinals, lower, side='left'))
+        stop = len(self.ordinals) if last is None else int(np.searchsorted(self.ordinals, last, side='right'))
+        return self.offsets[start:max(start, stop)]
+
+def read_date_index(file_path, log_inode):
+    """
+    Reads the date index for `file_path`.
+
+    Returns:
+        tuple: (DateIndex, log bytes covered, unsorted entry count), or None if the index is
+               missing, unreadable, or belongs to a different log file.
+    """
+    path = date_index_path(file_path)
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    except IOError as e:
+        logging.warning(f"Ignoring unreadable date index {path}: {e}")
+        return None
+    header = _unpack_header(raw)
+    if header is None or header[2] != log_inode:
+        return None
+    _, _, _, covered, sorted_count = header
+    body = raw[_HEADER.size:]
+    entries = np.frombuffer(body[:len(body) - len(body) % ENTRY_DTYPE.itemsize], dtype=ENTRY_DTYPE)
+    sorted_count = min(sorted_count, len(entries))
+    index = DateIndex(entries['ordinal'][:sorted_count].astype(np.int32), entries['offset'][:sorted_count].astype(np.uint64))
+    tail = entries[sorted_count:]
+    return index.merged(tail['ordinal'], tail['offset']), covered, len(tail)
+
+def read_date_index_header(file_path):
+    """
+    Returns (log inode, log bytes covered, sorted entries, total entries), or None if there
+    is no usable index.
+    """
+    path = date_index_path(file_path)
+    try:
+        with open(path, 'rb') as f:
+            header = _unpack_header(f.read(_HEADER.size))
+            size = os.fstat(f.fileno()).st_size
+    except (FileNotFoundError, IOError):
+        return None
+    if header is None:
+        return None
+    return header[2], header[3], header[4], (size - _HEADER.size) // ENTRY_DTYPE.itemsize
+
+def _unpack_header(raw):
+    if len(raw) < _HEADER.size:
+        return None
+    header = _HEADER.unpack_from(raw)
+    if header[0] != DATE_INDEX_MAGIC or header[1] != DATE_INDEX_VERSION:
+        return None
+    return header
+
+def _entries(ordinals, offsets):
+    entries = np.empty(len(ordinals), dtype=ENTRY_DTYPE)
+    entries['ordinal'] = ordinals
+    entries['offset'] = offsets
+    return entries
+
+def write_date_index(file_path, index, log_identity):
+    """Atomically rewrites the date index as one sorted run."""
+    path = date_index_path(file_path)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(DATE_INDEX_MAGIC, DATE_INDEX_VERSION, *log_identity, len(index)))
+            f.write(_entries(index.ordinals, index.offsets).tobytes())
+        os.replace(tmp_path, path)
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Could not write date index {path}: {e}")
+        return False
+
+def append_date_index(file_path, ordinals, offsets, log_identity):
+    """
+    Appends entries for rows just added to the log, then records the log state they cover
+    (header last, so an interrupted append is caught up on the next load).
+    """
+    path = date_index_path(file_path)
+    try:
+        with open(path, 'r+b') as f:
+            header = _unpack_header(f.read(_HEADER.size))
+            if header is None:
+                return False
+            f.seek(0, os.SEEK_END)
+            f.write(_entries(ordinals, offsets).tobytes())
+            f.seek(0)
+            f.write(_HEADER.pack(DATE_INDEX_MAGIC, DATE_INDEX_VERSION, *log_identity, header[4]))
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Could not append to date index {path}: {e}")
+        return False
+
+def needs_merge(sorted_count, unsorted_count):
+    """True once the unsorted tail is big enough that the file should be rewritten sorted."""
+    return unsorted_count > max(sorted_count, MIN_MERGE_ENTRIES)
@@ -0,0 +1,128 @@
+# spendwise/utils/date_normalizer.py
+"""
+Canonical transaction dates.
+
+Parsers normalize every row at ingest to an ISO 'YYYY-MM-DD' string plus an integer day
+ordinal ('date_ordinal', proleptic Gregorian, as date.toordinal()), so read paths bucket
+and filter by integers and never parse strings. A statement uses one date format
+throughout, so the format is detected once per file from a sample of rows; only rows that
+don't fit it are tried against the other formats.
+
+Rows whose date can't be parsed keep their original string with 'date_ordinal' None.
+"""
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Tried in this order; on ambiguous samples (e.g. 01/02/2023) the earlier format wins, so
+# month-first is preferred over day-first as before.
+DATE_FORMATS = (
+    '%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%d/%m/%Y', '%m/%d/%y', '%d/%m/%y',
+    '%m-%d-%Y', '%d-%m-%Y', '%d.%m.%Y', '%d %b %Y', '%d %B %Y', '%d %b %y',
+    '%b %d %Y', '%b %d, %Y', '%B %d, %Y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m',
+)
+DATE_SAMPLE_SIZE = 50 # Rows used to detect a file's date format
+DATE_CACHE_SIZE = 65536
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def _parse_with(text, date_format):
+    try:
+        return datetime.strptime(text, date_format).date()
+    except ValueError:
+        return None
+
+def detect_date_format(samples):
+    """
+    Returns the entry of DATE_FORMATS that parses the most of `samples` (strings), or None
+    if none parses any.
+    """
+    texts = [s.strip() for s in samples if isinstance(s, str) and s.strip()][:DATE_SAMPLE_SIZE]
+    best_format, best_count = None, 0
+    for date_format in DATE_FORMATS:
+        count = sum(1 for text in texts if _parse_with(text, date_format) is not None)
+        if count > best_count:
+            best_format, best_count = date_format, count
+            if count == len(texts):
+                break
+    return best_format
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(text):
+    """Parses a date string with the first matching entry of DATE_FORMATS. Returns a date or None."""
+    if not isinstance(text, str):
+        return None
+    text = text.strip()
+    for date_format in DATE_FORMATS:
+        parsed = _parse_with(text, date_format)
+        if parsed is not None:
+            return parsed
+    return None
+
+def ordinal_to_iso(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+def ordinal_month(ordinal):
+    """'YYYY-MM' for a day ordinal."""
+    day = date.fromordinal(ordinal)
+    return f"{day.year:04d}-{day.month:02d}"
+
+def month_ordinal_range(year_month):
+    """
+    (first, last) day ordinals of a 'YYYY-MM' month.
+
+    Raises:
+        ValueError: If `year_month` isn't a valid 'YYYY-MM' string.
+    """
+    first = datetime.strptime(year_month, '%Y-%m').date()
+    following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first.toordinal(), following.toordinal() - 1
+
+class DateNormalizer:
+    """
+    Normalizes the dates of one statement. Results are memoized per distinct input, since
+    statements repeat the same dates on many rows.
+    """
+
+    def __init__(self, date_format=None):
+        self.date_format = date_format
+        self._memo = {}
+
+    @classmethod
+    def from_samples(cls, samples):
+        date_format = detect_date_format(samples)
+        if date_format:
+            logging.info(f"Detected statement date format '{date_format}'.")
+        return cls(date_format)
+
+    def normalize(self, value):
+        """Returns (ISO date string, day ordinal), or (value, None) if it isn't a date."""
+        if isinstance(value, datetime):
+            value = value.date()
+        if isinstance(value, date):
+            return value.isoformat(), value.toordinal()
+        cached = self._memo.get(value)
+        if cached is not None:
+            return cached
+        parsed = None
+        if isinstance(value, str):
+            if self.date_format:
+                parsed = _parse_with(value.strip(), self.date_format)
+            if parsed is None:
+                parsed = parse_date(value)
+        normalized = (parsed.isoformat(), parsed.toordinal()) if parsed else (value, None)
+        self._memo[value] = normalized
+        return normalized
+
+    def apply(self, transaction):
+        """Sets 'date' and 'date_ordinal' on a transaction dict in place and returns it."""
+        transaction['date'], transaction['date_ordinal'] = self.normalize(transaction.get('date'))
+        return transaction
+
+def normalize_transactions(transactions):
+    """Normalizes a list of transactions in place, detecting the format from the list itself."""
+    normalizer = DateNormalizer.from_samples([tx.get('date') for tx in transactions[:DATE_SAMPLE_SIZE]])
+    for transaction in transactions:
+        normalizer.apply(transaction)
+    return transactions
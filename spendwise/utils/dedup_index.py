@@ -0,0 +1,192 @@
+# spendwise/utils/dedup_index.py
+"""
+Duplicate detection for the transactions log.
+
+Every stored transaction has a 64-bit key hashed from its normalized (day, description,
+amount) plus an occurrence number: the n-th stored copy of the same triple gets
+occurrence n. An incoming batch numbers its own copies the same way, so re-importing an
+overlapping statement matches the rows already stored, while genuinely repeated
+transactions (two identical coffees on one day) are kept as long as the new statement
+has more copies than the log.
+
+The keys live in a sidecar next to the log:
+    header  magic, version, log inode, log bytes covered
+    body    uint64 keys, appended as rows are appended to the log
+
+A second sidecar records the SHA-256 of every file imported into the log, so a file that
+was already imported can be skipped before it is parsed.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import time
+from array import array
+from datetime import date
+from spendwise.utils.date_normalizer import parse_date
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEDUP_SUFFIX = '.dedup'
+IMPORTS_SUFFIX = '.imports.json'
+DEDUP_MAGIC = b'SWDEDUP1'
+DEDUP_VERSION = 2 # 2: fingerprints use the normalized day, not the raw date string
+IMPORTS_VERSION = 1
+_HEADER = struct.Struct('<8sIQQ')
+_WHITESPACE_REGEX = re.compile(r'\s+')
+
+def dedup_path(file_path):
+    """Returns the path of the dedup index kept next to a transactions file."""
+    return os.path.splitext(file_path)[0] + DEDUP_SUFFIX
+
+def imports_path(file_path):
+    """Returns the path of the imported-files record kept next to a transactions file."""
+    return os.path.splitext(file_path)[0] + IMPORTS_SUFFIX
+
+def fingerprint_date(tx):
+    """
+    The day a transaction is deduplicated on, as 'YYYY-MM-DD': its 'date_ordinal' when set,
+    else its date string parsed (rows saved before dates were normalized at ingest), else
+    the raw string. So '01/15/2023' in an old row matches '2023-01-15' from a re-import.
+    """
+    ordinal = tx.get('date_ordinal')
+    if ordinal:
+        return date.fromordinal(ordinal).isoformat()
+    raw = tx.get('date')
+    parsed = parse_date(raw)
+    if parsed:
+        return parsed.isoformat()
+    return str(raw or '').strip()
+
+def transaction_fingerprint(tx):
+    """Normalized (day, description, amount) of a transaction, as bytes."""
+    date_str = fingerprint_date(tx)
+    description = _WHITESPACE_REGEX.sub(' ', str(tx.get('description') or '')).strip().casefold()
+    try:
+        amount = f"{float(tx.get('amount') or 0):.2f}"
+    except (ValueError, TypeError):
+        amount = str(tx.get('amount'))
+    return '\x1f'.join((date_str, description, amount)).encode('utf-8')
+
+def occurrence_key(fingerprint, occurrence):
+    """64-bit key for the `occurrence`-th copy (0-based) of a fingerprint."""
+    digest = hashlib.blake2b(fingerprint, digest_size=8, person=occurrence.to_bytes(8, 'little'))
+    return int.from_bytes(digest.digest(), 'little')
+
+def next_occurrence(keys, fingerprint):
+    """Returns (occurrence, key) for one more stored copy of `fingerprint`."""
+    occurrence = 0
+    key = occurrence_key(fingerprint, occurrence)
+    while key in keys:
+        occurrence += 1
+        key = occurrence_key(fingerprint, occurrence)
+    return occurrence, key
+
+def read_index(file_path, log_inode):
+    """
+    Reads the dedup index for `file_path`.
+
+    Returns:
+        tuple: (set of keys, log bytes covered), or None if the index is missing,
+               unreadable, or belongs to a different log file.
+    """
+    path = dedup_path(file_path)
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    except IOError as e:
+        logging.warning(f"Ignoring unreadable dedup index {path}: {e}")
+        return None
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, inode, covered = _HEADER.unpack_from(raw)
+    if magic != DEDUP_MAGIC or version != DEDUP_VERSION or inode != log_inode:
+        return None
+    body = raw[_HEADER.size:]
+    keys = array('Q')
+    keys.frombytes(body[:len(body) - len(body) % keys.itemsize]) # Drop a torn trailing key
+    return set(keys), covered
+
+def write_index(file_path, keys, log_identity):
+    """Atomically rewrites the dedup index with every key in `keys`."""
+    path = dedup_path(file_path)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(DEDUP_MAGIC, DEDUP_VERSION, *log_identity))
+            f.write(array('Q', keys).tobytes())
+        os.replace(tmp_path, path)
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Could not write dedup index {path}: {e}")
+        return False
+
+def append_index(file_path, new_keys, log_identity):
+    """
+    Appends keys for rows just added to the log, then records the log state they cover.
+    The header is updated last, so an interrupted append leaves an index that still
+    points at the older log size and is caught up on the next load.
+    """
+    path = dedup_path(file_path)
+    if not os.path.exists(path):
+        return write_index(file_path, new_keys, log_identity)
+    try:
+        with open(path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            f.write(array('Q', new_keys).tobytes())
+            f.seek(0)
+            f.write(_HEADER.pack(DEDUP_MAGIC, DEDUP_VERSION, *log_identity))
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Could not append to dedup index {path}: {e}")
+        return False
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_imported_files(file_path, log_inode):
+    """Returns {sha256: info} for files imported into this log (empty if none or stale)."""
+    path = imports_path(file_path)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (IOError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable imports record {path}: {e}")
+        return {}
+    if data.get('version') != IMPORTS_VERSION or data.get('log_inode') != log_inode:
+        return {}
+    return data.get('files', {})
+
+def record_imported_file(file_path, sha256, filename, rows, log_inode):
+    """Adds a file's hash to the imported-files record (atomic replace)."""
+    files = read_imported_files(file_path, log_inode)
+    files[sha256] = {'filename': filename, 'rows': rows, 'imported_at': time.time()}
+    return _write_imported_files(file_path, files, log_inode)
+
+def rebind_imported_files(file_path, old_inode, new_inode):
+    """Keeps the imported-files record when the log is rewritten in place under a new inode."""
+    files = read_imported_files(file_path, old_inode)
+    return _write_imported_files(file_path, files, new_inode) if files else True
+
+def _write_imported_files(file_path, files, log_inode):
+    path = imports_path(file_path)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': IMPORTS_VERSION, 'log_inode': log_inode, 'files': files}, f)
+        os.replace(tmp_path, path)
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Could not write imports record {path}: {e}")
+        return False
@@ -7,8 +7,10 @@ if not __package__ and not hasattr(sys, 'frozen'):
         sys.path.insert(0, project_root)
 
 import pandas as pd
+import openpyxl
 import logging
-from spendwise.utils.categorizer import categorize_transaction # Import
+from spendwise.utils.categorizer import categorize_series
+from spendwise.utils.date_normalizer import detect_date_format, DATE_SAMPLE_SIZE, UNIX_EPOCH_ORDINAL
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -17,27 +19,115 @@ HEADER_MAPPINGS = {
     'description': ['description', 'narrative', 'details', 'memo'],
     'amount': ['amount', 'value', 'credit', 'debit']
 }
-def normalize_headers(df):
-    df_normalized = df.copy()
-    new_columns = {}
-    current_headers_lower = [str(col).lower() for col in df_normalized.columns]
+EXCEL_CHUNK_SIZE = 5000 # Rows per chunk in streaming mode
+HEADER_SCAN_ROWS = 10 # How many leading rows streaming mode searches for the header row
+
+def _map_headers(headers, warn=True):
+    """Returns {canonical_name: column index} for the headers matching HEADER_MAPPINGS."""
+    mapping = {}
+    current_headers_lower = [str(col).lower() for col in headers]
     for canonical_name, variations in HEADER_MAPPINGS.items():
         found = False
         for variation in variations:
             try:
-                idx = current_headers_lower.index(variation)
-                new_columns[df_normalized.columns[idx]] = canonical_name
+                mapping[canonical_name] = current_headers_lower.index(variation)
                 found = True; break
             except ValueError: continue
-        if not found: logging.warning(f"Excel: Canonical header '{canonical_name}' not found. Variations: {variations}")
-    df_normalized.rename(columns=new_columns, inplace=True)
-    return df_normalized
+        if not found and warn: logging.warning(f"Excel: Canonical header '{canonical_name}' not found. Variations: {variations}")
+    return mapping
+
+def normalize_headers(df):
+    """
+    Renames the columns of `df` in place to the canonical names in HEADER_MAPPINGS and
+    returns it. Only column labels change, so no data is copied.
+    """
+    new_columns = {df.columns[idx]: canonical_name for canonical_name, idx in _map_headers(df.columns).items()}
+    df.columns = [new_columns.get(col, col) for col in df.columns]
+    return df
+
+def _format_row_numbers(row_numbers):
+    """Formats row numbers compactly, collapsing consecutive runs: [1, 2, 3, 7] -> '1-3, 7'."""
+    ranges = []
+    for number in row_numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ', '.join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def _clean_amounts(amounts):
+    """Converts an amount column to float64, stripping '$' and ',' in one vectorized pass. Invalid -> NaN."""
+    if pd.api.types.is_numeric_dtype(amounts):
+        return amounts.astype('float64')
+    stripped = amounts.astype(str).str.replace(r'[$,]', '', regex=True).str.strip()
+    return pd.to_numeric(stripped, errors='coerce').astype('float64')
+
+def _parse_date_column(dates_raw, missing_date, date_format=None):
+    """
+    Parses a text/object date column. The statement's format is detected from the first
+    rows (unless given) and applied to the whole column in one pass; only cells that don't
+    fit it are retried with pandas' per-element 'mixed' parsing.
+    """
+    texts = dates_raw.astype(str).where(~missing_date)
+    if date_format is None:
+        date_format = detect_date_format(texts[~missing_date].head(DATE_SAMPLE_SIZE).tolist())
+    if date_format is None:
+        return pd.to_datetime(texts, errors='coerce', format='mixed', cache=True)
+    dates = pd.to_datetime(texts, errors='coerce', format=date_format, cache=True)
+    retry = ~missing_date & dates.isna()
+    if retry.any():
+        dates = dates.where(~retry, pd.to_datetime(texts[retry], errors='coerce', format='mixed', cache=True))
+    return dates
+
+def frame_to_transactions(df, file_path, date_format=None):
+    """
+    Converts a DataFrame with canonical 'date', 'description' and 'amount' columns into
+    transaction dicts using whole-column operations. Row numbers in log messages are
+    taken from the frame's index (index + 1). Dates are stored as ISO strings plus
+    'date_ordinal'; `date_format` skips format detection (e.g. for later chunks of a file).
+
+    Returns:
+        tuple: (list of transaction dicts, number of skipped rows)
+    """
+    dates_raw = df['date']
+    descriptions = df['description']
+    amounts_raw = df['amount']
+
+    missing_date = dates_raw.isna()
+    if pd.api.types.is_datetime64_any_dtype(dates_raw):
+        dates = dates_raw
+    else:
+        dates = _parse_date_column(dates_raw, missing_date, date_format)
+    amounts = _clean_amounts(amounts_raw)
+
+    # Same precedence as the checks a row goes through: date present, date parses,
+    # description/amount present, amount numeric.
+    unparsable_date = ~missing_date & dates.isna()
+    date_ok = ~missing_date & ~unparsable_date
+    missing_fields = date_ok & (descriptions.isna() | amounts_raw.isna())
+    invalid_amount = date_ok & ~missing_fields & amounts.isna()
+    valid = date_ok & ~missing_fields & ~invalid_amount
+
+    for mask, reason in ((missing_date, "missing Date"), (unparsable_date, "unparsable date"),
+                         (missing_fields, "missing Description or Amount"), (invalid_amount, "invalid amount")):
+        if mask.any():
+            row_numbers = _format_row_numbers((df.index[mask.to_numpy()] + 1).tolist())
+            logging.warning(f"Skipping Excel rows {row_numbers} in {file_path} due to {reason}.")
+
+    valid_descriptions = descriptions[valid].astype(str)
+    valid_days = dates[valid].dt.normalize()
+    transactions = pd.DataFrame({
+        'date': valid_days.dt.strftime('%Y-%m-%d'),
+        'description': valid_descriptions,
+        'amount': amounts[valid],
+        'category': categorize_series(valid_descriptions),
+        'date_ordinal': (valid_days - pd.Timestamp('1970-01-01')).dt.days + UNIX_EPOCH_ORDINAL,
+    }).to_dict('records')
+    return transactions, int((~valid).sum())
 
 def parse_excel(file_path):
     result = {'transactions': [], 'success_count': 0, 'skipped_count': 0}
     try:
-        # Ensure os is imported if not already at the top for __main__
-        # import os # Already imported at the top for the original __main__ test
         date_col_variations = HEADER_MAPPINGS.get('date', ['date'])
         dtype_spec = {col_name: str for col_name in date_col_variations}
         df = pd.read_excel(file_path, sheet_name=0, dtype=dtype_spec)
@@ -54,54 +144,10 @@ def parse_excel(file_path):
             result['skipped_count'] = df.shape[0]
             return result
 
-        for index, row in df_normalized.iterrows():
-            try:
-                date_val = row.get('date')
-                desc_val = row.get('description')
-                amount_val = row.get('amount')
-
-                date_str = None
-                if pd.isna(date_val):
-                    logging.warning(f"Skipping Excel row {index+1} in {file_path} due to missing Date. Row: {row.to_dict()}")
-                    result['skipped_count'] += 1
-                    continue
-
-                if isinstance(date_val, pd.Timestamp) or pd.api.types.is_datetime64_any_dtype(date_val):
-                    date_str = date_val.strftime('%Y-%m-%d')
-                else:
-                    try:
-                        date_str = pd.to_datetime(str(date_val)).strftime('%Y-%m-%d')
-                    except ValueError:
-                        logging.warning(f"Skipping Excel row {index+1} in {file_path} due to unparsable date: '{date_val}'. Row: {row.to_dict()}")
-                        result['skipped_count'] += 1
-                        continue
-
-                if pd.isna(desc_val) or pd.isna(amount_val):
-                    logging.warning(f"Skipping Excel row {index+1} in {file_path} due to missing Description or Amount (Date: {date_str}). Row: {row.to_dict()}")
-                    result['skipped_count'] += 1
-                    continue
-
-                try:
-                    amount_float = float(str(amount_val).replace('$', '').replace(',', '')) if not isinstance(amount_val, (int, float)) else float(amount_val)
-                except ValueError:
-                    logging.warning(f"Skipping Excel row {index+1} in {file_path} due to invalid amount: '{amount_val}'. Row: {row.to_dict()}")
-                    result['skipped_count'] += 1
-                    continue
-
-                desc_str_for_cat = str(desc_val) # Ensure description is string
-                category = categorize_transaction(desc_str_for_cat)
-
-                result['transactions'].append({
-                    'date': date_str,
-                    'description': desc_str_for_cat,
-                    'amount': amount_float,
-                    'category': category
-                })
-                result['success_count'] += 1
-            except Exception as e:
-                logging.warning(f"Error processing Excel row {index+1} in {file_path}: {e}. Row: {row.to_dict()}")
-                result['skipped_count'] += 1
-                continue
+        transactions, skipped = frame_to_transactions(df_normalized, file_path)
+        result['transactions'] = transactions
+        result['success_count'] = len(transactions)
+        result['skipped_count'] = skipped
     except FileNotFoundError:
         logging.error(f"Excel file not found: {file_path}")
         return result
@@ -118,6 +164,81 @@ def parse_excel(file_path):
         logging.info(f"Excel parsing for {file_path} complete. Success: {result['success_count']}, Skipped: {result['skipped_count']}")
     return result
 
+def iter_excel_chunks(file_path, chunk_size=EXCEL_CHUNK_SIZE, result=None):
+    """
+    Streams the first sheet of an .xlsx file with openpyxl's read-only row iterator and
+    yields lists of at most `chunk_size` transactions, so memory is bounded by the chunk
+    size rather than the workbook size. The header row is located among the first
+    HEADER_SCAN_ROWS rows using HEADER_MAPPINGS.
+
+    Args:
+        file_path (str): Path to the .xlsx file.
+        chunk_size (int): Number of sheet rows converted per chunk.
+        result (dict): Optional dict whose 'success_count' and 'skipped_count' are
+                       incremented as chunks are produced.
+    """
+    if result is None:
+        result = {'success_count': 0, 'skipped_count': 0}
+    try:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    except FileNotFoundError:
+        logging.error(f"Excel file not found: {file_path}")
+        return
+    except Exception as e:
+        logging.error(f"Failed to open Excel file {file_path} for streaming: {e}", exc_info=True)
+        return
+
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header_map = None
+        for _ in range(HEADER_SCAN_ROWS):
+            header_row = next(rows, None)
+            if header_row is None:
+                break
+            candidate = _map_headers(['' if cell is None else cell for cell in header_row], warn=False)
+            if len(candidate) == len(HEADER_MAPPINGS):
+                header_map = candidate
+                break
+        if header_map is None:
+            logging.error(f"Excel file {file_path} has no row with all required headers "
+                          f"({', '.join(HEADER_MAPPINGS)}) in its first {HEADER_SCAN_ROWS} rows.")
+            return
+
+        columns = list(header_map)
+        indices = [header_map[name] for name in columns]
+        date_position = columns.index('date')
+        date_format = None
+        buffer, row_numbers = [], []
+        for data_row_index, row in enumerate(rows):
+            values = tuple(row[i] if i < len(row) else None for i in indices)
+            if all(value is None for value in values):
+                continue # Read-only sheets often report trailing blank rows
+            buffer.append(values)
+            row_numbers.append(data_row_index)
+            if len(buffer) >= chunk_size:
+                date_format = date_format or _detect_chunk_date_format(buffer, date_position)
+                yield _convert_chunk(buffer, row_numbers, columns, file_path, result, date_format)
+                buffer, row_numbers = [], []
+        if buffer:
+            date_format = date_format or _detect_chunk_date_format(buffer, date_position)
+            yield _convert_chunk(buffer, row_numbers, columns, file_path, result, date_format)
+    except Exception as e:
+        logging.error(f"Failed while streaming Excel file {file_path}: {e}", exc_info=True)
+    finally:
+        workbook.close()
+    logging.info(f"Excel streaming for {file_path} complete. Success: {result['success_count']}, Skipped: {result['skipped_count']}")
+
+def _detect_chunk_date_format(rows, date_position):
+    """Detects the workbook's date format from a chunk (done once, on the first chunk)."""
+    return detect_date_format([str(row[date_position]) for row in rows[:DATE_SAMPLE_SIZE] if row[date_position] is not None])
+
+def _convert_chunk(rows, row_numbers, columns, file_path, result, date_format=None):
+    df = pd.DataFrame.from_records(rows, columns=columns, index=row_numbers)
+    transactions, skipped = frame_to_transactions(df, file_path, date_format)
+    result['success_count'] += len(transactions)
+    result['skipped_count'] += skipped
+    return transactions
+
 if __name__ == '__main__':
     logging.info("Testing Excel parser with categorization...")
     dummy_excel_path = 'dummy_transactions_cat.xlsx'
@@ -0,0 +1,287 @@
+# spendwise/utils/import_jobs.py
+"""
+Background import queue for uploaded statements.
+
+Each upload becomes a job run by a bounded thread pool, so the request that enqueued it
+returns immediately. The job thread does the I/O (streaming CSVs and large workbooks into
+storage) and hands CPU-bound PDF/Excel parsing to a shared, bounded process pool.
+Job state is kept in memory by the process running the job and mirrored to a small JSON
+file per job in JOBS_DIR, so get_import_job() answers in every worker process (e.g. when
+gunicorn routes the status poll to a different worker than the upload).
+"""
+import sys
+import os
+if not __package__ and not hasattr(sys, 'frozen'):
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from spendwise.utils.csv_parser import iter_csv_transactions
+from spendwise.utils.excel_parser import parse_excel, iter_excel_chunks
+from spendwise.utils.pdf_parser import parse_pdf
+from spendwise.utils.dedup_index import file_sha256
+from spendwise.utils.storage_backends import as_storage_backend
+from spendwise.utils.data_storage import STORAGE_DIR
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+IMPORT_THREAD_WORKERS = 4 # Concurrent jobs (file I/O, streaming and saving)
+IMPORT_PROCESS_WORKERS = min(4, os.cpu_count() or 1) # Processes shared by all PDF/Excel parses
+EXCEL_STREAMING_MIN_BYTES = 20 * 1024 * 1024 # .xlsx uploads at least this large are streamed
+MAX_FINISHED_JOBS = 200 # Finished jobs kept for status queries
+JOBS_DIR = os.path.join(STORAGE_DIR, 'import_jobs') # Job state files shared by all worker processes
+JOB_STATE_INTERVAL = 0.5 # Seconds between progress writes while a file streams
+JOB_STATE_MAX_AGE = 24 * 60 * 60 # Job state files older than this are deleted
+_JOB_ID_REGEX = re.compile(r'^[0-9a-f]{32}$')
+_PRIVATE_KEYS = ('future', 'persisted_at')
+
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+_THREAD_EXECUTOR = ThreadPoolExecutor(max_workers=IMPORT_THREAD_WORKERS, thread_name_prefix='import')
+_PROCESS_EXECUTOR = None
+_PROCESS_EXECUTOR_LOCK = threading.Lock()
+
+def _parse_in_process(file_type, file_path):
+    """Process pool entry point for whole-file parses (Excel workbooks)."""
+    return parse_excel(file_path)
+
+def _parse(file_type, file_path, executor):
+    """
+    Parses a PDF or Excel file in the shared process pool. PDFs are split into page ranges
+    submitted to the pool directly (no nested pool), so long statements use every worker
+    while the number of parsing processes stays bounded by IMPORT_PROCESS_WORKERS.
+    """
+    if file_type == 'pdf':
+        return parse_pdf(file_path, workers=IMPORT_PROCESS_WORKERS, executor=executor)
+    return executor.submit(_parse_in_process, file_type, file_path).result()
+
+def _process_executor():
+    global _PROCESS_EXECUTOR
+    with _PROCESS_EXECUTOR_LOCK:
+        if _PROCESS_EXECUTOR is None:
+            _PROCESS_EXECUTOR = ProcessPoolExecutor(max_workers=IMPORT_PROCESS_WORKERS)
+        return _PROCESS_EXECUTOR
+
+def _reset_process_executor(broken):
+    global _PROCESS_EXECUTOR
+    with _PROCESS_EXECUTOR_LOCK:
+        if _PROCESS_EXECUTOR is broken:
+            _PROCESS_EXECUTOR = None
+
+def submit_import(file_path, filename, storage=None):
+    """
+    Queues an uploaded file for parsing and saving.
+
+    Args:
+        file_path (str): Where the upload was saved.
+        filename (str): Original (secured) filename, used in status messages.
+        storage (StorageBackend or str, optional): Where the parsed rows are saved: a
+            backend, or the path of a transactions log or SQLite database. Defaults to the
+            configured backend (see storage_backends.get_storage_backend).
+
+    Returns:
+        str: The job ID to pass to get_import_job().
+    """
+    job_id = uuid.uuid4().hex
+    job = {
+        'id': job_id, 'filename': filename, 'status': 'queued', 'done': False,
+        'success_count': 0, 'skipped_count': 0, 'duplicate_count': 0, 'saved': None, 'messages': [], 'error': None,
+        'created_at': time.time(), 'finished_at': None,
+    }
+    with _JOBS_LOCK:
+        _prune_finished_jobs()
+        _JOBS[job_id] = job
+        _persist(job)
+    job['future'] = _THREAD_EXECUTOR.submit(_run_import, job, file_path, as_storage_backend(storage))
+    logging.info(f"Queued import job {job_id} for {filename}.")
+    return job_id
+
+def get_import_job(job_id):
+    """
+    Returns a snapshot of a job's progress as a JSON-serializable dict, or None if unknown.
+    Jobs run by other worker processes are read from their state file.
+    """
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        if job is not None:
+            return _public_state(job)
+    if not _JOB_ID_REGEX.match(job_id or ''):
+        return None
+    try:
+        with open(_job_state_path(job_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (IOError, ValueError) as e:
+        logging.warning(f"Could not read state of import job {job_id}: {e}")
+        return None
+
+def wait_for_import(job_id, timeout=None):
+    """
+    Blocks until a job run by this process has finished and returns its final state (None
+    if unknown here).
+    """
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+    if job is None:
+        return None
+    job['future'].result(timeout=timeout)
+    return get_import_job(job_id)
+
+def _public_state(job):
+    return {key: value for key, value in job.items() if key not in _PRIVATE_KEYS}
+
+def _job_state_path(job_id):
+    return os.path.join(JOBS_DIR, f'{job_id}.json')
+
+def _persist(job):
+    """Atomically writes a job's state file. Caller holds _JOBS_LOCK."""
+    path = _job_state_path(job['id'])
+    tmp_path = path + '.tmp'
+    try:
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_public_state(job), f)
+        os.replace(tmp_path, path)
+    except (IOError, OSError, TypeError) as e:
+        logging.warning(f"Could not write state of import job {job['id']}: {e}")
+    job['persisted_at'] = time.time()
+
+def _remove_job_state(job_id):
+    try:
+        os.remove(_job_state_path(job_id))
+    except OSError:
+        pass
+
+def _prune_finished_jobs():
+    finished = [job for job in _JOBS.values() if job['done']]
+    if len(finished) >= MAX_FINISHED_JOBS:
+        finished.sort(key=lambda job: job['finished_at'])
+        for job in finished[:len(finished) - MAX_FINISHED_JOBS + 1]:
+            del _JOBS[job['id']]
+            _remove_job_state(job['id'])
+    # State files of jobs from other (or exited) worker processes
+    cutoff = time.time() - JOB_STATE_MAX_AGE
+    try:
+        entries = list(os.scandir(JOBS_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def _update(job, **changes):
+    """Applies changes to a job; its state file is rewritten on status changes and at most every JOB_STATE_INTERVAL otherwise."""
+    with _JOBS_LOCK:
+        job.update(changes)
+        if 'status' in changes or time.time() - job.get('persisted_at', 0) >= JOB_STATE_INTERVAL:
+            _persist(job)
+
+def _run_import(job, file_path, storage):
+    filename = job['filename']
+    file_type = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    _update(job, status='running')
+    try:
+        if file_type not in ('csv', 'xls', 'xlsx', 'pdf'):
+            raise ValueError(f"Unsupported file type '{file_type}'.")
+        # A byte-identical file that was already imported is skipped before parsing.
+        file_hash = file_sha256(file_path) if os.path.exists(file_path) else None
+        previous = storage.file_already_imported(file_hash) if file_hash else None
+        if previous is not None:
+            logging.info(f"{filename} has the same contents as {previous['filename']}, which was already imported.")
+            _update(job, status='done', saved=True, done=True, finished_at=time.time(),
+                    messages=[_message('info', f"{filename} was already imported (as {previous['filename']}); nothing new to add.")])
+            return
+
+        dedup = {'duplicate_count': 0}
+        if file_type == 'csv' or (file_type == 'xlsx' and os.path.getsize(file_path) >= EXCEL_STREAMING_MIN_BYTES):
+            # CSVs and large workbooks are parsed and saved batch by batch in this thread, so
+            # memory stays bounded; the job doubles as the counts dict, so progress is
+            # visible while the file streams. Storage serializes each batch append (and its
+            # duplicate check), so concurrent jobs keep parsing while another one writes.
+            counts = _ProgressCounts(job)
+            if file_type == 'csv':
+                streamed_count = storage.save_transaction_stream(iter_csv_transactions(file_path, counts), result=dedup)
+            else:
+                streamed_count = storage.save_transaction_batches(iter_excel_chunks(file_path, result=counts), result=dedup)
+            saved = streamed_count + dedup['duplicate_count'] == job['success_count']
+        else:
+            executor = _process_executor()
+            try:
+                parser_result = _parse(file_type, file_path, executor)
+            except BrokenProcessPool:
+                _reset_process_executor(executor)
+                raise
+            _update(job, success_count=parser_result.get('success_count', 0),
+                    skipped_count=parser_result.get('skipped_count', 0))
+            saved = None
+            if job['success_count'] > 0:
+                saved = storage.save_transactions(parser_result.get('transactions', []), result=dedup)
+        if saved and file_hash:
+            storage.record_file_import(file_hash, filename, job['success_count'])
+        _update(job, status='done', saved=saved, done=True, finished_at=time.time(),
+                duplicate_count=dedup['duplicate_count'],
+                messages=_summarize(filename, job['success_count'], job['skipped_count'], saved,
+                                    dedup['duplicate_count']))
+    except Exception as e:
+        logging.error(f"Critical error during import job {job['id']} for {filename}: {e}", exc_info=True)
+        _update(job, status='failed', error=str(e), done=True, finished_at=time.time(),
+                messages=[_message('error', f'Critical error processing {filename}: {e}')])
+
+class _ProgressCounts:
+    """Lets a streaming parser increment a job's counts under the jobs lock."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def __getitem__(self, key):
+        return self.job[key]
+
+    def __setitem__(self, key, value):
+        _update(self.job, **{key: value})
+
+def _message(category, text):
+    return {'category': category, 'message': text}
+
+def _summarize(filename, success_count, skipped_count, saved, duplicate_count=0):
+    """Builds the messages shown to the user for a finished import."""
+    messages = []
+    if success_count > 0:
+        messages.append(_message('success', f"Successfully imported {success_count - duplicate_count} records from {filename}."))
+        if duplicate_count > 0:
+            messages.append(_message('info', f"{duplicate_count} records from {filename} were already stored and were not added again."))
+        if skipped_count > 0:
+            messages.append(_message('warning', f"{skipped_count} records from {filename} were skipped or could not be fully processed."))
+        if saved:
+            logging.info(f"Saved {success_count - duplicate_count} transactions.")
+        else:
+            messages.append(_message('error', "Critical: Failed to save processed transactions."))
+            logging.error(f"Critical: Failed to save {success_count} transactions from {filename} to storage.")
+    elif skipped_count > 0:
+        messages.append(_message('warning', f"Processed {filename}: No records were imported. {skipped_count} records were skipped or could not be fully processed."))
+        logging.info(f"From {filename}: No records imported, {skipped_count} skipped.")
+    else:
+        messages.append(_message('info', f"Could not extract any transaction data from {filename}. The file might be empty, not contain recognizable transaction information, or be in an unsupported structure for its type."))
+        logging.info(f"No transactions or processable data found in {filename}.")
+    return messages
+
+if __name__ == '__main__':
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'sample.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("Date,Description,Amount\n2023-01-15,Coffee at Starbucks,4.50\n2023-01-16,Uber ride,12.00\nbad,row,\n")
+        job_id = submit_import(csv_path, 'sample.csv', os.path.join(tmp_dir, 'transactions.jsonl'))
+        logging.info(f"Job queued: {get_import_job(job_id)}")
+        logging.info(f"Job finished: {wait_for_import(job_id, timeout=30)}")
@@ -0,0 +1,212 @@
+# spendwise/utils/parquet_dataset.py
+"""
+Parquet copy of transactions.jsonl, partitioned by month, for analytical queries.
+
+Layout (a directory next to the log, e.g. transactions.parquet/):
+    month=YYYY-MM/part-<first row>-<end row>.parquet   the rows of that month, sorted by date
+    month=undated/...                                  rows without a parseable date
+    _manifest.json                                     log inode, log bytes and rows covered,
+                                                       and the row ranges stored per month
+
+New log lines are appended as one part file per month they touch. The manifest is
+written last and is the list of live files: parts it doesn't list (from an interrupted
+sync) are ignored and later overwritten. Once a month has MAX_PARTITION_FILES parts they
+are merged into one.
+
+Queries open only the parts of the months overlapping the date range and read only the
+columns asked for; the date, category and amount filters are pushed down to the Parquet
+row-group statistics. Needs pyarrow; data_storage imports this module lazily.
+"""
+import json
+import logging
+import os
+import shutil
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from spendwise.utils.date_normalizer import month_ordinal_range, ordinal_month
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PARQUET_SUFFIX = '.parquet'
+PARQUET_VERSION = 1
+MANIFEST_NAME = '_manifest.json'
+UNDATED_MONTH = 'undated'
+MAX_PARTITION_FILES = 8 # Parts a month may accumulate before they are merged into one file
+ROW_GROUP_ROWS = 64 * 1024
+PARQUET_COMPRESSION = 'zstd'
+SCHEMA = pa.schema([('id', pa.int64()), ('date', pa.string()), ('date_ordinal', pa.int32()),
+                    ('description', pa.string()), ('amount', pa.float64()), ('category', pa.string())])
+_MONTH_FIELD = pa.field('month', pa.string())
+_PARTITIONING = ds.partitioning(pa.schema([_MONTH_FIELD]), flavor='hive')
+
+def dataset_path(file_path):
+    """Returns the path of the Parquet dataset kept next to a transactions file."""
+    return os.path.splitext(file_path)[0] + PARQUET_SUFFIX
+
+def _part_path(root, month, first, end):
+    return os.path.join(root, f'month={month}', f'part-{first:012d}-{end:012d}.parquet')
+
+def empty_manifest(log_inode):
+    return {'version': PARQUET_VERSION, 'log_inode': log_inode, 'covered': 0, 'rows': 0, 'months': {}}
+
+def read_manifest(file_path, log_inode):
+    """
+    Reads the manifest of the dataset for `file_path`. Returns None if it is missing,
+    unreadable, or belongs to a different log file.
+    """
+    path = os.path.join(dataset_path(file_path), MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (IOError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable Parquet manifest {path}: {e}")
+        return None
+    if manifest.get('version') != PARQUET_VERSION or manifest.get('log_inode') != log_inode:
+        return None
+    return manifest
+
+def write_manifest(file_path, manifest):
+    """Atomically replaces the manifest."""
+    path = os.path.join(dataset_path(file_path), MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        return True
+    except (IOError, OSError, TypeError) as e:
+        logging.error(f"Could not write Parquet manifest {path}: {e}")
+        return False
+
+def reset_dataset(file_path, log_inode):
+    """Deletes the dataset for `file_path` and returns an empty manifest for it."""
+    root = dataset_path(file_path)
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root, exist_ok=True)
+    return empty_manifest(log_inode)
+
+def _month_runs(ordinals):
+    """Yields (month, start, stop) for each run of one month in sorted day ordinals; 0 is undated."""
+    start, count = 0, len(ordinals)
+    while start < count:
+        ordinal = int(ordinals[start])
+        if ordinal <= 0:
+            month, last = UNDATED_MONTH, 0
+        else:
+            month = ordinal_month(ordinal)
+            last = month_ordinal_range(month)[1]
+        stop = int(np.searchsorted(ordinals, last, side='right'))
+        yield month, start, stop
+        start = stop
+
+def _amount(transaction):
+    try:
+        return float(transaction.get('amount') or 0)
+    except (ValueError, TypeError):
+        return None # Stored as null, so it never counts as spending
+
+def transactions_table(transactions, ordinals, first_row, default_category):
+    """Builds an Arrow table of stored transactions (row ids from `first_row`), sorted by date."""
+    table = pa.table({
+        'id': pa.array(np.arange(first_row, first_row + len(transactions), dtype=np.int64)),
+        'date': pa.array([tx.get('date') if isinstance(tx.get('date'), str) else None for tx in transactions], pa.string()),
+        'date_ordinal': pa.array(ordinals, pa.int32()),
+        'description': pa.array([tx.get('description') for tx in transactions], pa.string()),
+        'amount': pa.array([_amount(tx) for tx in transactions], pa.float64()),
+        'category': pa.array([tx.get('category', default_category) for tx in transactions], pa.string()),
+    }, schema=SCHEMA)
+    return table.take(pc.sort_indices(table, [('date_ordinal', 'ascending'), ('id', 'ascending')]))
+
+def _write_part(path, table):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path, row_group_size=ROW_GROUP_ROWS, compression=PARQUET_COMPRESSION)
+
+def append_table(file_path, manifest, table, covered):
+    """
+    Writes the rows of `table` (from transactions_table) as new parts, merges months that
+    reached MAX_PARTITION_FILES, then records the new state in the manifest: rows covered
+    and log bytes `covered`. Replaced parts are deleted once the manifest no longer lists them.
+    """
+    root = dataset_path(file_path)
+    first, end = manifest['rows'], manifest['rows'] + len(table)
+    obsolete = []
+    ordinals = table['date_ordinal'].to_numpy()
+    for month, start, stop in _month_runs(ordinals):
+        _write_part(_part_path(root, month, first, end), table.slice(start, stop - start))
+        parts = manifest['months'].setdefault(month, [])
+        parts.append([first, end])
+        if len(parts) >= MAX_PARTITION_FILES:
+            paths = [_part_path(root, month, *part) for part in parts]
+            merged = pa.concat_tables([pq.read_table(path, schema=SCHEMA) for path in paths])
+            merged = merged.take(pc.sort_indices(merged, [('date_ordinal', 'ascending'), ('id', 'ascending')]))
+            _write_part(_part_path(root, month, parts[0][0], end), merged)
+            manifest['months'][month] = [[parts[0][0], end]]
+            obsolete.extend(paths)
+    manifest['rows'], manifest['covered'] = end, covered
+    if not write_manifest(file_path, manifest):
+        return False
+    for path in obsolete:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.warning(f"Could not remove merged Parquet part {path}: {e}")
+    return True
+
+def _selected_months(months, first=None, last=None):
+    """Months of the dataset overlapping first..last (day ordinals; None = open). Undated rows only match an open range."""
+    if first is None and last is None:
+        return sorted(months)
+    low = ordinal_month(max(first, 1)) if first is not None else '0000-00'
+    high = ordinal_month(last) if last is not None and last > 0 else None
+    if last is not None and high is None:
+        return []
+    return sorted(month for month in months
+                  if month != UNDATED_MONTH and month >= low and (high is None or month <= high))
+
+def read_table(file_path, manifest, columns=None, first=None, last=None, category=None, spending=False):
+    """
+    Reads matching rows of the dataset. Only the parts of months overlapping first..last
+    (inclusive day ordinals) are opened, and only `columns` (any of SCHEMA plus the 'month'
+    partition key; default all) are read.
+
+    Args:
+        category (str, optional): Only rows of this category.
+        spending (bool): Only rows with a positive amount.
+
+    Returns:
+        pyarrow.Table
+    """
+    columns = list(columns) if columns is not None else SCHEMA.names + ['month']
+    root = dataset_path(file_path)
+    paths = [_part_path(root, month, *part)
+             for month in _selected_months(manifest['months'], first, last) for part in manifest['months'][month]]
+    full_schema = SCHEMA.append(_MONTH_FIELD)
+    if not paths:
+        return pa.Table.from_batches([], schema=pa.schema([full_schema.field(name) for name in columns]))
+    condition = None
+    for clause in (ds.field('date_ordinal') >= first if first is not None else None,
+                   ds.field('date_ordinal') <= last if last is not None else None,
+                   ds.field('category') == category if category is not None else None,
+                   ds.field('amount') > 0 if spending else None):
+        if clause is not None:
+            condition = clause if condition is None else condition & clause
+    dataset = ds.dataset(paths, schema=full_schema, format='parquet', partitioning=_PARTITIONING, partition_base_dir=root)
+    return dataset.to_table(columns=columns, filter=condition)
+
+def spending_totals(table):
+    """
+    Folds a table with 'amount', 'category' and 'month' columns (positive amounts only) into
+    totals shaped like the aggregates sidecar: {'total_spent', 'monthly', 'categories'}.
+    """
+    totals = {'total_spent': float(pc.sum(table['amount']).as_py() or 0.0), 'monthly': {}, 'categories': {}}
+    for row in sorted(table.group_by('month').aggregate([('amount', 'sum')]).to_pylist(), key=lambda row: row['month']):
+        if row['month'] != UNDATED_MONTH:
+            totals['monthly'][row['month']] = row['amount_sum']
+    for row in table.group_by('category').aggregate([('amount', 'sum')]).to_pylist():
+        totals['categories'][row['category']] = row['amount_sum']
+    return totals
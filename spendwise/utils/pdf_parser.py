@@ -9,8 +9,11 @@ if not __package__ and not hasattr(sys, 'frozen'):
 import pdfplumber
 import logging
 import re
-from decimal import Decimal, InvalidOperation
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from spendwise.utils.categorizer import categorize_transaction # Import
+from spendwise.utils.date_normalizer import normalize_transactions
+from spendwise.utils.tokenizer import AMOUNT_REGEX, DATE_REGEX, clean_text, looks_like_date, parse_amount
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -19,37 +22,21 @@ PDF_HEADER_KEYWORDS = {
     'description': ['description', 'details', 'narrative', 'memo', 'activity', 'item'],
     'amount': ['amount', 'value', 'sum', 'total', 'credit', 'debit', 'price', 'cost']
 }
-AMOUNT_REGEX = re.compile(r'([\$€£]?\s*-?[\d,]+\.?\d{0,2})')
-
-def clean_text(text):
-    if text is None: return ""
-    return str(text).replace('\n', ' ').strip()
-
-def looks_like_date(text):
-    text = clean_text(text)
-    return bool(re.match(r'(\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{1,2}\s+[A-Za-z]{3,}\s+\d{2,4})', text))
-
-def parse_amount(text):
-    if text is None: return None
-    text = clean_text(str(text))
-    cleaned_text = text.replace('$', '').replace('€', '').replace('£', '').replace('USD', '').replace('EUR', '').replace('GBP', '').strip()
-    if re.search(r'\d,\d{3}\.\d{2}', cleaned_text):
-        cleaned_text = cleaned_text.replace(',', '')
-    elif re.search(r'\d\.\d{3},\d{2}', cleaned_text):
-        cleaned_text = cleaned_text.replace('.', '').replace(',', '.')
-    else:
-        cleaned_text = cleaned_text.replace(',', '')
-    try:
-        return Decimal(cleaned_text)
-    except InvalidOperation:
-        match = AMOUNT_REGEX.search(text)
-        if match:
-            try:
-                num_str = match.group(1).replace('$', '').replace('€', '').replace('£', '').replace(',', '').strip()
-                return Decimal(num_str)
-            except InvalidOperation: pass
-        # logging.warning(f"Could not parse '{text}' as a decimal amount.") # Reduced verbosity for this helper
-        return None
+PDF_PARALLEL_MIN_PAGES = 8 # Smaller documents aren't worth the process pool start-up cost
+TEXT_AMOUNT_REGEX = re.compile(r'\d[.,]\d{2}\)?$') # Unruled statement amounts always carry cents
+TEXT_MIN_DATED_LINES = 3 # Date-led lines a page needs, without a header row, before the text fallback trusts it
+
+# Table-extraction profiles. 'table_settings' is passed to pdfplumber's find_tables (None skips
+# table detection and reads the page text line by line); 'crop' is an optional
+# (x0, top, x1, bottom) band given as fractions of the page. Without a crop, one is learned
+# from the transaction tables found on the first page.
+PDF_TABLE_PROFILES = {
+    'ruled': {'table_settings': {'vertical_strategy': 'lines', 'horizontal_strategy': 'lines'}},
+    'unruled': {'table_settings': {'vertical_strategy': 'text', 'horizontal_strategy': 'text'}},
+    'text': {'table_settings': None},
+}
+DEFAULT_PDF_PROFILE = 'ruled'
+CROP_MARGIN_POINTS = 6
 
 def row_data_has_column(row_data, col_idx):
     return row_data and col_idx is not None and len(row_data) > col_idx
@@ -92,64 +79,304 @@ def identify_columns(table_data, num_header_rows_to_check=3):
         return None # Return None if essential columns are missing
     return col_indices
 
-def parse_pdf(file_path):
+class PdfLayoutCache:
+    """
+    Column maps learned while parsing one statement. Banks repeat the same table layout on
+    every page, so a table whose signature (column count plus header text) has been seen
+    reuses its column map and header row count, and a headerless continuation table
+    inherits the most recent map identified for its column count.
+    """
+
+    def __init__(self, profile=None):
+        self.by_signature = {} # (column count, header text) -> (col_map, header rows)
+        self.by_width = {}     # column count -> col_map of the last identified table
+        self.profile = resolve_pdf_profile(profile)
+        self.learn_crop = self.profile.get('crop') is None
+
+    def resolve(self, table_data):
+        """Returns (col_map, header rows) for a table, or None if no layout applies."""
+        signature = _table_signature(table_data)
+        cached = self.by_signature.get(signature)
+        if cached is not None:
+            return cached
+        col_map = identify_columns(table_data)
+        if col_map:
+            layout = (col_map, _guess_header_rows(table_data, col_map))
+            self.by_signature[signature] = layout
+            self.by_width[signature[0]] = col_map
+            return layout
+        return self.inherit(table_data)
+
+    def inherit(self, table_data):
+        """Returns the layout a headerless continuation table inherits, or None."""
+        col_map = self.by_width.get(len(table_data[0]))
+        if col_map is None:
+            return None
+        return col_map, _guess_header_rows(table_data, col_map)
+
+    def learn_crop_from(self, page, bboxes):
+        """
+        Restricts later pages to the horizontal band covered by the transaction tables found
+        on the first page. The full height is kept: continuation pages usually start higher up.
+        """
+        self.learn_crop = False
+        page_x0, _, page_x1, _ = page.bbox
+        width = (page_x1 - page_x0) or 1
+        x0 = min(bbox[0] for bbox in bboxes) - CROP_MARGIN_POINTS
+        x1 = max(bbox[2] for bbox in bboxes) + CROP_MARGIN_POINTS
+        self.profile = dict(self.profile, crop=(max(0.0, (x0 - page_x0) / width), 0.0,
+                                                min(1.0, (x1 - page_x0) / width), 1.0))
+        logging.info(f"PDF: Cropping later pages to {self.profile['crop']} of the page width.")
+
+def resolve_pdf_profile(profile):
+    """Returns a profile dict for a PDF_TABLE_PROFILES name, a profile dict, or None (the default)."""
+    if profile is None:
+        profile = DEFAULT_PDF_PROFILE
+    if isinstance(profile, str):
+        if profile not in PDF_TABLE_PROFILES:
+            raise ValueError(f"Unknown PDF table profile '{profile}'. Expected one of {', '.join(PDF_TABLE_PROFILES)}.")
+        profile = PDF_TABLE_PROFILES[profile]
+    return dict(profile)
+
+def _table_signature(table_data):
+    return len(table_data[0]), tuple(clean_text(cell).lower() for cell in table_data[0])
+
+def _guess_header_rows(table_data, col_map):
+    """Counts the rows before the first one whose mapped date or amount cell holds data."""
+    header_rows_guess = 0
+    for r_idx, r_data in enumerate(table_data[:min(len(table_data), 5)]):
+        is_data_row = False
+        if row_data_has_column(r_data, col_map['amount']) and parse_amount(r_data[col_map['amount']]) is not None: is_data_row = True
+        elif row_data_has_column(r_data, col_map['date']) and looks_like_date(r_data[col_map['date']]): is_data_row = True
+        if is_data_row: header_rows_guess = r_idx; break
+        if r_idx == min(len(table_data), 5) - 1 and not is_data_row: header_rows_guess = 1
+    return header_rows_guess
+
+def _parse_table_rows(table_data, col_map, header_rows_guess, page_num, table_idx, result):
+    logging.info(f"PDF P{page_num+1} T{table_idx+1}: Column map: {col_map}. Assuming {header_rows_guess} header rows.")
+    for row_num, row_data in enumerate(table_data[header_rows_guess:]):
+        actual_row_num_in_table = row_num + header_rows_guess
+
+        if not all(row_data_has_column(row_data, col_map[key]) for key in ['date', 'description', 'amount']):
+            logging.warning(f"PDF P{page_num+1} T{table_idx+1} R{actual_row_num_in_table}: Skipping row, missing mapped columns.")
+            result['skipped_count'] += 1; continue
+
+        date_str = clean_text(row_data[col_map['date']])
+        desc_str = clean_text(row_data[col_map['description']])
+        amount_str = clean_text(row_data[col_map['amount']])
+
+        if not looks_like_date(date_str):
+            logging.warning(f"PDF P{page_num+1} T{table_idx+1} R{actual_row_num_in_table}: Skipped, '{date_str}' not date-like.")
+            result['skipped_count'] += 1; continue
+
+        amount_val = parse_amount(amount_str)
+        if not date_str or not desc_str or amount_val is None:
+            logging.warning(f"PDF P{page_num+1} T{table_idx+1} R{actual_row_num_in_table}: Skipped missing/invalid essential data. "
+                            f"D:'{date_str}', Desc:'{desc_str}', Amt Str:'{amount_str}'")
+            result['skipped_count'] += 1; continue
+
+        category = categorize_transaction(desc_str)
+
+        result['transactions'].append({
+            'date': date_str, 'description': desc_str,
+            'amount': amount_val, 'category': category
+        })
+        result['success_count'] += 1
+
+def _skip_unmapped_table(table_data, page_num, table_idx, result):
+    logging.warning(f"PDF P{page_num+1} T{table_idx+1}: Skipping table, identify_columns failed to find all required columns.")
+    result['skipped_count'] += len(table_data)
+
+def _page_region(page, profile):
+    crop = profile.get('crop')
+    if not crop:
+        return page
+    page_x0, page_top, page_x1, page_bottom = page.bbox
+    width, height = page_x1 - page_x0, page_bottom - page_top
+    return page.crop((page_x0 + crop[0] * width, page_top + crop[1] * height,
+                      page_x0 + crop[2] * width, page_top + crop[3] * height))
+
+def _is_text_header(line):
+    """True for a line naming a date, a description and an amount column, e.g. 'Date Details Amount Balance'."""
+    words = set(re.findall(r'[a-z]+', line.lower()))
+    return all(words.intersection(keywords) for keywords in PDF_HEADER_KEYWORDS.values())
+
+def _parse_text_amount(token):
+    """Parses an amount token of a text line; accounting-style '(500.00)' is negative."""
+    amount_val = parse_amount(token.strip('()'))
+    if amount_val is not None and token.startswith('(') and token.endswith(')'):
+        amount_val = -amount_val
+    return amount_val
+
+def _parse_text_lines(region, page_num, result, trusted=False):
+    """
+    Fast path for pages without ruled tables: reads the page text line by line and keeps
+    lines shaped like '<date> <description> <amount> [<balance>...]'. Unless `trusted`
+    (the 'text' profile), the page must look like a statement listing - a header row or
+    TEXT_MIN_DATED_LINES date-led lines - so cover and summary pages such as
+    '01/31/2023 Closing balance 1,234.56' aren't read as transactions.
+    """
+    text = region.extract_text() or ''
+    lines = [line.strip() for line in text.splitlines()]
+    dated = []
+    for line_num, line in enumerate(lines):
+        match = DATE_REGEX.match(line)
+        if match:
+            dated.append((line_num, line, match))
+    if not trusted and len(dated) < TEXT_MIN_DATED_LINES and not any(_is_text_header(line) for line in lines):
+        logging.info(f"PDF P{page_num+1}: No tables, and the text doesn't look like a transaction listing; skipping page.")
+        return
+    found = 0
+    for line_num, line, match in dated:
+        tokens = line[match.end():].split()
+        amounts_start = len(tokens)
+        while amounts_start > 0 and TEXT_AMOUNT_REGEX.search(tokens[amounts_start - 1]) \
+                and AMOUNT_REGEX.fullmatch(tokens[amounts_start - 1].strip('()')):
+            amounts_start -= 1
+        desc_str = ' '.join(tokens[:amounts_start])
+        amount_val = _parse_text_amount(tokens[amounts_start]) if amounts_start < len(tokens) else None
+        if not desc_str or amount_val is None:
+            logging.warning(f"PDF P{page_num+1} L{line_num+1}: Skipped dated text line without description/amount: '{line}'")
+            result['skipped_count'] += 1; continue
+
+        result['transactions'].append({
+            'date': match.group(1), 'description': desc_str,
+            'amount': amount_val, 'category': categorize_transaction(desc_str)
+        })
+        result['success_count'] += 1
+        found += 1
+    logging.info(f"PDF P{page_num+1}: No tables; read {found} transactions from text lines.")
+
+def _parse_page(page, page_num, result, layouts, deferred=None):
+    """
+    Extracts the transaction tables on one pdfplumber page, adding rows and counts to `result`.
+    Pages without tables fall back to reading text lines (see _parse_text_lines). Tables with no known layout are
+    appended to `deferred` (when given) instead of being skipped, so a caller holding
+    layouts from earlier pages can still resolve them.
+    """
+    region = _page_region(page, layouts.profile)
+    table_settings = layouts.profile.get('table_settings', {})
+    tables = region.find_tables(table_settings) if table_settings is not None else []
+    logging.info(f"PDF P{page_num+1}: Found {len(tables)} tables.")
+    if not tables:
+        _parse_text_lines(region, page_num, result, trusted=table_settings is None)
+        return
+
+    mapped_bboxes = []
+    for table_idx, table in enumerate(tables):
+        table_data = table.extract()
+        if not table_data or not table_data[0]:
+            logging.info(f"PDF P{page_num+1} T{table_idx+1}: Table is empty or malformed.")
+            result['skipped_count'] += len(table_data) if table_data else 0
+            continue
+
+        layout = layouts.resolve(table_data)
+        if layout is not None:
+            _parse_table_rows(table_data, *layout, page_num, table_idx, result)
+            mapped_bboxes.append(table.bbox)
+        elif deferred is not None:
+            deferred.append((len(result['transactions']), page_num, table_idx, table_data))
+        else:
+            _skip_unmapped_table(table_data, page_num, table_idx, result)
+    if page_num == 0 and mapped_bboxes and layouts.learn_crop:
+        layouts.learn_crop_from(page, mapped_bboxes)
+
+def _parse_page_range(file_path, first_page, last_page, profile=None):
+    """
+    Worker entry point for parallel parsing: opens the PDF independently and parses pages
+    first_page..last_page-1. Returns a result dict in the same shape as parse_pdf, plus
+    'deferred' (tables that need a layout from an earlier range) and 'layouts' (the
+    layouts by column count in effect at the end of the range).
+    """
+    result = {'transactions': [], 'success_count': 0, 'skipped_count': 0, 'deferred': []}
+    layouts = PdfLayoutCache(profile)
+    with pdfplumber.open(file_path) as pdf:
+        for page_num in range(first_page, last_page):
+            _parse_page(pdf.pages[page_num], page_num, result, layouts, result['deferred'])
+            pdf.pages[page_num].close() # Release the page's cached layout objects
+    result['layouts'] = layouts.by_width
+    return result
+
+def _merge_range(result, partial, layouts):
+    """
+    Appends one range's output to `result` in page order, resolving its deferred tables
+    against the layouts learned from the ranges before it.
+    """
+    transactions = partial['transactions']
+    position = 0
+    for insert_at, page_num, table_idx, table_data in partial['deferred']:
+        result['transactions'].extend(transactions[position:insert_at])
+        position = insert_at
+        layout = layouts.inherit(table_data)
+        if layout is not None:
+            _parse_table_rows(table_data, *layout, page_num, table_idx, result)
+        else:
+            _skip_unmapped_table(table_data, page_num, table_idx, result)
+    result['transactions'].extend(transactions[position:])
+    result['success_count'] += partial['success_count']
+    result['skipped_count'] += partial['skipped_count']
+    layouts.by_width.update(partial['layouts'])
+
+def _parse_pages_parallel(file_path, page_count, workers, result, profile=None, executor=None):
+    """
+    Parses the first page here, so the crop it teaches (and its layouts) apply to every
+    worker as on the serial path, then splits the remaining pages into contiguous ranges,
+    parses them in a process pool (`executor`, or a new one of `workers` processes) and
+    merges the per-range results in page order, so output matches the serial path.
+    """
+    layouts = PdfLayoutCache(profile)
+    with pdfplumber.open(file_path) as pdf:
+        _parse_page(pdf.pages[0], 0, result, layouts)
+    range_size = -(-(page_count - 1) // workers) # ceil division
+    ranges = [(first, min(first + range_size, page_count)) for first in range(1, page_count, range_size)]
+    logging.info(f"PDF: Parsing {page_count} pages of {file_path} in {len(ranges)} ranges across {workers} processes.")
+    if executor is not None:
+        _merge_ranges(result, executor, file_path, ranges, layouts)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as own_executor:
+            _merge_ranges(result, own_executor, file_path, ranges, layouts)
+
+def _merge_ranges(result, executor, file_path, ranges, layouts):
+    futures = [executor.submit(_parse_page_range, file_path, first, last, layouts.profile) for first, last in ranges]
+    for future in futures:
+        _merge_range(result, future.result(), layouts)
+
+def parse_pdf(file_path, workers=1, profile=None, executor=None):
+    """
+    Extracts transactions from the tables in a PDF statement.
+
+    Args:
+        file_path (str): Path to the PDF file.
+        workers (int): Number of processes to spread pages over. Documents with fewer than
+                       PDF_PARALLEL_MIN_PAGES pages are parsed as a single range.
+        profile (str | dict): A PDF_TABLE_PROFILES name or profile dict (e.g. chosen per bank).
+                              Defaults to ruled tables with a crop learned from the first page.
+        executor (concurrent.futures.Executor, optional): A shared process pool to parse in.
+                  Without one, short documents are parsed in this process and long ones in
+                  a pool created for the call; with one, every page range (a short document
+                  is one range) is parsed in it, apart from the first page of a long one.
+
+    Returns:
+        dict: {'transactions': [...], 'success_count': int, 'skipped_count': int}, with
+              dates normalized to ISO plus 'date_ordinal' (see date_normalizer).
+    """
     result = {'transactions': [], 'success_count': 0, 'skipped_count': 0}
+    resolve_pdf_profile(profile) # Reject unknown profile names before opening the file
     try:
         with pdfplumber.open(file_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                tables = page.extract_tables()
-                logging.info(f"PDF P{page_num+1}: Found {len(tables)} tables.")
-                if not tables: continue
-
-                for table_idx, table_data in enumerate(tables):
-                    if not table_data or not table_data[0]:
-                        logging.info(f"PDF P{page_num+1} T{table_idx+1}: Table is empty or malformed.")
-                        result['skipped_count'] += len(table_data) if table_data else 0
-                        continue
-
-                    col_map = identify_columns(table_data)
-                    if not col_map:
-                        logging.warning(f"PDF P{page_num+1} T{table_idx+1}: Skipping table, identify_columns failed to find all required columns.")
-                        result['skipped_count'] += len(table_data)
-                        continue
-
-                    header_rows_guess = 0
-                    for r_idx, r_data in enumerate(table_data[:min(len(table_data), 5)]):
-                        is_data_row = False
-                        if row_data_has_column(r_data, col_map['amount']) and parse_amount(r_data[col_map['amount']]) is not None: is_data_row = True
-                        elif row_data_has_column(r_data, col_map['date']) and looks_like_date(r_data[col_map['date']]): is_data_row = True
-                        if is_data_row: header_rows_guess = r_idx; break
-                        if r_idx == min(len(table_data), 5) - 1 and not is_data_row: header_rows_guess = 1
-
-                    logging.info(f"PDF P{page_num+1} T{table_idx+1}: Column map: {col_map}. Assuming {header_rows_guess} header rows.")
-                    for row_num, row_data in enumerate(table_data[header_rows_guess:]):
-                        actual_row_num_in_table = row_num + header_rows_guess
-
-                        if not all(row_data_has_column(row_data, col_map[key]) for key in ['date', 'description', 'amount']):
-                            logging.warning(f"PDF P{page_num+1} T{table_idx+1} R{actual_row_num_in_table}: Skipping row, missing mapped columns.")
-                            result['skipped_count'] += 1; continue
-
-                        date_str = clean_text(row_data[col_map['date']])
-                        desc_str = clean_text(row_data[col_map['description']])
-                        amount_str = clean_text(row_data[col_map['amount']])
-
-                        if not looks_like_date(date_str):
-                            logging.warning(f"PDF P{page_num+1} T{table_idx+1} R{actual_row_num_in_table}: Skipped, '{date_str}' not date-like.")
-                            result['skipped_count'] += 1; continue
-
-                        amount_val = parse_amount(amount_str)
-                        if not date_str or not desc_str or amount_val is None:
-                            logging.warning(f"PDF P{page_num+1} T{table_idx+1} R{actual_row_num_in_table}: Skipped missing/invalid essential data. "
-                                            f"D:'{date_str}', Desc:'{desc_str}', Amt Str:'{amount_str}'")
-                            result['skipped_count'] += 1; continue
-
-                        category = categorize_transaction(desc_str)
-
-                        result['transactions'].append({
-                            'date': date_str, 'description': desc_str,
-                            'amount': float(amount_val), 'category': category
-                        })
-                        result['success_count'] += 1
+            page_count = len(pdf.pages)
+            parallel = workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+            if not parallel and executor is None:
+                layouts = PdfLayoutCache(profile)
+                for page_num, page in enumerate(pdf.pages):
+                    _parse_page(page, page_num, result, layouts)
+        if parallel:
+            _parse_pages_parallel(file_path, page_count, workers, result, profile, executor)
+        elif executor is not None and page_count:
+            partial = executor.submit(_parse_page_range, file_path, 0, page_count, profile).result()
+            _merge_range(result, partial, PdfLayoutCache(profile))
+    except BrokenProcessPool:
+        raise # The caller owns the pool and has to replace it
     except Exception as e:
         if "PDFSyntaxError" in str(type(e)) or "pdf syntax" in str(e).lower():
              logging.error(f"Failed to parse PDF {file_path} due to a PDF syntax-related error: {e}", exc_info=True)
@@ -157,6 +384,7 @@ def parse_pdf(file_path):
              logging.error(f"An unexpected error occurred while parsing PDF {file_path}: {e}", exc_info=True)
         # Return result even on error, counts will reflect what was processed before error.
 
+    normalize_transactions(result['transactions'])
     if result['success_count'] == 0 and result['skipped_count'] == 0 and not result['transactions']:
         logging.info(f"No transaction data extracted from PDF {file_path}.")
     else:
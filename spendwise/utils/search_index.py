@@ -0,0 +1,345 @@
+# spendwise/utils/search_index.py
+"""
+Inverted index over transaction descriptions, for /api/transactions/search.
+
+Descriptions are split into casefolded word tokens at ingest. Each token maps to a posting
+list of the row ids (0-based position of the row in transactions.jsonl, the same ids the
+paged /api/transactions endpoint returns) that contain it, stored as varint-encoded gaps:
+the first id relative to 0 (or to the segment's first row on disk), then the difference
+to the previous id, 7 bits per byte with the high bit set on all but a value's last byte.
+Row ids only grow, so appending rows just extends the lists. The byte offset of every
+row's line is kept alongside, so results are read from the log with one seek each.
+
+Layout of the sidecar (little-endian):
+    header    magic, version, log inode, log bytes covered, rows, body bytes, segments
+    segments  first row, row count, token count; row count line offsets (u8);
+              per token: token length (u2), token (UTF-8), last row id (u8),
+              postings length (u4), postings
+
+Each append writes one segment for its rows and then the header, so a reader ignores a
+segment whose append was interrupted. Once MAX_SEGMENTS accumulate, the file is rewritten
+as a single segment.
+"""
+import bisect
+import logging
+import os
+import re
+import struct
+import sys
+from array import array
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SEARCH_SUFFIX = '.search'
+SEARCH_MAGIC = b'SWSRCH01'
+SEARCH_VERSION = 1
+MAX_SEGMENTS = 64 # Appended segments tolerated before the sidecar is rewritten as one
+MAX_TOKEN_CHARS = 64
+DECODED_CACHE_TOKENS = 1024 # Decoded posting lists kept for repeated queries
+_HEADER = struct.Struct('<8sIQQQQI')
+_SEGMENT = struct.Struct('<QQI')
+_TOKEN = struct.Struct('<HQI')
+_TOKEN_REGEX = re.compile(r'\w+')
+
+def search_index_path(file_path):
+    """Returns the path of the search index kept next to a transactions file."""
+    return os.path.splitext(file_path)[0] + SEARCH_SUFFIX
+
+def tokenize(text):
+    """Casefolded word tokens of `text`, each at most MAX_TOKEN_CHARS long, in order of appearance."""
+    if not isinstance(text, str):
+        return []
+    return [token[:MAX_TOKEN_CHARS] for token in _TOKEN_REGEX.findall(text.casefold())]
+
+def encode_varints(values, previous=0):
+    """Encodes ascending ints as varint gaps, the first relative to `previous`."""
+    out = bytearray()
+    for value in values:
+        gap = value - previous
+        previous = value
+        while gap >= 0x80:
+            out.append(gap & 0x7F | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return out
+
+def decode_varints(data, previous=0):
+    """Decodes varint gaps back into an int64 array of ascending values."""
+    raw = np.frombuffer(bytes(data), dtype=np.uint8)
+    if len(raw) == 0:
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(raw < 0x80)
+    if len(ends) == len(raw): # Every gap fits in one byte
+        return np.cumsum(raw, dtype=np.int64) + previous
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shifts = (np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)) * 7
+    parts = (raw & 0x7F).astype(np.int64) << shifts
+    return np.cumsum(np.add.reduceat(parts, starts)) + previous
+
+def _first_varint(data):
+    """Returns (value, bytes it takes) of the varint at the start of `data`."""
+    value, shift = 0, 0
+    for position, byte in enumerate(data):
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position + 1
+        shift += 7
+    raise ValueError("Truncated varint")
+
+class SearchIndex:
+    """
+    Posting lists and row offsets for one transactions file. `covered` is the log offset up
+    to which rows have been added; `segments` the number of segments in the sidecar.
+    Not thread-safe: callers serialize access.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.last_row = {}
+        self.row_offsets = array('Q')
+        self.covered = 0
+        self.segments = 0
+        self.stat = None
+        self._vocabulary = None
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self.row_offsets)
+
+    def add(self, transactions, offsets):
+        """
+        Indexes rows just read from or appended to the log (`offsets` are their line offsets).
+
+        Returns:
+            tuple: (first row id, {token: [row ids]}) for the new rows, to be persisted as a segment.
+        """
+        first_row = len(self.row_offsets)
+        segment = {}
+        for row, transaction in enumerate(transactions, first_row):
+            for token in dict.fromkeys(tokenize(transaction.get('description'))):
+                segment.setdefault(token, []).append(row)
+        self.row_offsets.extend(offsets)
+        for token, rows in segment.items():
+            self._extend(token, encode_varints(rows, self.last_row.get(token, 0)), rows[-1])
+        return first_row, segment
+
+    def _extend(self, token, data, last_row):
+        postings = self.postings.get(token)
+        if postings is None:
+            postings = self.postings[token] = bytearray()
+            self._vocabulary = None
+        postings += data
+        self.last_row[token] = last_row
+
+    def _merge_segment(self, first_row, offsets, tokens):
+        """Adds a segment read from disk; `tokens` yields (token, last row, postings relative to first_row)."""
+        self.row_offsets.extend(offsets)
+        for token, last_row, data in tokens:
+            gap, width = _first_varint(data)
+            self._extend(token, encode_varints([first_row + gap], self.last_row.get(token, 0)) + data[width:], last_row)
+
+    def matching_tokens(self, prefix):
+        """Indexed tokens starting with `prefix`, found by binary search of the sorted vocabulary."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        stop = bisect.bisect_left(self._vocabulary, prefix + '\U0010ffff', start)
+        return self._vocabulary[start:stop]
+
+    def rows_for(self, token):
+        """Decoded row ids for one token (cached until the list grows)."""
+        postings = self.postings[token]
+        cached = self._decoded.get(token)
+        if cached is not None and cached[0] == len(postings):
+            return cached[1]
+        rows = decode_varints(postings)
+        if len(self._decoded) >= DECODED_CACHE_TOKENS:
+            self._decoded.pop(next(iter(self._decoded)))
+        self._decoded[token] = (len(postings), rows)
+        return rows
+
+    def lookup(self, query):
+        """
+        Row ids (ascending) whose description has, for every term of `query`, a token
+        starting with that term.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        matches = []
+        for term in terms:
+            tokens = self.matching_tokens(term)
+            if not tokens:
+                return np.empty(0, dtype=np.int64)
+            matches.append(tokens)
+        # Intersect the rarest term first so the running result stays small.
+        matches.sort(key=lambda tokens: sum(len(self.postings[token]) for token in tokens))
+        result = None
+        for tokens in matches:
+            if len(tokens) == 1:
+                rows = self.rows_for(tokens[0])
+            else:
+                rows = np.unique(np.concatenate([self.rows_for(token) for token in tokens]))
+            result = rows if result is None else _intersect(result, rows)
+            if len(result) == 0:
+                break
+        return result
+
+def _intersect(small, large):
+    """Intersection of two ascending id arrays; binary-searches `large` when `small` is much shorter."""
+    if len(small) * 16 >= len(large):
+        return np.intersect1d(small, large, assume_unique=True)
+    positions = np.minimum(np.searchsorted(large, small), len(large) - 1)
+    return small[large[positions] == small]
+
+def _offset_bytes(offsets):
+    data = array('Q', offsets)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+def _pack_segment(first_row, offsets, tokens):
+    """`tokens` yields (token, last row, postings relative to first_row)."""
+    entries = list(tokens)
+    parts = [_SEGMENT.pack(first_row, len(offsets), len(entries)), _offset_bytes(offsets)]
+    for token, last_row, data in entries:
+        encoded = token.encode('utf-8')
+        parts.append(_TOKEN.pack(len(encoded), last_row, len(data)))
+        parts.append(encoded)
+        parts.append(bytes(data))
+    return b''.join(parts)
+
+def _unpack_segments(body, count):
+    """Yields (first row, offsets array, tokens list) for each segment of a sidecar body."""
+    position = 0
+    for _ in range(count):
+        first_row, rows, token_count = _SEGMENT.unpack_from(body, position)
+        position += _SEGMENT.size
+        offsets = array('Q')
+        offsets.frombytes(body[position:position + 8 * rows])
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        position += 8 * rows
+        tokens = []
+        for _ in range(token_count):
+            length, last_row, size = _TOKEN.unpack_from(body, position)
+            position += _TOKEN.size
+            token = body[position:position + length].decode('utf-8')
+            position += length
+            tokens.append((token, last_row, body[position:position + size]))
+            position += size
+        yield first_row, offsets, tokens
+
+def _unpack_header(raw):
+    if len(raw) < _HEADER.size:
+        return None
+    header = _HEADER.unpack_from(raw)
+    if header[0] != SEARCH_MAGIC or header[1] != SEARCH_VERSION:
+        return None
+    return header
+
+def read_search_index(file_path, log_inode):
+    """
+    Loads the search index for `file_path`.
+
+    Returns:
+        SearchIndex: With `covered` and `segments` set, or None if the sidecar is missing,
+                     unreadable, or belongs to a different log file.
+    """
+    path = search_index_path(file_path)
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    except IOError as e:
+        logging.warning(f"Ignoring unreadable search index {path}: {e}")
+        return None
+    header = _unpack_header(raw)
+    if header is None or header[2] != log_inode:
+        return None
+    _, _, _, covered, rows, body_bytes, segments = header
+    index = SearchIndex()
+    try:
+        for first_row, offsets, tokens in _unpack_segments(raw[_HEADER.size:_HEADER.size + body_bytes], segments):
+            index._merge_segment(first_row, offsets, tokens)
+    except (struct.error, ValueError, UnicodeDecodeError) as e:
+        logging.warning(f"Ignoring corrupt search index {path}: {e}")
+        return None
+    if len(index) != rows:
+        return None
+    index.covered, index.segments = covered, segments
+    return index
+
+def read_search_index_header(file_path):
+    """Returns (log inode, log bytes covered, rows, segments), or None if there is no usable index."""
+    try:
+        with open(search_index_path(file_path), 'rb') as f:
+            header = _unpack_header(f.read(_HEADER.size))
+    except (FileNotFoundError, IOError):
+        return None
+    return (header[2], header[3], header[4], header[6]) if header else None
+
+def write_search_index(file_path, index, log_identity):
+    """Atomically rewrites the sidecar as a single segment holding the whole index."""
+    path = search_index_path(file_path)
+    tmp_path = path + '.tmp'
+    body = _pack_segment(0, index.row_offsets,
+                         ((token, index.last_row[token], postings) for token, postings in index.postings.items()))
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(SEARCH_MAGIC, SEARCH_VERSION, *log_identity, len(index), len(body), 1))
+            f.write(body)
+        os.replace(tmp_path, path)
+    except (IOError, OSError) as e:
+        logging.error(f"Could not write search index {path}: {e}")
+        return False
+    index.segments = 1
+    return True
+
+def append_search_segment(file_path, index, first_row, segment, log_identity):
+    """
+    Appends a segment for the rows `index.add` just returned, then the header covering them
+    (header last, so an interrupted append is ignored and caught up on the next load).
+    """
+    path = search_index_path(file_path)
+    data = _pack_segment(first_row, index.row_offsets[first_row:],
+                         ((token, rows[-1], encode_varints(rows, first_row)) for token, rows in segment.items()))
+    try:
+        with open(path, 'r+b') as f:
+            header = _unpack_header(f.read(_HEADER.size))
+            if header is None:
+                return False
+            body_bytes, segments = header[5], header[6]
+            f.seek(_HEADER.size + body_bytes)
+            f.truncate() # Drop a segment left by an interrupted append
+            f.write(data)
+            f.seek(0)
+            f.write(_HEADER.pack(SEARCH_MAGIC, SEARCH_VERSION, *log_identity, len(index),
+                                 body_bytes + len(data), segments + 1))
+    except (IOError, OSError) as e:
+        logging.error(f"Could not append to search index {path}: {e}")
+        return False
+    index.segments = segments + 1
+    return True
+
+if __name__ == '__main__':
+    # Lookup latency on a synthetic million-row ledger.
+    import random
+    import timeit
+
+    merchants = [f'Merchant{n}' for n in range(20000)] + ['Starbucks', 'Star Market', 'Amazon Marketplace', 'Shell']
+    random.seed(1)
+    index = SearchIndex()
+    rows = [{'description': f'POS {random.choice(merchants)} #{random.randint(1, 9999)} card purchase'} for _ in range(1000000)]
+    index.add(rows, range(len(rows)))
+    postings_bytes = sum(len(p) for p in index.postings.values())
+    logging.info(f"Indexed {len(index):,} rows: {len(index.postings):,} tokens, {postings_bytes / len(index):.1f} posting bytes per row.")
+    for query in ('starbucks', 'star', 'amazon market', 'merchant1234 card'):
+        index._decoded.clear()
+        cold = timeit.timeit(lambda: index.lookup(query), number=1)
+        warm = min(timeit.repeat(lambda: index.lookup(query), number=1, repeat=5))
+        logging.info(f"'{query}': {len(index.lookup(query)):,} rows; {cold * 1000:.2f} ms cold, {warm * 1000:.3f} ms cached.")
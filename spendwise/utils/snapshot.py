@@ -0,0 +1,195 @@
+# spendwise/utils/snapshot.py
+"""
+Binary columnar snapshot of transactions.jsonl.
+
+Layout (little-endian, every section padded to 8 bytes):
+    header        magic, version, row count, log inode, log offset covered, CRC of the
+                  log bytes just before that offset, then (entry count, heap bytes) for the category, description and date dictionaries
+    columns       amounts f8[n], dates i4[n], category codes i4[n], description codes i4[n], date codes i4[n]
+    dictionaries  for each dictionary: offsets u8[count + 1], null flags u1[count], UTF-8 string heap
+
+Columns are opened with mmap and wrapped without copying, so every worker process that
+opens the same snapshot shares its pages through the OS page cache. Dictionary strings stay
+in the mapping too and are decoded one at a time when a row needs them (MappedStrings).
+"""
+import sys
+import os
+if not __package__ and not hasattr(sys, 'frozen'):
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+import logging
+import mmap
+import struct
+import zlib
+import numpy as np
+from spendwise.utils.transaction_table import TransactionTable
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SNAPSHOT_SUFFIX = '.snapshot'
+SNAPSHOT_MAGIC = b'SWSNAP01'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<8sIQQQI6Q')
+_BOUNDARY_BYTES = 256
+_UNDECODED = object()
+_COLUMNS = (('amounts', '<f8'), ('dates', '<i4'), ('category_codes', '<i4'),
+            ('description_codes', '<i4'), ('date_codes', '<i4'))
+
+def snapshot_path(file_path):
+    """Returns the path of the snapshot kept next to a transactions file."""
+    return os.path.splitext(file_path)[0] + SNAPSHOT_SUFFIX
+
+def log_boundary_crc(file_path, log_offset):
+    """
+    CRC32 of the (up to) 256 log bytes ending at `log_offset`. Stored in the header so a log
+    that was replaced by a different file reusing the same inode is not mistaken for the original.
+    """
+    start = max(0, log_offset - _BOUNDARY_BYTES)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return zlib.crc32(f.read(log_offset - start))
+
+def _padding(length):
+    return b'\0' * (-length % 8)
+
+def _encode_dictionary(values):
+    encoded = [value.encode('utf-8') if isinstance(value, str) else b'' for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    if encoded:
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    nulls = np.array([not isinstance(value, str) for value in values], dtype='<u1')
+    return offsets, nulls, b''.join(encoded)
+
+def write_snapshot(file_path, table, log_inode, log_offset):
+    """
+    Atomically writes `table` as the snapshot for `file_path`. `log_offset` is the byte
+    offset in the JSONL log up to which the table is complete.
+    """
+    path = snapshot_path(file_path)
+    tmp_path = path + '.tmp'
+    dictionaries = [_encode_dictionary(values) for values in (table.categories, table.descriptions, table.raw_dates)]
+    counts = []
+    for offsets, _, heap in dictionaries:
+        counts.extend((len(offsets) - 1, len(heap)))
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(table), log_inode, log_offset,
+                                 log_boundary_crc(file_path, log_offset), *counts))
+            f.write(_padding(_HEADER.size))
+            for name, dtype in _COLUMNS:
+                data = np.ascontiguousarray(getattr(table, name), dtype=dtype).tobytes()
+                f.write(data)
+                f.write(_padding(len(data)))
+            for offsets, nulls, heap in dictionaries:
+                for data in (offsets.tobytes(), nulls.tobytes(), heap):
+                    f.write(data)
+                    f.write(_padding(len(data)))
+        os.replace(tmp_path, path)
+        logging.info(f"Wrote snapshot {path} with {len(table)} rows covering {log_offset} bytes of {file_path}.")
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Could not write snapshot {path}: {e}")
+        return False
+
+def read_snapshot_header(file_path):
+    """
+    Returns the snapshot header for `file_path` as a dict, or None if there is no usable snapshot.
+    """
+    path = snapshot_path(file_path)
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(_HEADER.size)
+    except FileNotFoundError:
+        return None
+    except IOError as e:
+        logging.warning(f"Could not read snapshot header {path}: {e}")
+        return None
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, rows, log_inode, log_offset, log_crc, *counts = _HEADER.unpack(raw)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        logging.warning(f"Ignoring snapshot {path} with unknown format.")
+        return None
+    return {'rows': rows, 'log_inode': log_inode, 'log_offset': log_offset, 'log_crc': log_crc,
+            'dictionary_sizes': [(counts[i], counts[i + 1]) for i in range(0, 6, 2)]}
+
+class MappedStrings:
+    """
+    Read-only sequence over one snapshot dictionary: entry i is decoded from the mapped heap
+    the first time it is read, then kept. Values appended at runtime (new rows after the
+    snapshot) are held in a plain list after the mapped entries.
+    """
+
+    def __init__(self, offsets, nulls, heap):
+        self._offsets = offsets
+        self._nulls = nulls
+        self._heap = heap
+        self._count = len(nulls)
+        self._decoded = {}
+        self._appended = []
+
+    def __len__(self):
+        return self._count + len(self._appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index >= self._count:
+            return self._appended[index - self._count]
+        value = self._decoded.get(index, _UNDECODED)
+        if value is _UNDECODED:
+            start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+            value = None if self._nulls[index] else str(self._heap[start:end], 'utf-8')
+            self._decoded[index] = value
+        return value
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, value):
+        self._appended.append(value)
+
+def open_snapshot(file_path):
+    """
+    Memory-maps the snapshot for `file_path`.
+
+    Returns:
+        tuple: (TransactionTable backed by the mapping, header dict), or None if there is
+               no usable snapshot. Its dictionaries are MappedStrings, so opening decodes
+               no strings.
+    """
+    header = read_snapshot_header(file_path)
+    if header is None:
+        return None
+    path = snapshot_path(file_path)
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    rows = header['rows']
+    position = _HEADER.size + len(_padding(_HEADER.size))
+    columns = {}
+    for name, dtype in _COLUMNS:
+        columns[name] = np.frombuffer(mapped, dtype=dtype, count=rows, offset=position)
+        size = columns[name].nbytes
+        position += size + len(_padding(size))
+
+    dictionaries = []
+    view = memoryview(mapped)
+    for count, heap_size in header['dictionary_sizes']:
+        offsets = np.frombuffer(mapped, dtype='<u8', count=count + 1, offset=position)
+        position += offsets.nbytes + len(_padding(offsets.nbytes))
+        nulls = np.frombuffer(mapped, dtype='<u1', count=count, offset=position)
+        position += count + len(_padding(count))
+        heap = view[position:position + heap_size]
+        position += heap_size + len(_padding(heap_size))
+        dictionaries.append(MappedStrings(offsets, nulls, heap))
+
+    table = TransactionTable.from_columns(*(columns[name] for name, _ in _COLUMNS), *dictionaries)
+    return table, header
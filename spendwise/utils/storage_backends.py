@@ -0,0 +1,602 @@
+# spendwise/utils/storage_backends.py
+"""
+Pluggable transaction storage.
+
+The web app and the import jobs talk to a StorageBackend instead of calling data_storage
+directly, so the store can be switched without touching them:
+
+    jsonl   The append-only transactions.jsonl log and its sidecars (data_storage). The default.
+    sqlite  A SQLite database in WAL mode with indexes on date, category and amount. Filters,
+            sorting and the dashboard totals run as SQL (WHERE / ORDER BY / GROUP BY), so
+            heavy ledgers are never scanned in Python. Search uses an FTS5 table when the
+            SQLite build has it.
+    parquet The JSONL log, mirrored to a month-partitioned Parquet dataset (needs pyarrow)
+            that answers filtered dashboard totals by reading only the months and columns
+            they need. Without pyarrow it behaves exactly like 'jsonl'.
+
+The backend is chosen with the SPENDWISE_STORAGE environment variable ('jsonl', 'sqlite'
+or 'parquet'), and its file with SPENDWISE_STORAGE_PATH; see get_storage_backend().
+Existing JSONL ledgers are copied into SQLite with migrate_jsonl_to_sqlite()
+(`flask --app main migrate-to-sqlite`).
+"""
+import sys
+import os
+if not __package__ and not hasattr(sys, 'frozen'):
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date
+from spendwise.utils import data_storage
+from spendwise.utils import dedup_index as dedup_store
+from spendwise.utils.categorizer import DEFAULT_CATEGORY
+from spendwise.utils.date_normalizer import DateNormalizer
+from spendwise.utils.search_index import tokenize
+from spendwise.utils.transaction_table import SORTABLE_COLUMNS, UNKNOWN_DATE, date_to_ordinal
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+STORAGE_BACKEND_ENV = 'SPENDWISE_STORAGE'
+STORAGE_PATH_ENV = 'SPENDWISE_STORAGE_PATH'
+DEFAULT_STORAGE_BACKEND = 'jsonl'
+DEFAULT_SQLITE_FILE = os.path.join(data_storage.STORAGE_DIR, 'transactions.sqlite3')
+SQLITE_BUSY_TIMEOUT = 30.0 # Seconds a writer waits for another worker's write transaction
+SQLITE_STATEMENT_CACHE = 128 # Prepared statements kept per connection
+SQLITE_FETCH_ROWS = 1000 # Rows fetched at a time when streaming
+_JULIAN_DAY_OFFSET = 1721424.5 # julianday = date.toordinal() + this
+
+class StorageBackend:
+    """
+    Interface shared by the storage backends. Filters are the ones the API accepts:
+    `date_from`/`date_to` (inclusive, date objects or date strings), `category` (exact) and,
+    for query_page, `query` (case-insensitive substring of the description).
+    """
+    name = None
+
+    def save_transactions(self, transactions, result=None):
+        """Stores a list of transactions, dropping duplicates; see data_storage.save_transactions_jsonl."""
+        raise NotImplementedError
+
+    def save_transaction_batches(self, batches, result=None):
+        """Stores transactions from an iterable of lists. Returns the number saved (duplicates excluded)."""
+        raise NotImplementedError
+
+    def save_transaction_stream(self, transactions, batch_size=data_storage.STREAM_BATCH_SIZE, result=None):
+        """Stores transactions from any iterable, `batch_size` at a time."""
+        iterator = iter(transactions)
+        return self.save_transaction_batches(iter(lambda: list(itertools.islice(iterator, batch_size)), []), result)
+
+    def file_already_imported(self, sha256):
+        raise NotImplementedError
+
+    def record_file_import(self, sha256, filename, rows):
+        raise NotImplementedError
+
+    def all_transactions(self):
+        """Every transaction as {'date', 'description', 'amount', 'category'}, in insertion order."""
+        raise NotImplementedError
+
+    def query_page(self, sort='date', descending=False, offset=0, limit=50, after_row=None, **filters):
+        """
+        Returns (records, total): one page of matching transactions, each with its row 'id',
+        ordered by `sort` (ties by id), and the number of matches. With `after_row` the page
+        starts right after that row (keyset pagination); otherwise at `offset`.
+        Raises ValueError for an unknown sort column or row id.
+        """
+        raise NotImplementedError
+
+    def iter_transactions(self, date_from=None, date_to=None):
+        """Yields stored transactions; in date order when a range is given (undated rows excluded)."""
+        raise NotImplementedError
+
+    def search(self, query, offset=0, limit=50):
+        """Word-prefix search over descriptions, newest first: {'transactions', 'total'}."""
+        raise NotImplementedError
+
+    def total_spent(self, **filters):
+        raise NotImplementedError
+
+    def monthly_totals(self, **filters):
+        """{'YYYY-MM': total} of positive amounts."""
+        raise NotImplementedError
+
+    def category_totals(self, **filters):
+        """{category: total} of positive amounts."""
+        raise NotImplementedError
+
+class JSONLBackend(StorageBackend):
+    """The transactions.jsonl log, via data_storage."""
+    name = 'jsonl'
+
+    def __init__(self, file_path=data_storage.DEFAULT_TRANSACTIONS_FILE):
+        self.file_path = file_path
+
+    def save_transactions(self, transactions, result=None):
+        return data_storage.save_transactions_jsonl(transactions, self.file_path, result=result)
+
+    def save_transaction_batches(self, batches, result=None):
+        return data_storage.save_transaction_batches(batches, self.file_path, result=result)
+
+    def file_already_imported(self, sha256):
+        return data_storage.file_already_imported(sha256, self.file_path)
+
+    def record_file_import(self, sha256, filename, rows):
+        return data_storage.record_file_import(sha256, filename, rows, self.file_path)
+
+    def all_transactions(self):
+        return data_storage.load_transaction_table(self.file_path).to_records()
+
+    def query_page(self, sort='date', descending=False, offset=0, limit=50, after_row=None, **filters):
+        table = data_storage.load_transaction_table(self.file_path)
+        row_ids, total = table.page(table.filter_mask(**filters), sort=sort, descending=descending,
+                                    offset=offset, limit=limit, after_row=after_row)
+        records = table.to_records(row_ids)
+        for row_id, record in zip(row_ids, records):
+            record['id'] = int(row_id)
+        return records, total
+
+    def iter_transactions(self, date_from=None, date_to=None):
+        if date_from is None and date_to is None:
+            return data_storage.iter_transactions_jsonl(self.file_path)
+        return data_storage.iter_transactions_by_date(_as_date(date_from), _as_date(date_to), self.file_path)
+
+    def search(self, query, offset=0, limit=50):
+        return data_storage.search_transactions(query, self.file_path, offset=offset, limit=limit)
+
+    def _filtered(self, filters):
+        """(table, mask) when any filter is set, else (None, None): the sidecar totals apply."""
+        if not any(value is not None for value in filters.values()):
+            return None, None
+        table = data_storage.load_transaction_table(self.file_path)
+        return table, table.filter_mask(**filters)
+
+    def total_spent(self, **filters):
+        table, mask = self._filtered(filters)
+        if table is None:
+            return data_storage.load_aggregates(self.file_path)['total_spent']
+        return table.total_spent(mask)
+
+    def monthly_totals(self, **filters):
+        table, mask = self._filtered(filters)
+        if table is None:
+            return data_storage.load_aggregates(self.file_path)['monthly']
+        return table.group_by_month(mask)
+
+    def category_totals(self, **filters):
+        table, mask = self._filtered(filters)
+        if table is None:
+            return data_storage.load_aggregates(self.file_path)['categories']
+        return table.group_by_category(mask)
+
+class ParquetBackend(JSONLBackend):
+    """The transactions.jsonl log, with filtered totals read from its Parquet dataset."""
+    name = 'parquet'
+
+    def _spending_totals(self, filters):
+        """
+        Totals from the Parquet dataset, or None where the JSONL path answers instead: no
+        filters (the aggregates sidecar), a description query, or pyarrow not installed.
+        """
+        if filters.get('query') or not any(value is not None for value in filters.values()):
+            return None
+        return data_storage.load_spending_totals(_as_date(filters.get('date_from')), _as_date(filters.get('date_to')),
+                                                 filters.get('category'), self.file_path)
+
+    def total_spent(self, **filters):
+        totals = self._spending_totals(filters)
+        return super().total_spent(**filters) if totals is None else totals['total_spent']
+
+    def monthly_totals(self, **filters):
+        totals = self._spending_totals(filters)
+        return super().monthly_totals(**filters) if totals is None else totals['monthly']
+
+    def category_totals(self, **filters):
+        totals = self._spending_totals(filters)
+        return super().category_totals(**filters) if totals is None else totals['categories']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    date TEXT,
+    date_ordinal INTEGER NOT NULL DEFAULT 0,
+    description TEXT,
+    amount REAL NOT NULL DEFAULT 0,
+    category TEXT,
+    dedup_key INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_dedup ON transactions (dedup_key);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date_ordinal, amount);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category, date_ordinal, amount);
+CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (amount);
+CREATE TABLE IF NOT EXISTS imported_files (
+    sha256 TEXT PRIMARY KEY,
+    filename TEXT,
+    rows INTEGER,
+    imported_at REAL
+);
+"""
+# Filled in bulk after each insert rather than by a per-row trigger (about 3x faster imports).
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5 (description, content='transactions', content_rowid='id');
+"""
+_SYNC_FTS = "INSERT INTO transactions_fts (rowid, description) SELECT id, description FROM transactions WHERE id > ?"
+_INSERT_TRANSACTION = ("INSERT OR IGNORE INTO transactions (date, date_ordinal, description, amount, category, dedup_key) "
+                       "VALUES (?, ?, ?, ?, ?, ?)")
+_SELECT_COLUMNS = "SELECT id, date, description, amount, category, date_ordinal FROM transactions"
+_SORT_EXPRESSIONS = {
+    'date': 'date_ordinal',
+    'amount': 'amount',
+    'description': "lower(COALESCE(description, ''))",
+    'category': "lower(COALESCE(category, ''))",
+}
+
+class SQLiteBackend(StorageBackend):
+    """
+    Transactions in a SQLite database. Each worker (thread, and process after a fork) gets
+    its own connection with its own prepared-statement cache, so the fixed SQL below is
+    compiled once per worker and reused; WAL mode lets readers run alongside a writer.
+    """
+    name = 'sqlite'
+
+    def __init__(self, db_path=DEFAULT_SQLITE_FILE):
+        self.db_path = db_path
+        self.has_fts = None
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT, cached_statements=SQLITE_STATEMENT_CACHE)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL') # Durable at checkpoints; a crash can't corrupt a WAL database
+        connection.executescript(_SCHEMA)
+        if connection.execute('PRAGMA user_version').fetchone()[0] < dedup_store.DEDUP_VERSION:
+            self._rekey(connection)
+        if self.has_fts is None:
+            try:
+                connection.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                logging.warning(f"SQLite FTS5 is unavailable ({e}); searching descriptions with LIKE.")
+                self.has_fts = False
+        self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _rekey(self, connection):
+        """
+        Recomputes every dedup key when the database predates the current fingerprint
+        (dedup_index.DEDUP_VERSION, kept in PRAGMA user_version), so old rows keep matching
+        re-imported ones.
+        """
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            if connection.execute('PRAGMA user_version').fetchone()[0] >= dedup_store.DEDUP_VERSION:
+                return # Another worker got there first
+            occurrences, keys = {}, []
+            for row_id, date_str, ordinal, description, amount in connection.execute(
+                    "SELECT id, date, date_ordinal, description, amount FROM transactions ORDER BY id"):
+                fingerprint = dedup_store.transaction_fingerprint(
+                    {'date': date_str, 'date_ordinal': ordinal, 'description': description, 'amount': amount})
+                occurrence = occurrences.get(fingerprint, 0)
+                occurrences[fingerprint] = occurrence + 1
+                keys.append((_signed_key(dedup_store.occurrence_key(fingerprint, occurrence)), row_id))
+            if keys:
+                logging.info(f"Recomputing dedup keys of {len(keys)} transactions in {self.db_path}.")
+                # New keys may equal other rows' old ones until every row is updated.
+                connection.execute("DROP INDEX idx_transactions_dedup")
+                connection.executemany("UPDATE transactions SET dedup_key = ? WHERE id = ?", keys)
+                connection.execute("CREATE UNIQUE INDEX idx_transactions_dedup ON transactions (dedup_key)")
+            connection.execute(f"PRAGMA user_version = {dedup_store.DEDUP_VERSION}")
+
+    def close(self):
+        """Closes this worker's connection."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def save_transactions(self, transactions, result=None):
+        if not transactions:
+            logging.info("No transactions provided to save.")
+            return False
+        try:
+            self._insert(transactions, {}, DateNormalizer(), result)
+            return True
+        except (TypeError, ValueError) as e:
+            logging.error(f"Could not store transactions in {self.db_path}: {e}")
+        except sqlite3.Error as e:
+            logging.error(f"SQLite error writing to {self.db_path}: {e}")
+        return False
+
+    def save_transaction_batches(self, batches, result=None):
+        saved_count = 0
+        occurrences = {}
+        normalizer = DateNormalizer()
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                try:
+                    saved_count += self._insert(batch, occurrences, normalizer, result)
+                except (TypeError, ValueError) as e:
+                    logging.error(f"Skipping batch of {len(batch)} transactions that could not be stored: {e}")
+        except sqlite3.Error as e:
+            logging.error(f"SQLite error writing to {self.db_path} after {saved_count} transactions: {e}")
+        if saved_count:
+            logging.info(f"Successfully stored {saved_count} transactions in {self.db_path}")
+        return saved_count
+
+    def _insert(self, transactions, occurrences, normalizer, result=None):
+        """
+        Inserts one batch in a single transaction with executemany. Duplicates are dropped by
+        the unique dedup key (the same keys as dedup_index, so repeats within a save are kept).
+        """
+        rows = []
+        for transaction in transactions:
+            if 'date_ordinal' in transaction:
+                date_str, ordinal = transaction.get('date'), transaction['date_ordinal']
+            else: # Saved before dates were normalized at ingest
+                date_str, ordinal = normalizer.normalize(transaction.get('date'))
+            normalized = dict(transaction, date=date_str, date_ordinal=ordinal)
+            fingerprint = dedup_store.transaction_fingerprint(normalized)
+            occurrence = occurrences.get(fingerprint, 0)
+            occurrences[fingerprint] = occurrence + 1
+            rows.append((date_str, ordinal or UNKNOWN_DATE, transaction.get('description'),
+                         float(transaction.get('amount') or 0), transaction.get('category', DEFAULT_CATEGORY),
+                         _signed_key(dedup_store.occurrence_key(fingerprint, occurrence))))
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE") # Take the write lock before reading the last id
+            last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+            inserted = connection.executemany(_INSERT_TRANSACTION, rows).rowcount
+            if self.has_fts and inserted:
+                connection.execute(_SYNC_FTS, (last_id,))
+        duplicate_count = len(rows) - inserted
+        if duplicate_count:
+            logging.info(f"Dropped {duplicate_count} duplicate transactions.")
+            if result is not None:
+                result['duplicate_count'] = result.get('duplicate_count', 0) + duplicate_count
+        return inserted
+
+    def file_already_imported(self, sha256):
+        row = self._connection().execute("SELECT filename, rows, imported_at FROM imported_files WHERE sha256 = ?",
+                                         (sha256,)).fetchone()
+        return {'filename': row[0], 'rows': row[1], 'imported_at': row[2]} if row else None
+
+    def record_file_import(self, sha256, filename, rows, imported_at=None):
+        connection = self._connection()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO imported_files (sha256, filename, rows, imported_at) VALUES (?, ?, ?, ?)",
+                               (sha256, filename, rows, imported_at if imported_at is not None else time.time()))
+        return True
+
+    def all_transactions(self):
+        cursor = self._connection().execute("SELECT date, description, amount, category FROM transactions ORDER BY id")
+        return [{'date': row[0], 'description': row[1], 'amount': row[2], 'category': row[3]} for row in cursor]
+
+    def _where(self, date_from=None, date_to=None, category=None, query=None, spending=False):
+        clauses, params = [], []
+        if date_from is not None:
+            clauses.append("date_ordinal >= ?")
+            params.append(_as_ordinal(date_from))
+        if date_to is not None:
+            clauses.append("date_ordinal BETWEEN 1 AND ?") # Undated rows (0) never fall before a date
+            params.append(_as_ordinal(date_to))
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if query:
+            clauses.append("description LIKE ? ESCAPE '\\'")
+            params.append('%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if spending:
+            clauses.append("amount > 0")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query_page(self, sort='date', descending=False, offset=0, limit=50, after_row=None, **filters):
+        if sort not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort}'. Expected one of {', '.join(SORTABLE_COLUMNS)}.")
+        expression = _SORT_EXPRESSIONS[sort]
+        direction, comparison = ('DESC', '<') if descending else ('ASC', '>')
+        where, params = self._where(**filters)
+        connection = self._connection()
+        total = connection.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()[0]
+        if after_row is not None:
+            key = connection.execute(f"SELECT {expression} FROM transactions WHERE id = ?", (after_row,)).fetchone()
+            if key is None:
+                raise ValueError(f"Unknown row id {after_row}.")
+            keyset = f"({expression} {comparison} ? OR ({expression} = ? AND id {comparison} ?))"
+            where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+            params = params + [key[0], key[0], after_row]
+            offset = 0
+        cursor = connection.execute(f"{_SELECT_COLUMNS}{where} ORDER BY {expression} {direction}, id {direction} LIMIT ? OFFSET ?",
+                                    params + [limit, offset])
+        return [_record(row, with_id=True) for row in cursor], total
+
+    def iter_transactions(self, date_from=None, date_to=None):
+        if date_from is not None or date_to is not None:
+            where, params = self._where(date_from=date_from, date_to=date_to)
+            sql = f"{_SELECT_COLUMNS}{where} ORDER BY date_ordinal, id"
+        else:
+            sql, params = f"{_SELECT_COLUMNS} ORDER BY id", []
+        return self._iter_rows(sql, params)
+
+    def _iter_rows(self, sql, params):
+        # Runs in the consuming thread, so it uses that worker's connection.
+        cursor = self._connection().execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(SQLITE_FETCH_ROWS)
+            if not rows:
+                return
+            for row in rows:
+                yield _record(row, with_ordinal=True)
+
+    def search(self, query, offset=0, limit=50):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {'transactions': [], 'total': 0}
+        connection = self._connection()
+        if self.has_fts:
+            match = ' AND '.join(f'"{term}"*' for term in terms)
+            source = "transactions JOIN transactions_fts ON transactions_fts.rowid = transactions.id WHERE transactions_fts MATCH ?"
+            params = [match]
+        else:
+            source = "transactions WHERE " + " AND ".join(["description LIKE ?"] * len(terms))
+            params = [f'%{term}%' for term in terms]
+        total = connection.execute(f"SELECT COUNT(*) FROM {source}", params).fetchone()[0]
+        cursor = connection.execute(
+            f"SELECT transactions.id, date, transactions.description, amount, category, date_ordinal FROM {source} "
+            f"ORDER BY transactions.id DESC LIMIT ? OFFSET ?", params + [limit, offset])
+        return {'transactions': [_record(row, with_id=True) for row in cursor], 'total': total}
+
+    def total_spent(self, **filters):
+        where, params = self._where(spending=True, **filters)
+        return float(self._connection().execute(f"SELECT COALESCE(SUM(amount), 0) FROM transactions{where}", params).fetchone()[0])
+
+    def monthly_totals(self, **filters):
+        where, params = self._where(spending=True, **filters)
+        cursor = self._connection().execute(
+            f"SELECT strftime('%Y-%m', date_ordinal + {_JULIAN_DAY_OFFSET}) AS month, SUM(amount) FROM transactions"
+            f"{where} AND date_ordinal > 0 GROUP BY month", params)
+        return {month: float(total) for month, total in cursor}
+
+    def category_totals(self, **filters):
+        where, params = self._where(spending=True, **filters)
+        cursor = self._connection().execute(f"SELECT category, SUM(amount) FROM transactions{where} GROUP BY category", params)
+        return {category: float(total) for category, total in cursor}
+
+def _record(row, with_id=False, with_ordinal=False):
+    record = {'date': row[1], 'description': row[2], 'amount': row[3], 'category': row[4]}
+    if with_ordinal:
+        record['date_ordinal'] = row[5] or None
+    if with_id:
+        record['id'] = row[0]
+    return record
+
+def _signed_key(key):
+    """Dedup keys are unsigned 64-bit; SQLite integers are signed."""
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+def _as_ordinal(value):
+    return value.toordinal() if isinstance(value, date) else date_to_ordinal(value)
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    ordinal = date_to_ordinal(value)
+    if ordinal == UNKNOWN_DATE:
+        raise ValueError(f"Unrecognized date '{value}'.")
+    return date.fromordinal(ordinal)
+
+_BACKENDS = {'jsonl': (JSONLBackend, data_storage.DEFAULT_TRANSACTIONS_FILE), 'sqlite': (SQLiteBackend, DEFAULT_SQLITE_FILE),
+             'parquet': (ParquetBackend, data_storage.DEFAULT_TRANSACTIONS_FILE)}
+_INSTANCES = {}
+_INSTANCES_LOCK = threading.Lock()
+
+def get_storage_backend(name=None, path=None):
+    """
+    Returns the shared backend instance for `name` ('jsonl', 'sqlite' or 'parquet'; defaults to
+    $SPENDWISE_STORAGE, else 'jsonl') stored at `path` (defaults to $SPENDWISE_STORAGE_PATH,
+    else the backend's default file).
+
+    Raises:
+        ValueError: For an unknown backend name.
+    """
+    name = (name or os.environ.get(STORAGE_BACKEND_ENV) or DEFAULT_STORAGE_BACKEND).lower()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Expected one of {', '.join(_BACKENDS)}.")
+    backend_class, default_path = _BACKENDS[name]
+    path = path or os.environ.get(STORAGE_PATH_ENV) or default_path
+    key = (name, os.path.abspath(path))
+    with _INSTANCES_LOCK:
+        backend = _INSTANCES.get(key)
+        if backend is None:
+            backend = _INSTANCES[key] = backend_class(path)
+        return backend
+
+def as_storage_backend(target=None):
+    """
+    Accepts a StorageBackend, a path (a '.jsonl' file is a JSONL log, anything else a SQLite
+    database), or None for the configured backend.
+    """
+    if isinstance(target, StorageBackend):
+        return target
+    if target is None:
+        return get_storage_backend()
+    name = 'jsonl' if str(target).endswith('.jsonl') else 'sqlite'
+    return get_storage_backend(name, target)
+
+def migrate_jsonl_to_sqlite(jsonl_paths, backend):
+    """
+    Copies the transactions (and the imported-files record) of JSONL logs into a SQLite
+    backend. Rows already in the database are skipped as duplicates, so it can be re-run.
+
+    Returns:
+        dict: {'rows': rows read, 'saved': rows inserted, 'duplicate_count': rows skipped}
+    """
+    summary = {'rows': 0, 'saved': 0, 'duplicate_count': 0}
+    for jsonl_path in jsonl_paths:
+        if not os.path.exists(jsonl_path):
+            logging.warning(f"Transaction file {jsonl_path} not found; skipping.")
+            continue
+        def counted(transactions):
+            for transaction in transactions:
+                summary['rows'] += 1
+                yield transaction
+        summary['saved'] += backend.save_transaction_stream(counted(data_storage.iter_transactions_jsonl(jsonl_path)),
+                                                            result=summary)
+        imported = dedup_store.read_imported_files(jsonl_path, os.stat(jsonl_path).st_ino)
+        for sha256, record in imported.items():
+            backend.record_file_import(sha256, record.get('filename'), record.get('rows'), record.get('imported_at'))
+        logging.info(f"Migrated {jsonl_path} into {backend.db_path}.")
+    return summary
+
+if __name__ == '__main__':
+    # Filtered dashboard totals on a synthetic ledger: columnar scan of the JSONL table vs. SQL GROUP BY.
+    import random
+    import tempfile
+    import timeit
+
+    random.seed(7)
+    categories = ['Food & Dining', 'Transport', 'Shopping', 'Utilities', 'Travel']
+    start = date(2019, 1, 1).toordinal()
+    rows = []
+    for n in range(200000):
+        day = date.fromordinal(start + random.randrange(5 * 365))
+        rows.append({'date': day.isoformat(), 'date_ordinal': day.toordinal(), 'description': f'Merchant {n % 3000} #{n}',
+                     'amount': round(random.uniform(-50, 200), 2), 'category': random.choice(categories)})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jsonl = JSONLBackend(os.path.join(tmp_dir, 'transactions.jsonl'))
+        sqlite = SQLiteBackend(os.path.join(tmp_dir, 'transactions.sqlite3'))
+        insert_time = timeit.timeit(lambda: sqlite.save_transaction_stream(rows), number=1)
+        logging.info(f"SQLite bulk insert: {len(rows) / insert_time:,.0f} rows/s.")
+        jsonl.save_transaction_stream(rows)
+        filters = {'date_from': date(2021, 1, 1), 'date_to': date(2021, 3, 31), 'category': 'Travel'}
+        for backend in (jsonl, sqlite):
+            backend.monthly_totals(**filters) # Warm caches
+            elapsed = min(timeit.repeat(lambda: backend.monthly_totals(**filters), number=1, repeat=5))
+            logging.info(f"{backend.name}: filtered monthly totals in {elapsed * 1000:.2f} ms.")
+
+        # Cold process (nothing decoded yet): the JSONL table has to load the whole log, the
+        # Parquet dataset only the amount/category columns of the three months in range.
+        parquet = ParquetBackend(jsonl.file_path)
+        data_storage.sync_parquet_dataset(jsonl.file_path)
+        def cold(backend):
+            data_storage.clear_transactions_cache()
+            return backend.monthly_totals(**filters)
+        for backend in (jsonl, parquet):
+            elapsed = min(timeit.repeat(lambda: cold(backend), number=1, repeat=3))
+            logging.info(f"{backend.name}: cold filtered monthly totals in {elapsed * 1000:.2f} ms.")
+        from spendwise.utils.parquet_dataset import dataset_path
+        parquet_root = dataset_path(jsonl.file_path)
+        month_bytes = sum(os.path.getsize(os.path.join(parquet_root, f'month={month}', name))
+                          for month in ('2021-01', '2021-02', '2021-03')
+                          for name in os.listdir(os.path.join(parquet_root, f'month={month}')))
+        logging.info(f"Bytes behind the query: JSONL log {os.path.getsize(jsonl.file_path):,}, "
+                     f"Parquet partitions in range {month_bytes:,} (before column pruning).")
@@ -0,0 +1,282 @@
+# spendwise/utils/transaction_table.py
+import sys
+import os
+if not __package__ and not hasattr(sys, 'frozen'):
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+import logging
+import re
+from datetime import date
+import numpy as np
+from spendwise.utils.aggregates import parse_transaction_date
+from spendwise.utils.categorizer import DEFAULT_CATEGORY
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+UNKNOWN_DATE = 0 # Ordinal used for dates that could not be parsed
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_YEAR_MONTH_REGEX = re.compile(r'^(\d{4})-(\d{2})')
+SORTABLE_COLUMNS = ('date', 'description', 'amount', 'category')
+
+def date_to_ordinal(date_str):
+    """
+    Converts a stored date string to a proleptic Gregorian day ordinal.
+    Strings that only carry a usable 'YYYY-MM' prefix map to the first of that month.
+    Returns UNKNOWN_DATE if nothing can be parsed.
+    """
+    parsed = parse_transaction_date(date_str)
+    if parsed:
+        return parsed.toordinal()
+    match = _YEAR_MONTH_REGEX.match(date_str) if isinstance(date_str, str) else None
+    if match:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), 1).toordinal()
+        except ValueError:
+            pass
+    return UNKNOWN_DATE
+
+class _Dictionary:
+    """Append-only string dictionary used to encode repeated values as int32 codes."""
+
+    def __init__(self, values=None, index_values=True):
+        self.values = values if values is not None else []
+        # Without index_values the existing values aren't looked up again, so one appended
+        # later gets a second code. Fine for dictionaries that are only read by code.
+        self.index = {value: code for code, value in enumerate(self.values)} if index_values else {}
+
+    def encode(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.index[value] = code
+            self.values.append(sys.intern(value) if isinstance(value, str) else value)
+        return code
+
+class TransactionTable:
+    """
+    Compact, column-oriented view of the transaction log.
+
+    Each transaction is one position in a set of parallel NumPy arrays: float64 amounts,
+    int32 day ordinals, and int32 codes into shared dictionaries of categories, descriptions
+    and raw date strings. Tables are never modified in place; extended() returns a new
+    table that shares the (append-only) dictionaries, so a table handed to a reader stays
+    valid while newer rows are being added.
+    """
+
+    def __init__(self, amounts=None, dates=None, category_codes=None, description_codes=None,
+                 date_codes=None, dictionaries=None):
+        self.amounts = amounts if amounts is not None else np.empty(0, dtype=np.float64)
+        self.dates = dates if dates is not None else np.empty(0, dtype=np.int32)
+        self.category_codes = category_codes if category_codes is not None else np.empty(0, dtype=np.int32)
+        self.description_codes = description_codes if description_codes is not None else np.empty(0, dtype=np.int32)
+        self.date_codes = date_codes if date_codes is not None else np.empty(0, dtype=np.int32)
+        self._dictionaries = dictionaries or {'category': _Dictionary(), 'description': _Dictionary(), 'date': _Dictionary()}
+        self._sort_orders = {} # column -> (ascending row order, rank of each row in that order)
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        return cls().extended(transactions)
+
+    @classmethod
+    def from_columns(cls, amounts, dates, category_codes, description_codes, date_codes,
+                     categories, descriptions, raw_dates):
+        """
+        Builds a table around existing column arrays (e.g. memory-mapped snapshot columns)
+        and the dictionary values they index into. The arrays are not copied. Descriptions
+        and raw dates may be lazily decoded sequences (see snapshot.MappedStrings): only the
+        categories, which filters look up by value, are read up front.
+        """
+        dictionaries = {'category': _Dictionary(categories),
+                        'description': _Dictionary(descriptions, index_values=False),
+                        'date': _Dictionary(raw_dates, index_values=False)}
+        return cls(amounts, dates, category_codes, description_codes, date_codes, dictionaries)
+
+    @property
+    def raw_dates(self):
+        return self._dictionaries['date'].values
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @property
+    def categories(self):
+        return self._dictionaries['category'].values
+
+    @property
+    def descriptions(self):
+        return self._dictionaries['description'].values
+
+    def extended(self, transactions):
+        """Returns a new table with `transactions` (a list of dicts) appended."""
+        return self.extended_blocks((transactions,))
+
+    def extended_blocks(self, blocks):
+        """
+        Returns a new table with every block (list of transaction dicts) from the iterable
+        `blocks` appended. Blocks are encoded one at a time and the columns concatenated
+        once at the end, so a large load only holds one block of dicts.
+        """
+        pieces = [(self.amounts, self.dates, self.category_codes, self.description_codes, self.date_codes)]
+        for transactions in blocks:
+            if transactions:
+                pieces.append(self._encode(transactions))
+            del transactions # Release the block before the next one is produced
+        if len(pieces) == 1:
+            return self
+        return TransactionTable(*(np.concatenate(column) for column in zip(*pieces)), self._dictionaries)
+
+    def _encode(self, transactions):
+        count = len(transactions)
+        amounts = np.zeros(count, dtype=np.float64)
+        dates = np.empty(count, dtype=np.int32)
+        category_codes = np.empty(count, dtype=np.int32)
+        description_codes = np.empty(count, dtype=np.int32)
+        date_codes = np.empty(count, dtype=np.int32)
+
+        categories = self._dictionaries['category']
+        descriptions = self._dictionaries['description']
+        raw_dates = self._dictionaries['date']
+        date_ordinals = {} # Statements repeat dates heavily; parse each distinct string once
+        for i, tx in enumerate(transactions):
+            try:
+                amounts[i] = float(tx.get('amount') or 0)
+            except (ValueError, TypeError):
+                logging.warning(f"TransactionTable: treating invalid amount as 0 for transaction {tx}")
+            date_str = tx.get('date')
+            if 'date_ordinal' in tx: # Normalized at ingest
+                ordinal = tx['date_ordinal'] or UNKNOWN_DATE
+            else:
+                ordinal = date_ordinals.get(date_str)
+                if ordinal is None:
+                    ordinal = date_ordinals[date_str] = date_to_ordinal(date_str)
+            dates[i] = ordinal
+            date_codes[i] = raw_dates.encode(date_str)
+            category_codes[i] = categories.encode(tx.get('category', DEFAULT_CATEGORY))
+            description_codes[i] = descriptions.encode(tx.get('description'))
+        return amounts, dates, category_codes, description_codes, date_codes
+
+    def filter_mask(self, date_from=None, date_to=None, category=None, query=None):
+        """
+        Returns a boolean mask of rows matching all given filters.
+        `date_from`/`date_to` are inclusive and may be date objects or date strings.
+        `query` is a case-insensitive substring matched against descriptions.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if date_from is not None:
+            mask &= self.dates >= _as_ordinal(date_from)
+        if date_to is not None:
+            upper = _as_ordinal(date_to)
+            mask &= (self.dates <= upper) & (self.dates != UNKNOWN_DATE)
+        if category is not None:
+            code = self._dictionaries['category'].index.get(category)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self.category_codes == code
+        if query:
+            # Match once per distinct description, then broadcast through the codes.
+            needle = query.lower()
+            descriptions = self.descriptions
+            matches = np.fromiter((needle in (d or '').lower() for d in descriptions), dtype=bool, count=len(descriptions))
+            mask &= matches[self.description_codes]
+        return mask
+
+    def sort_order(self, column):
+        """
+        Returns (order, ranks) for a sortable column: `order` lists row ids in ascending
+        order (ties broken by row id) and `ranks[row_id]` is that row's position in `order`.
+        Computed once per table and column.
+        """
+        if column not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by '{column}'. Expected one of {', '.join(SORTABLE_COLUMNS)}.")
+        cached = self._sort_orders.get(column)
+        if cached is not None:
+            return cached
+        if column == 'amount':
+            keys = self.amounts
+        elif column == 'date':
+            keys = self.dates
+        else:
+            codes, values = ((self.description_codes, self.descriptions) if column == 'description'
+                             else (self.category_codes, self.categories))
+            # Dictionaries are append-only; freeze the entries these codes can refer to
+            sort_keys = [str(value or '').lower() for value in values[:]]
+            alphabetical = sorted(range(len(sort_keys)), key=sort_keys.__getitem__)
+            # Equal values share a rank (a value may have several codes), so ties fall to the row id
+            value_ranks = np.empty(len(sort_keys), dtype=np.int64)
+            value_ranks[alphabetical] = np.cumsum([0] + [sort_keys[a] != sort_keys[b]
+                                                         for a, b in zip(alphabetical, alphabetical[1:])])
+            keys = value_ranks[codes]
+        order = np.argsort(keys, kind='stable')
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        self._sort_orders[column] = (order, ranks)
+        return order, ranks
+
+    def page(self, mask=None, sort='date', descending=False, offset=0, limit=50, after_row=None):
+        """
+        Returns (row ids for one page, number of matching rows).
+
+        Rows are ordered by `sort` (ties by row id). With `after_row` the page starts right
+        after that row in this order (keyset pagination, stable while rows are appended);
+        otherwise it starts at `offset`.
+        """
+        order, ranks = self.sort_order(sort)
+        if descending:
+            order = order[::-1]
+        selected = order if mask is None else order[mask[order]]
+        if after_row is not None:
+            if not 0 <= after_row < len(self):
+                raise ValueError(f"Unknown row id {after_row}.")
+            selected_ranks = ranks[selected]
+            if descending:
+                start = int(np.searchsorted(-selected_ranks, -ranks[after_row], side='right'))
+            else:
+                start = int(np.searchsorted(selected_ranks, ranks[after_row], side='right'))
+        else:
+            start = offset
+        return selected[start:start + limit], len(selected)
+
+    def _spending_mask(self, mask):
+        spending = self.amounts > 0
+        return spending if mask is None else spending & mask
+
+    def total_spent(self, mask=None):
+        return float(self.amounts[self._spending_mask(mask)].sum())
+
+    def group_by_month(self, mask=None):
+        """Returns {'YYYY-MM': total} of positive amounts, skipping undated rows."""
+        selected = self._spending_mask(mask) & (self.dates != UNKNOWN_DATE)
+        days = (self.dates[selected].astype(np.int64) - _UNIX_EPOCH_ORDINAL).astype('datetime64[D]')
+        months, inverse = np.unique(days.astype('datetime64[M]'), return_inverse=True)
+        totals = np.bincount(inverse, weights=self.amounts[selected], minlength=len(months))
+        return {str(month): float(total) for month, total in zip(months, totals)}
+
+    def group_by_category(self, mask=None):
+        """Returns {category: total} of positive amounts."""
+        selected = self._spending_mask(mask)
+        totals = np.bincount(self.category_codes[selected], weights=self.amounts[selected],
+                             minlength=len(self.categories))
+        present = np.bincount(self.category_codes[selected], minlength=len(self.categories)) > 0
+        return {self.categories[code]: float(totals[code]) for code in np.flatnonzero(present)}
+
+    def to_records(self, indices=None):
+        """Materializes rows (all, or those at `indices`) back into transaction dicts."""
+        if indices is None:
+            indices = range(len(self))
+        categories = self.categories
+        descriptions = self.descriptions
+        raw_dates = self._dictionaries['date'].values
+        return [{
+            'date': raw_dates[self.date_codes[i]],
+            'description': descriptions[self.description_codes[i]],
+            'amount': float(self.amounts[i]),
+            'category': categories[self.category_codes[i]],
+        } for i in indices]
+
+def _as_ordinal(value):
+    if isinstance(value, date):
+        return value.toordinal()
+    return date_to_ordinal(value)
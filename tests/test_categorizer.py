@@ -2,11 +2,14 @@
 import unittest
 import sys
 import os
+import pandas as pd
 
 # Add project root to sys.path to allow absolute imports of spendwise modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from spendwise.utils.categorizer import categorize_transaction, DEFAULT_CATEGORY, CATEGORIES_KEYWORDS
+from spendwise.utils.categorizer import (categorize_transaction, DEFAULT_CATEGORY, CATEGORIES_KEYWORDS, KeywordMatcher,
+                                         add_category_keywords, reset_keyword_matcher, categorization_cache_info,
+                                         categorize_list, categorize_series)
 
 class TestCategorizer(unittest.TestCase):
 
@@ -44,5 +47,96 @@ class TestCategorizer(unittest.TestCase):
         self.assertEqual(categorize_transaction("My CoFfEe"), "Food & Dining")
 
 
+class TestBatchCategorization(unittest.TestCase):
+
+    DESCRIPTIONS = ["Starbucks coffee", "Uber ride", None, "Starbucks coffee", "unknown thing"]
+    EXPECTED = ["Food & Dining", "Transport", DEFAULT_CATEGORY, "Food & Dining", DEFAULT_CATEGORY]
+
+    def test_categorize_list(self):
+        self.assertEqual(categorize_list(self.DESCRIPTIONS), self.EXPECTED)
+
+    def test_categorize_series_keeps_index(self):
+        series = pd.Series(self.DESCRIPTIONS, index=[10, 11, 12, 13, 14])
+        result = categorize_series(series)
+        self.assertEqual(list(result.index), [10, 11, 12, 13, 14])
+        self.assertEqual(list(result), self.EXPECTED)
+
+    def test_categorize_series_with_missing_values(self):
+        result = categorize_series(pd.Series([float('nan'), "rent payment"]))
+        self.assertEqual(list(result), [DEFAULT_CATEGORY, "Housing"])
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def naive_match(self, categories_keywords, text):
+        for category, keywords in categories_keywords.items():
+            if any(keyword in text for keyword in keywords):
+                return category
+        return None
+
+    def test_first_category_wins_over_earlier_occurrence(self):
+        # 'Transport' keyword appears first in the text, but 'Food & Dining' has priority.
+        self.assertEqual(categorize_transaction("uber eats order"), "Food & Dining")
+
+    def test_overlapping_keywords(self):
+        categories_keywords = {'A': ['bcd'], 'B': ['abcde', 'cd'], 'C': ['b']}
+        matcher = KeywordMatcher(categories_keywords)
+        for text in ['abcde', 'xbcdx', 'abcdx', 'xcdx', 'b', 'zzz', 'abc']:
+            with self.subTest(text=text):
+                self.assertEqual(matcher.match(text), self.naive_match(categories_keywords, text))
+
+    def test_matches_naive_scan_on_real_keywords(self):
+        matcher = KeywordMatcher(CATEGORIES_KEYWORDS)
+        samples = ["uber trip to the bus station", "shell gas bill", "sbux storefront", "hotel booking.com",
+                   "at&t phone bill", "dinner at the theater", "gym membership", "nothing here"]
+        for text in samples:
+            with self.subTest(text=text):
+                self.assertEqual(matcher.match(text), self.naive_match(CATEGORIES_KEYWORDS, text))
+
+
+class TestCategorizationCache(unittest.TestCase):
+
+    def setUp(self):
+        reset_keyword_matcher()
+
+    def test_store_numbers_and_dates_share_a_cache_entry(self):
+        self.assertEqual(categorize_transaction("STARBUCKS #1234 01/15"), "Food & Dining")
+        self.assertEqual(categorize_transaction("STARBUCKS #98 02/28"), "Food & Dining")
+        info = categorization_cache_info()
+        self.assertEqual(info['description']['misses'], 2)
+        self.assertEqual(info['merchant']['misses'], 1)
+        self.assertEqual(info['merchant']['hits'], 1)
+
+    def test_exact_repeats_hit_the_description_cache(self):
+        for _ in range(3):
+            categorize_transaction("UBER TRIP")
+        self.assertEqual(categorization_cache_info()['description']['hits'], 2)
+
+    def test_adding_keywords_invalidates_cache(self):
+        original = {category: list(keywords) for category, keywords in CATEGORIES_KEYWORDS.items()}
+        try:
+            self.assertEqual(categorize_transaction("Zorblax Widgets 42"), DEFAULT_CATEGORY)
+            add_category_keywords('Shopping', ['zorblax'])
+            self.assertEqual(categorize_transaction("Zorblax Widgets 42"), "Shopping")
+        finally:
+            CATEGORIES_KEYWORDS.clear()
+            CATEGORIES_KEYWORDS.update(original)
+            reset_keyword_matcher()
+
+    def test_editing_keywords_directly_invalidates_cache(self):
+        original = {category: list(keywords) for category, keywords in CATEGORIES_KEYWORDS.items()}
+        try:
+            self.assertEqual(categorize_transaction("ZORBLAX QQQ"), DEFAULT_CATEGORY)
+            CATEGORIES_KEYWORDS['Travel'].append('zorblax')
+            self.assertEqual(categorize_transaction("ZORBLAX QQQ"), "Travel")
+            CATEGORIES_KEYWORDS['Travel'] = [keyword for keyword in CATEGORIES_KEYWORDS['Travel'] if keyword != 'zorblax']
+            CATEGORIES_KEYWORDS['Gadgets'] = ['qqq']
+            self.assertEqual(categorize_transaction("ZORBLAX QQQ"), "Gadgets")
+        finally:
+            CATEGORIES_KEYWORDS.clear()
+            CATEGORIES_KEYWORDS.update(original)
+            reset_keyword_matcher()
+
+
 if __name__ == '__main__':
     unittest.main()
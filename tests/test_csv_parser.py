@@ -6,7 +6,7 @@ import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from spendwise.utils.csv_parser import parse_csv
+from spendwise.utils.csv_parser import parse_csv, iter_csv_transactions
 from spendwise.utils.categorizer import DEFAULT_CATEGORY # For checking category
 
 # Define a temporary test file path within the tests directory
@@ -18,6 +18,10 @@ DUMMY_CSV_MISSING_HEADER = os.path.join(TEST_DATA_DIR, 'dummy_missing_header.csv
 
 
 class TestCSVParser(unittest.TestCase):
+    ENGINE = 'python'
+
+    def parse(self, file_path):
+        return parse_csv(file_path, engine=self.ENGINE)
 
     @classmethod
     def setUpClass(cls):
@@ -69,7 +73,7 @@ class TestCSVParser(unittest.TestCase):
 
 
     def test_parse_valid_csv(self):
-        result = parse_csv(DUMMY_CSV_VALID)
+        result = self.parse(DUMMY_CSV_VALID)
         self.assertEqual(result['success_count'], 2)
         self.assertEqual(result['skipped_count'], 0)
         self.assertEqual(len(result['transactions']), 2)
@@ -79,7 +83,7 @@ class TestCSVParser(unittest.TestCase):
         self.assertEqual(result['transactions'][1]['category'], "Food & Dining") # Corrected: "Grocery Store" -> "Food & Dining"
 
     def test_parse_csv_with_invalid_row(self):
-        result = parse_csv(DUMMY_CSV_INVALID_ROW)
+        result = self.parse(DUMMY_CSV_INVALID_ROW)
         self.assertEqual(result['success_count'], 2)
         self.assertEqual(result['skipped_count'], 1) # 'ABC' amount row
         self.assertEqual(len(result['transactions']), 2)
@@ -87,23 +91,75 @@ class TestCSVParser(unittest.TestCase):
         self.assertEqual(result['transactions'][1]['category'], "Shopping") # "Electronics Store"
 
 
+    def test_dates_normalized_with_detected_format(self):
+        path = os.path.join(TEST_DATA_DIR, 'dummy_day_first.csv')
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Date', 'Description', 'Amount'])
+            writer.writerow(['03/04/2023', 'Coffee', '4.50'])
+            writer.writerow(['25/04/2023', 'Bus', '2.00'])
+        try:
+            transactions = self.parse(path)['transactions']
+        finally:
+            os.remove(path)
+        self.assertEqual([tx['date'] for tx in transactions], ['2023-04-03', '2023-04-25'])
+        self.assertEqual(transactions[0]['date_ordinal'], 738613)
+
+    def test_iter_csv_transactions_counts_as_it_yields(self):
+        counts = {'success_count': 0, 'skipped_count': 0}
+        rows = iter_csv_transactions(DUMMY_CSV_INVALID_ROW, counts)
+        first = next(rows)
+        self.assertEqual(first['category'], "Shopping")
+        self.assertEqual(counts['success_count'], 1)
+        self.assertEqual(len(list(rows)), 1)
+        self.assertEqual(counts, {'success_count': 2, 'skipped_count': 1})
+
     def test_parse_empty_csv_with_headers(self): # Renamed for clarity
-        result = parse_csv(DUMMY_CSV_EMPTY)
+        result = self.parse(DUMMY_CSV_EMPTY)
         self.assertEqual(result['success_count'], 0)
         self.assertEqual(result['skipped_count'], 0)
         self.assertEqual(len(result['transactions']), 0)
 
     def test_parse_csv_missing_header(self):
-        result = parse_csv(DUMMY_CSV_MISSING_HEADER)
+        result = self.parse(DUMMY_CSV_MISSING_HEADER)
         self.assertEqual(result['success_count'], 0)
         self.assertEqual(result['skipped_count'], 0)
         self.assertEqual(len(result['transactions']), 0)
 
     def test_parse_non_existent_csv(self):
-        result = parse_csv("non_existent_file.csv")
+        result = self.parse("non_existent_file.csv")
         self.assertEqual(result['success_count'], 0)
         self.assertEqual(result['skipped_count'], 0)
         self.assertEqual(len(result['transactions']), 0)
+    def test_duplicate_headers_use_the_last_column(self):
+        path = os.path.join(TEST_DATA_DIR, 'dummy_duplicate_headers.csv')
+        with open(path, 'w', newline='') as f:
+            f.write("DATE,Description,Amount,Date,Amount\n2023-01-15,Coffee Shop,oops,2023-01-16,4.50\n")
+        try:
+            result = self.parse(path)
+            self.assertEqual((result['success_count'], result['skipped_count']), (1, 0))
+            self.assertEqual((result['transactions'][0]['date'], result['transactions'][0]['amount']), ('2023-01-16', 4.50))
+            self.assertEqual(result, parse_csv(path))
+        finally:
+            os.remove(path)
+
+
+class TestCSVParserPandasEngine(TestCSVParser):
+    """Runs every TestCSVParser case through the pandas engine."""
+    ENGINE = 'pandas'
+
+    def test_ragged_rows_match_python_engine(self):
+        path = os.path.join(TEST_DATA_DIR, 'dummy_ragged.csv')
+        with open(path, 'w', newline='') as f:
+            f.write("Amount,Description,Date\n5,Short row\n6,Coffee Shop,2023-01-20,extra\n7,Taxi,\n")
+        try:
+            self.assertEqual(self.parse(path), parse_csv(path))
+        finally:
+            os.remove(path)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            parse_csv(DUMMY_CSV_VALID, engine='fast')
 
 if __name__ == '__main__':
     unittest.main()
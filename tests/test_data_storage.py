@@ -3,10 +3,26 @@ import unittest
 import os
 import json
 import sys
+import glob
+import threading
+from unittest import mock
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from spendwise.utils.data_storage import save_transactions_jsonl, load_transactions_jsonl
+from spendwise.utils.data_storage import (save_transactions_jsonl, load_transactions_jsonl, clear_transactions_cache, load_aggregates,
+                                          load_transaction_table, compact_transactions_snapshot, iter_transactions_jsonl,
+                                          save_transaction_stream, file_already_imported, record_file_import,
+                                          migrate_transaction_dates, iter_transactions_by_date, load_date_index,
+                                          search_transactions)
+from spendwise.utils.aggregates import aggregates_path, transaction_month
+from spendwise.utils.dedup_index import dedup_path
+from spendwise.utils.csv_parser import parse_csv
+from spendwise.utils.date_index import date_index_path
+from spendwise.utils import date_index
+from spendwise.utils import search_index
+from spendwise.utils import data_storage
+from spendwise.utils.snapshot import MappedStrings
+from datetime import date
 
 # Define a temporary test file path within the tests directory
 TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'test_data')
@@ -21,15 +37,19 @@ class TestDataStorage(unittest.TestCase):
         if not os.path.exists(TEST_DATA_DIR):
             os.makedirs(TEST_DATA_DIR)
 
+    def _remove_test_files(self):
+        # The transactions file plus any sidecars written next to it
+        for path in glob.glob(os.path.join(TEST_DATA_DIR, 'test_transactions*')):
+            os.remove(path)
+
     def setUp(self):
         # Ensure the test file is clean before each test
-        if os.path.exists(TEST_TRANSACTIONS_FILE):
-            os.remove(TEST_TRANSACTIONS_FILE)
+        self._remove_test_files()
+        clear_transactions_cache()
 
     def tearDown(self):
         # Clean up the test file after each test
-        if os.path.exists(TEST_TRANSACTIONS_FILE):
-            os.remove(TEST_TRANSACTIONS_FILE)
+        self._remove_test_files()
 
     @classmethod
     def tearDownClass(cls):
@@ -90,5 +110,328 @@ class TestDataStorage(unittest.TestCase):
         self.assertEqual(loaded_transactions[0]['description'], "Good one")
         self.assertEqual(loaded_transactions[1]['description'], "Another good")
 
+    def test_iter_transactions_skips_malformed_lines(self):
+        with open(TEST_TRANSACTIONS_FILE, 'w') as f:
+            f.write('{"date": "2023-01-03", "description": "Good one", "amount": 1.0, "category": "Ok"}\n')
+            f.write('this is not valid json\n')
+            f.write('{"date": "2023-01-04", "description": "Another good", "amount": 2.0, "category": "Ok"}\n')
+        descriptions = [tx['description'] for tx in iter_transactions_jsonl(TEST_TRANSACTIONS_FILE)]
+        self.assertEqual(descriptions, ["Good one", "Another good"])
+        self.assertEqual(list(iter_transactions_jsonl("non_existent_test_file.jsonl")), [])
+
+    def test_cached_load_picks_up_appended_rows(self):
+        transactions1 = [{'date': '2023-02-01', 'description': 'First', 'amount': 1.0, 'category': 'Test'}]
+        transactions2 = [{'date': '2023-02-02', 'description': 'Second', 'amount': 2.0, 'category': 'Test'}]
+        save_transactions_jsonl(transactions1, TEST_TRANSACTIONS_FILE)
+        self.assertEqual(load_transactions_jsonl(TEST_TRANSACTIONS_FILE), transactions1)
+
+        save_transactions_jsonl(transactions2, TEST_TRANSACTIONS_FILE)
+        self.assertEqual(load_transactions_jsonl(TEST_TRANSACTIONS_FILE), transactions1 + transactions2)
+        self.assertEqual(load_transactions_jsonl(TEST_TRANSACTIONS_FILE, use_cache=False), transactions1 + transactions2)
+
+    def test_cached_load_detects_rewritten_file(self):
+        save_transactions_jsonl([{'date': '2023-02-01', 'description': 'Old', 'amount': 1.0}], TEST_TRANSACTIONS_FILE)
+        load_transactions_jsonl(TEST_TRANSACTIONS_FILE)
+
+        replacement = [{'date': '2023-03-01', 'description': 'Replacement row', 'amount': 9.0}]
+        with open(TEST_TRANSACTIONS_FILE, 'w') as f:
+            f.write(json.dumps(replacement[0]) + '\n')
+        self.assertEqual(load_transactions_jsonl(TEST_TRANSACTIONS_FILE), replacement)
+
+    def test_cached_load_handles_partial_trailing_line(self):
+        first = {'date': '2023-02-01', 'description': 'Complete', 'amount': 1.0}
+        second = {'date': '2023-02-02', 'description': 'No newline yet', 'amount': 2.0}
+        with open(TEST_TRANSACTIONS_FILE, 'w') as f:
+            f.write(json.dumps(first) + '\n' + json.dumps(second))
+        self.assertEqual(load_transactions_jsonl(TEST_TRANSACTIONS_FILE), [first, second])
+
+        third = {'date': '2023-02-03', 'description': 'Appended later', 'amount': 3.0}
+        with open(TEST_TRANSACTIONS_FILE, 'a') as f:
+            f.write('\n' + json.dumps(third) + '\n')
+        self.assertEqual(load_transactions_jsonl(TEST_TRANSACTIONS_FILE), [first, second, third])
+
+    def test_aggregates_updated_on_append(self):
+        save_transactions_jsonl([
+            {'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'},
+            {'date': '01/20/2023', 'description': 'Refund', 'amount': -3.0, 'category': 'Shopping'},
+        ], TEST_TRANSACTIONS_FILE)
+        save_transactions_jsonl([
+            {'date': '2023-02-01', 'description': 'Bus', 'amount': 2.5, 'category': 'Transport'},
+        ], TEST_TRANSACTIONS_FILE)
+        self.assertTrue(os.path.exists(aggregates_path(TEST_TRANSACTIONS_FILE)))
+
+        totals = load_aggregates(TEST_TRANSACTIONS_FILE)
+        self.assertAlmostEqual(totals['total_spent'], 7.5)
+        self.assertEqual(totals['monthly'], {'2023-01': 5.0, '2023-02': 2.5})
+        self.assertEqual(totals['categories'], {'Food & Dining': 5.0, 'Transport': 2.5})
+
+    def test_stream_saves_in_batches_and_keeps_aggregates_current(self):
+        def generate():
+            for day in range(1, 6):
+                yield {'date': f'2023-01-{day:02d}', 'description': f'Item {day}', 'amount': float(day), 'category': 'Shopping'}
+        self.assertEqual(save_transaction_stream(generate(), TEST_TRANSACTIONS_FILE, batch_size=2), 5)
+        self.assertEqual([tx['description'] for tx in load_transactions_jsonl(TEST_TRANSACTIONS_FILE, use_cache=False)],
+                         [f'Item {day}' for day in range(1, 6)])
+        with open(aggregates_path(TEST_TRANSACTIONS_FILE)) as f:
+            sidecar = json.load(f)
+        self.assertEqual(sidecar['log_identity'][1], os.path.getsize(TEST_TRANSACTIONS_FILE)) # Sidecar matches the log
+        self.assertAlmostEqual(sidecar['aggregates']['total_spent'], 15.0)
+
+    def test_stream_skips_unserializable_batch(self):
+        rows = [{'date': '2023-01-01', 'description': 'ok', 'amount': 1.0, 'category': 'Shopping'},
+                {'date': '2023-01-02', 'description': object(), 'amount': 2.0, 'category': 'Shopping'},
+                {'date': '2023-01-03', 'description': 'ok too', 'amount': 3.0, 'category': 'Shopping'}]
+        self.assertEqual(save_transaction_stream(rows, TEST_TRANSACTIONS_FILE, batch_size=1), 2)
+        self.assertAlmostEqual(load_aggregates(TEST_TRANSACTIONS_FILE)['total_spent'], 4.0)
+
+    def test_aggregates_rebuilt_when_sidecar_missing_or_stale(self):
+        save_transactions_jsonl([{'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'}], TEST_TRANSACTIONS_FILE)
+        os.remove(aggregates_path(TEST_TRANSACTIONS_FILE))
+        self.assertAlmostEqual(load_aggregates(TEST_TRANSACTIONS_FILE)['total_spent'], 5.0)
+
+        # Appended behind the sidecar's back
+        with open(TEST_TRANSACTIONS_FILE, 'a') as f:
+            f.write(json.dumps({'date': '2023-03-02', 'description': 'Lunch', 'amount': 10.0, 'category': 'Food & Dining'}) + '\n')
+        totals = load_aggregates(TEST_TRANSACTIONS_FILE)
+        self.assertAlmostEqual(totals['total_spent'], 15.0)
+        self.assertEqual(totals['monthly'], {'2023-01': 5.0, '2023-03': 10.0})
+
+    def test_table_loads_from_snapshot_plus_tail(self):
+        transactions1 = [
+            {'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'},
+            {'date': '2023-01-16', 'description': 'Caf\u00e9 cr\u00e8me', 'amount': 4.0, 'category': None},
+        ]
+        transactions2 = [{'date': '2023-02-01', 'description': 'Bus', 'amount': 2.5, 'category': 'Transport'}]
+        save_transactions_jsonl(transactions1, TEST_TRANSACTIONS_FILE)
+        self.assertTrue(compact_transactions_snapshot(TEST_TRANSACTIONS_FILE))
+
+        # A fresh process maps the snapshot instead of decoding the JSONL
+        clear_transactions_cache()
+        table = load_transaction_table(TEST_TRANSACTIONS_FILE)
+        self.assertFalse(table.amounts.flags.writeable)
+        self.assertEqual(table.to_records(), transactions1)
+
+        save_transactions_jsonl(transactions2, TEST_TRANSACTIONS_FILE)
+        self.assertEqual(load_transaction_table(TEST_TRANSACTIONS_FILE).to_records(), transactions1 + transactions2)
+
+    def test_snapshot_strings_are_decoded_on_demand(self):
+        transactions = [{'date': f'2023-01-{day:02d}', 'description': f'Shop {day}', 'amount': float(day), 'category': 'Shopping'}
+                        for day in range(1, 6)]
+        save_transactions_jsonl(transactions, TEST_TRANSACTIONS_FILE)
+        compact_transactions_snapshot(TEST_TRANSACTIONS_FILE)
+        clear_transactions_cache()
+        table = load_transaction_table(TEST_TRANSACTIONS_FILE)
+        self.assertIsInstance(table.descriptions, MappedStrings)
+        self.assertEqual(table.to_records([3]), [transactions[3]])
+        self.assertEqual(len(table.descriptions._decoded), 1)
+
+        # A row repeating a mapped description gets a second code but reads back and sorts the same
+        repeat = {'date': '2023-01-01', 'description': 'Shop 1', 'amount': 9.0, 'category': 'Shopping'}
+        save_transactions_jsonl([repeat], TEST_TRANSACTIONS_FILE)
+        table = load_transaction_table(TEST_TRANSACTIONS_FILE)
+        self.assertEqual(table.to_records(), transactions + [repeat])
+        row_ids, _ = table.page(sort='description', limit=3)
+        self.assertEqual(row_ids.tolist(), [0, 5, 1])
+
+    def test_saves_compact_the_snapshot_in_the_background(self):
+        release = threading.Event()
+        compacting = mock.Mock(side_effect=lambda file_path: release.wait(10))
+        with mock.patch.object(data_storage, 'SNAPSHOT_COMPACT_BYTES', 1), \
+                mock.patch.object(data_storage, 'compact_transactions_snapshot', compacting):
+            tx = {'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'}
+            self.assertTrue(save_transactions_jsonl([tx], TEST_TRANSACTIONS_FILE)) # Returns while the compaction waits
+            save_transactions_jsonl([dict(tx, description='Tea')], TEST_TRANSACTIONS_FILE)
+            release.set()
+            data_storage._COMPACTIONS[os.path.abspath(TEST_TRANSACTIONS_FILE)].join(10)
+        compacting.assert_called_once_with(TEST_TRANSACTIONS_FILE)
+
+    def test_stale_snapshot_is_ignored(self):
+        save_transactions_jsonl([{'date': '2023-01-15', 'description': 'Old', 'amount': 5.0, 'category': 'Test'}], TEST_TRANSACTIONS_FILE)
+        compact_transactions_snapshot(TEST_TRANSACTIONS_FILE)
+        os.remove(TEST_TRANSACTIONS_FILE)
+        replacement = [{'date': '2023-03-01', 'description': 'New file', 'amount': 1.0, 'category': 'Test'}]
+        with open(TEST_TRANSACTIONS_FILE + '.new', 'w') as f:
+            f.write(json.dumps(replacement[0]) + '\n')
+        os.replace(TEST_TRANSACTIONS_FILE + '.new', TEST_TRANSACTIONS_FILE)
+
+        clear_transactions_cache()
+        self.assertEqual(load_transaction_table(TEST_TRANSACTIONS_FILE).to_records(), replacement)
+
+    def test_overlapping_save_drops_duplicates(self):
+        first = [{'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'},
+                 {'date': '2023-01-16', 'description': 'Bus', 'amount': 2.5, 'category': 'Transport'}]
+        overlap = [{'date': '2023-01-16', 'description': '  BUS ', 'amount': 2.50, 'category': 'Transport'},
+                   {'date': '2023-01-17', 'description': 'Lunch', 'amount': 12.0, 'category': 'Food & Dining'}]
+        self.assertTrue(save_transactions_jsonl(first, TEST_TRANSACTIONS_FILE))
+        result = {'duplicate_count': 0}
+        self.assertTrue(save_transactions_jsonl(overlap, TEST_TRANSACTIONS_FILE, result=result))
+        self.assertEqual(result['duplicate_count'], 1)
+        self.assertEqual([tx['description'] for tx in load_transactions_jsonl(TEST_TRANSACTIONS_FILE)], ['Coffee', 'Bus', 'Lunch'])
+        self.assertAlmostEqual(load_aggregates(TEST_TRANSACTIONS_FILE)['total_spent'], 19.5)
+        self.assertTrue(save_transactions_jsonl(first, TEST_TRANSACTIONS_FILE)) # Nothing new, still a success
+        self.assertEqual(len(load_transactions_jsonl(TEST_TRANSACTIONS_FILE)), 3)
+
+    def test_repeated_identical_transactions_are_kept(self):
+        coffee = {'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'}
+        save_transactions_jsonl([coffee, dict(coffee)], TEST_TRANSACTIONS_FILE)
+        self.assertEqual(len(load_transactions_jsonl(TEST_TRANSACTIONS_FILE)), 2)
+        # A later statement with three of them adds only the third; repeats count across stream batches
+        result = {'duplicate_count': 0}
+        self.assertEqual(save_transaction_stream([dict(coffee) for _ in range(3)], TEST_TRANSACTIONS_FILE, batch_size=1, result=result), 1)
+        self.assertEqual(result['duplicate_count'], 2)
+        self.assertEqual(len(load_transactions_jsonl(TEST_TRANSACTIONS_FILE)), 3)
+
+    def test_dedup_index_rebuilt_or_caught_up_from_log(self):
+        rows = [{'date': f'2023-01-{day:02d}', 'description': f'Item {day}', 'amount': float(day), 'category': 'Shopping'}
+                for day in range(1, 4)]
+        save_transactions_jsonl(rows[:1], TEST_TRANSACTIONS_FILE)
+        # Appended behind the index's back, then the in-memory copy is dropped
+        with open(TEST_TRANSACTIONS_FILE, 'a') as f:
+            f.write(json.dumps(rows[1]) + '\n')
+        clear_transactions_cache()
+        save_transactions_jsonl(rows, TEST_TRANSACTIONS_FILE)
+        self.assertEqual(len(load_transactions_jsonl(TEST_TRANSACTIONS_FILE)), 3)
+
+        os.remove(dedup_path(TEST_TRANSACTIONS_FILE))
+        clear_transactions_cache()
+        save_transactions_jsonl(rows, TEST_TRANSACTIONS_FILE)
+        self.assertEqual(len(load_transactions_jsonl(TEST_TRANSACTIONS_FILE)), 3)
+        self.assertEqual(os.path.getsize(dedup_path(TEST_TRANSACTIONS_FILE)) % 8, 4) # 28-byte header + 3 keys
+
+    def test_reimport_matches_rows_saved_before_date_normalization(self):
+        with open(TEST_TRANSACTIONS_FILE, 'w') as f:
+            f.write(json.dumps({'date': '01/15/2023', 'description': 'Coffee', 'amount': 4.5, 'category': 'Food & Dining'}) + '\n')
+        csv_path = os.path.join(TEST_DATA_DIR, 'test_transactions_statement.csv')
+        with open(csv_path, 'w') as f:
+            f.write('Date,Description,Amount\n01/15/2023,Coffee,4.50\n01/16/2023,Bus,2.00\n')
+        result = {}
+        self.assertTrue(save_transactions_jsonl(parse_csv(csv_path)['transactions'], TEST_TRANSACTIONS_FILE, result=result))
+        self.assertEqual(result['duplicate_count'], 1)
+        self.assertEqual([tx['description'] for tx in load_transactions_jsonl(TEST_TRANSACTIONS_FILE)], ['Coffee', 'Bus'])
+
+    def test_file_import_record_follows_log(self):
+        self.assertIsNone(file_already_imported('abc', TEST_TRANSACTIONS_FILE))
+        save_transactions_jsonl([{'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0}], TEST_TRANSACTIONS_FILE)
+        self.assertTrue(record_file_import('abc', 'jan.csv', 1, TEST_TRANSACTIONS_FILE))
+        self.assertEqual(file_already_imported('abc', TEST_TRANSACTIONS_FILE)['filename'], 'jan.csv')
+        self.assertIsNone(file_already_imported('def', TEST_TRANSACTIONS_FILE))
+
+    def test_migrate_transaction_dates(self):
+        legacy = [{'date': '01/15/2023', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'},
+                  {'date': '2023-02-01', 'description': 'Bus', 'amount': 2.5, 'category': 'Transport'},
+                  {'date': 'pending', 'description': 'Hold', 'amount': 1.0, 'category': 'Shopping'}]
+        with open(TEST_TRANSACTIONS_FILE, 'w') as f:
+            for tx in legacy:
+                f.write(json.dumps(tx) + '\n')
+        save_transactions_jsonl([{'date': '2023-03-01', 'date_ordinal': 738580, 'description': 'New', 'amount': 3.0, 'category': 'Shopping'}],
+                                TEST_TRANSACTIONS_FILE)
+        record_file_import('abc', 'jan.csv', 1, TEST_TRANSACTIONS_FILE)
+        self.assertEqual(len(load_transactions_jsonl(TEST_TRANSACTIONS_FILE)), 4) # Warm the cache
+
+        self.assertEqual(migrate_transaction_dates(TEST_TRANSACTIONS_FILE), {'rows': 4, 'migrated': 3})
+        rows = load_transactions_jsonl(TEST_TRANSACTIONS_FILE)
+        self.assertEqual([(tx['date'], tx['date_ordinal']) for tx in rows],
+                         [('2023-01-15', 738535), ('2023-02-01', 738552), ('pending', None), ('2023-03-01', 738580)])
+        self.assertEqual(load_aggregates(TEST_TRANSACTIONS_FILE)['monthly'], {'2023-01': 5.0, '2023-02': 2.5, '2023-03': 3.0})
+        self.assertIsNotNone(file_already_imported('abc', TEST_TRANSACTIONS_FILE))
+        self.assertEqual(migrate_transaction_dates(TEST_TRANSACTIONS_FILE), {'rows': 4, 'migrated': 0})
+
+        # Saves after the migration append to the rewritten log and still see earlier rows as duplicates
+        save_transactions_jsonl([dict(rows[0]), {'date': '2023-04-01', 'date_ordinal': 738611, 'description': 'Later', 'amount': 1.0}],
+                                TEST_TRANSACTIONS_FILE)
+        self.assertEqual(len(load_transactions_jsonl(TEST_TRANSACTIONS_FILE)), 5)
+
+    def test_date_range_reads_matching_rows_in_date_order(self):
+        save_transactions_jsonl([{'date': '2023-02-10', 'date_ordinal': date(2023, 2, 10).toordinal(), 'description': 'Feb', 'amount': 2.0},
+                                 {'date': '2023-01-05', 'date_ordinal': date(2023, 1, 5).toordinal(), 'description': 'Jan', 'amount': 1.0},
+                                 {'date': 'pending', 'date_ordinal': None, 'description': 'Hold', 'amount': 9.0}],
+                                TEST_TRANSACTIONS_FILE)
+        save_transactions_jsonl([{'date': '2023-02-01', 'date_ordinal': date(2023, 2, 1).toordinal(), 'description': 'Feb 1', 'amount': 3.0},
+                                 {'date': '03/15/2023', 'description': 'Legacy', 'amount': 4.0}], TEST_TRANSACTIONS_FILE)
+        describe = lambda rows: [tx['description'] for tx in rows]
+        self.assertEqual(describe(iter_transactions_by_date(date(2023, 2, 1), date(2023, 2, 28), TEST_TRANSACTIONS_FILE)), ['Feb 1', 'Feb'])
+        self.assertEqual(describe(iter_transactions_by_date(file_path=TEST_TRANSACTIONS_FILE)), ['Jan', 'Feb 1', 'Feb', 'Legacy'])
+        self.assertEqual(describe(iter_transactions_by_date(date(2023, 4, 1), None, TEST_TRANSACTIONS_FILE)), [])
+        # The sidecar was extended by both saves; a fresh process reads it without rescanning the log
+        clear_transactions_cache()
+        self.assertEqual(len(load_date_index(TEST_TRANSACTIONS_FILE)), 5)
+        self.assertEqual(describe(iter_transactions_by_date(date(2023, 1, 1), date(2023, 1, 31), TEST_TRANSACTIONS_FILE)), ['Jan'])
+
+    def test_date_index_rebuilt_or_caught_up_from_log(self):
+        save_transactions_jsonl([{'date': '2023-01-05', 'date_ordinal': date(2023, 1, 5).toordinal(), 'description': 'Jan', 'amount': 1.0}],
+                                TEST_TRANSACTIONS_FILE)
+        with open(TEST_TRANSACTIONS_FILE, 'a') as f:
+            f.write(json.dumps({'date': '2023-01-20', 'description': 'Behind the back', 'amount': 2.0}) + '\n')
+        january = (date(2023, 1, 1), date(2023, 1, 31), TEST_TRANSACTIONS_FILE)
+        self.assertEqual(len(list(iter_transactions_by_date(*january))), 2)
+        self.assertEqual(date_index.read_date_index_header(TEST_TRANSACTIONS_FILE)[1], os.path.getsize(TEST_TRANSACTIONS_FILE))
+
+        os.remove(date_index_path(TEST_TRANSACTIONS_FILE))
+        clear_transactions_cache()
+        save_transactions_jsonl([{'date': '2023-01-25', 'date_ordinal': date(2023, 1, 25).toordinal(), 'description': 'Later', 'amount': 3.0}],
+                                TEST_TRANSACTIONS_FILE)
+        self.assertEqual([tx['description'] for tx in iter_transactions_by_date(*january)], ['Jan', 'Behind the back', 'Later'])
+
+    def test_date_index_rewritten_sorted_when_tail_grows(self):
+        original = date_index.MIN_MERGE_ENTRIES
+        date_index.MIN_MERGE_ENTRIES = 2
+        try:
+            for day in (9, 3, 7, 1):
+                save_transactions_jsonl([{'date': f'2023-01-0{day}', 'date_ordinal': date(2023, 1, day).toordinal(),
+                                          'description': f'Day {day}', 'amount': 1.0}], TEST_TRANSACTIONS_FILE)
+        finally:
+            date_index.MIN_MERGE_ENTRIES = original
+        inode, covered, sorted_count, entries = date_index.read_date_index_header(TEST_TRANSACTIONS_FILE)
+        self.assertEqual((covered, entries), (os.path.getsize(TEST_TRANSACTIONS_FILE), 4))
+        self.assertGreater(sorted_count, 1)
+        clear_transactions_cache()
+        self.assertEqual([tx['description'] for tx in iter_transactions_by_date(file_path=TEST_TRANSACTIONS_FILE)],
+                         ['Day 1', 'Day 3', 'Day 7', 'Day 9'])
+
+    def test_search_finds_prefix_and_all_terms(self):
+        save_transactions_jsonl([{'date': '2023-01-01', 'description': 'STARBUCKS #12', 'amount': 5.0},
+                                 {'date': '2023-01-02', 'description': 'Star Market', 'amount': 40.0}], TEST_TRANSACTIONS_FILE)
+        save_transactions_jsonl([{'date': '2023-01-03', 'description': 'Amazon Marketplace', 'amount': 12.0},
+                                 {'date': '2023-01-04', 'description': 'Starbucks Reserve', 'amount': 7.0}], TEST_TRANSACTIONS_FILE)
+        found = lambda query, **page: [(tx['id'], tx['description']) for tx in search_transactions(query, TEST_TRANSACTIONS_FILE, **page)['transactions']]
+        self.assertEqual(found('starbucks'), [(3, 'Starbucks Reserve'), (0, 'STARBUCKS #12')])
+        self.assertEqual(found('mark'), [(2, 'Amazon Marketplace'), (1, 'Star Market')])
+        self.assertEqual(found('star market'), [(1, 'Star Market')])
+        self.assertEqual(found('star', offset=1, limit=1), [(1, 'Star Market')])
+        self.assertEqual(search_transactions('star', TEST_TRANSACTIONS_FILE)['total'], 3)
+        # Ids match the paged /api/transactions ids
+        self.assertEqual(load_transaction_table(TEST_TRANSACTIONS_FILE).to_records([3])[0]['description'], 'Starbucks Reserve')
+
+    def test_search_index_persisted_caught_up_and_rebuilt(self):
+        save_transactions_jsonl([{'date': '2023-01-01', 'description': 'Coffee shop', 'amount': 3.0}], TEST_TRANSACTIONS_FILE)
+        original = search_index.MAX_SEGMENTS
+        search_index.MAX_SEGMENTS = 3
+        try:
+            for n in range(4):
+                save_transactions_jsonl([{'date': '2023-01-02', 'description': f'Coffee beans {n}', 'amount': 9.0}], TEST_TRANSACTIONS_FILE)
+        finally:
+            search_index.MAX_SEGMENTS = original
+        inode, covered, rows, segments = search_index.read_search_index_header(TEST_TRANSACTIONS_FILE)
+        self.assertEqual((covered, rows), (os.path.getsize(TEST_TRANSACTIONS_FILE), 5))
+        self.assertLessEqual(segments, 3)
+        clear_transactions_cache()
+        self.assertEqual(search_transactions('coffee', TEST_TRANSACTIONS_FILE)['total'], 5)
+
+        with open(TEST_TRANSACTIONS_FILE, 'a') as f:
+            f.write(json.dumps({'date': '2023-01-03', 'description': 'Coffee grinder', 'amount': 30.0}) + '\n')
+        self.assertEqual(search_transactions('coffee gr', TEST_TRANSACTIONS_FILE)['total'], 1)
+        self.assertEqual(search_index.read_search_index_header(TEST_TRANSACTIONS_FILE)[2], 6)
+
+        os.remove(search_index.search_index_path(TEST_TRANSACTIONS_FILE))
+        clear_transactions_cache()
+        save_transactions_jsonl([{'date': '2023-01-04', 'description': 'Coffee filter', 'amount': 4.0}], TEST_TRANSACTIONS_FILE)
+        self.assertEqual(search_transactions('coffee', TEST_TRANSACTIONS_FILE)['total'], 7)
+
+    def test_transaction_month(self):
+        self.assertEqual(transaction_month('2023-04-05'), '2023-04')
+        self.assertEqual(transaction_month('04/05/2023'), '2023-04')
+        self.assertEqual(transaction_month('25/05/2023'), '2023-05')
+        self.assertIsNone(transaction_month('not a date'))
+
 if __name__ == '__main__':
     unittest.main()
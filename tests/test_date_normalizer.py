@@ -0,0 +1,49 @@
+# tests/test_date_normalizer.py
+import unittest
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils.date_normalizer import (DateNormalizer, detect_date_format, normalize_transactions, ordinal_month,
+                                             month_ordinal_range)
+
+
+class TestDateNormalizer(unittest.TestCase):
+
+    def test_detects_format_from_samples(self):
+        self.assertEqual(detect_date_format(['2023-01-15', '2023-02-01']), '%Y-%m-%d')
+        self.assertEqual(detect_date_format(['01/15/2023', '02/01/2023']), '%m/%d/%Y')
+        self.assertEqual(detect_date_format(['03/04/2023', '25/04/2023']), '%d/%m/%Y')
+        self.assertEqual(detect_date_format(['15 Jan 2023', ' 2 Feb 2023 ']), '%d %b %Y')
+        self.assertIsNone(detect_date_format(['Opening balance', None, '']))
+
+    def test_ambiguous_rows_follow_the_statement_format(self):
+        normalizer = DateNormalizer.from_samples(['03/04/2023', '25/04/2023'])
+        self.assertEqual(normalizer.normalize('03/04/2023'), ('2023-04-03', date(2023, 4, 3).toordinal()))
+        # Month-first is kept as the default when nothing disambiguates
+        self.assertEqual(DateNormalizer().normalize('03/04/2023')[0], '2023-03-04')
+
+    def test_rows_outside_the_format_and_unparsable_rows(self):
+        normalizer = DateNormalizer('%m/%d/%Y')
+        self.assertEqual(normalizer.normalize('2023-05-06')[0], '2023-05-06')
+        self.assertEqual(normalizer.normalize('pending'), ('pending', None))
+        self.assertEqual(normalizer.normalize(date(2023, 5, 6))[0], '2023-05-06')
+
+    def test_normalize_transactions_in_place(self):
+        transactions = [{'date': '01/31/2023', 'amount': 1.0}, {'date': 'n/a', 'amount': 2.0}]
+        normalize_transactions(transactions)
+        self.assertEqual(transactions[0], {'date': '2023-01-31', 'amount': 1.0, 'date_ordinal': date(2023, 1, 31).toordinal()})
+        self.assertEqual(transactions[1]['date_ordinal'], None)
+        self.assertEqual(ordinal_month(transactions[0]['date_ordinal']), '2023-01')
+
+    def test_month_ordinal_range(self):
+        self.assertEqual(month_ordinal_range('2024-02'), (date(2024, 2, 1).toordinal(), date(2024, 2, 29).toordinal()))
+        self.assertEqual(month_ordinal_range('2023-12'), (date(2023, 12, 1).toordinal(), date(2023, 12, 31).toordinal()))
+        with self.assertRaises(ValueError):
+            month_ordinal_range('2023-13')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# tests/test_excel_parser.py
+import unittest
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils.excel_parser import parse_excel, frame_to_transactions, iter_excel_chunks
+
+# Define a temporary test file path within the tests directory
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'test_data')
+DUMMY_EXCEL_VALID = os.path.join(TEST_DATA_DIR, 'dummy_valid.xlsx')
+DUMMY_EXCEL_MISSING_HEADER = os.path.join(TEST_DATA_DIR, 'dummy_missing_header.xlsx')
+DUMMY_EXCEL_PREAMBLE = os.path.join(TEST_DATA_DIR, 'dummy_preamble.xlsx')
+
+
+class TestExcelParser(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        if not os.path.exists(TEST_DATA_DIR):
+            os.makedirs(TEST_DATA_DIR)
+        pd.DataFrame({
+            'Transaction Date': [pd.Timestamp('2023-01-15'), '2023-01-16', None, 'not a date', '2023-01-19', '2023-01-20'],
+            'Details': ['Uber Ride', 'Groceries from Walmart', 'No date', 'Bad date', 'Bad amount', 'Lunch at a cafe'],
+            'Amount': [25.50, '$1,150.75', 1.0, 2.0, 'ABC', 12],
+        }).to_excel(DUMMY_EXCEL_VALID, index=False)
+        pd.DataFrame({'Date': ['2023-01-15'], 'Details': ['No amount column']}).to_excel(DUMMY_EXCEL_MISSING_HEADER, index=False)
+        # Statement-style sheet: a title block above the header row
+        pd.DataFrame([['Card statement', None, None], [None, None, None], ['Posting Date', 'Memo', 'Amount']] +
+                     [[f'2023-02-{day:02d}', f'Uber trip {day}', day * 1.5] for day in range(1, 8)]
+                     ).to_excel(DUMMY_EXCEL_PREAMBLE, index=False, header=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        for path in (DUMMY_EXCEL_VALID, DUMMY_EXCEL_MISSING_HEADER, DUMMY_EXCEL_PREAMBLE):
+            if os.path.exists(path): os.remove(path)
+        if os.path.exists(TEST_DATA_DIR) and not os.listdir(TEST_DATA_DIR):
+            os.rmdir(TEST_DATA_DIR)
+
+    def test_parse_excel_valid_and_skipped_rows(self):
+        result = parse_excel(DUMMY_EXCEL_VALID)
+        self.assertEqual(result['success_count'], 3)
+        self.assertEqual(result['skipped_count'], 3)
+        self.assertEqual(result['transactions'], [
+            {'date': '2023-01-15', 'description': 'Uber Ride', 'amount': 25.5, 'category': 'Transport', 'date_ordinal': 738535},
+            {'date': '2023-01-16', 'description': 'Groceries from Walmart', 'amount': 1150.75, 'category': 'Food & Dining', 'date_ordinal': 738536},
+            {'date': '2023-01-20', 'description': 'Lunch at a cafe', 'amount': 12.0, 'category': 'Food & Dining', 'date_ordinal': 738540},
+        ])
+        self.assertIs(type(result['transactions'][0]['date_ordinal']), int)
+
+    def test_parse_excel_missing_header(self):
+        result = parse_excel(DUMMY_EXCEL_MISSING_HEADER)
+        self.assertEqual(result['success_count'], 0)
+        self.assertEqual(result['skipped_count'], 1)
+
+    def test_parse_non_existent_excel(self):
+        result = parse_excel("non_existent_file.xlsx")
+        self.assertEqual(result['success_count'], 0)
+        self.assertEqual(result['transactions'], [])
+
+    def test_skipped_rows_are_reported_with_row_numbers(self):
+        df = pd.DataFrame({'date': ['2023-01-01', None, None, '2023-01-04'],
+                           'description': ['A', 'B', 'C', 'D'], 'amount': [1, 2, 3, 'x']})
+        with self.assertLogs(level='WARNING') as logs:
+            transactions, skipped = frame_to_transactions(df, 'frame.xlsx')
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(skipped, 3)
+        self.assertTrue(any('rows 2-3' in line and 'missing Date' in line for line in logs.output))
+        self.assertTrue(any('rows 4' in line and 'invalid amount' in line for line in logs.output))
+
+    def test_day_first_dates_detected_per_file(self):
+        df = pd.DataFrame({'date': ['03/04/2023', '25/04/2023', '30/04/2023'], 'description': ['A', 'B', 'C'], 'amount': [1, 2, 3]})
+        transactions, skipped = frame_to_transactions(df, 'frame.xlsx')
+        self.assertEqual(skipped, 0)
+        self.assertEqual([tx['date'] for tx in transactions], ['2023-04-03', '2023-04-25', '2023-04-30'])
+
+    def test_streaming_matches_batch_parse(self):
+        result = {'success_count': 0, 'skipped_count': 0}
+        chunks = list(iter_excel_chunks(DUMMY_EXCEL_VALID, chunk_size=2, result=result))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 0, 1])
+        self.assertEqual([tx for chunk in chunks for tx in chunk], parse_excel(DUMMY_EXCEL_VALID)['transactions'])
+        self.assertEqual(result, {'success_count': 3, 'skipped_count': 3})
+
+    def test_streaming_finds_header_below_preamble(self):
+        result = {'success_count': 0, 'skipped_count': 0}
+        transactions = [tx for chunk in iter_excel_chunks(DUMMY_EXCEL_PREAMBLE, chunk_size=3, result=result) for tx in chunk]
+        self.assertEqual(result['success_count'], 7)
+        self.assertEqual(transactions[0], {'date': '2023-02-01', 'description': 'Uber trip 1', 'amount': 1.5, 'category': 'Transport',
+                                           'date_ordinal': 738552})
+
+    def test_streaming_without_headers_yields_nothing(self):
+        self.assertEqual(list(iter_excel_chunks(DUMMY_EXCEL_MISSING_HEADER)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
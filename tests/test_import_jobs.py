@@ -0,0 +1,146 @@
+# tests/test_import_jobs.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest import mock
+from spendwise.utils import import_jobs, pdf_parser
+from spendwise.utils.import_jobs import submit_import, get_import_job, wait_for_import
+from spendwise.utils.data_storage import load_transactions_jsonl
+from tests.test_pdf_parser import HEADER, _ruled_table, write_statement_pdf
+
+
+class TestImportJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.transactions_file = os.path.join(self.tmp_dir, 'transactions.jsonl')
+        self.jobs_dir = import_jobs.JOBS_DIR
+        import_jobs.JOBS_DIR = os.path.join(self.tmp_dir, 'jobs')
+
+    def tearDown(self):
+        import_jobs.JOBS_DIR = self.jobs_dir
+        shutil.rmtree(self.tmp_dir)
+
+    def test_csv_import_reports_counts_and_saves(self):
+        csv_path = os.path.join(self.tmp_dir, 'upload.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("Date,Description,Amount\n2023-01-15,Coffee at Starbucks,4.50\n2023-01-16,Uber ride,12.00\n2023-01-17,Bad amount,abc\n")
+        job_id = submit_import(csv_path, 'upload.csv', self.transactions_file)
+        self.assertIsNotNone(get_import_job(job_id))
+
+        job = wait_for_import(job_id, timeout=30)
+        self.assertEqual(job['status'], 'done')
+        self.assertTrue(job['done'])
+        self.assertEqual((job['success_count'], job['skipped_count']), (2, 1))
+        self.assertTrue(job['saved'])
+        self.assertEqual([m['category'] for m in job['messages']], ['success', 'warning'])
+        self.assertEqual(len(load_transactions_jsonl(self.transactions_file, use_cache=False)), 2)
+
+    def test_reimport_is_skipped_or_deduplicated(self):
+        csv_path = os.path.join(self.tmp_dir, 'jan.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("Date,Description,Amount\n2023-01-15,Coffee at Starbucks,4.50\n2023-01-16,Uber ride,12.00\n")
+        wait_for_import(submit_import(csv_path, 'jan.csv', self.transactions_file), timeout=30)
+
+        # The same file again is recognised by its contents before parsing
+        job = wait_for_import(submit_import(csv_path, 'jan-copy.csv', self.transactions_file), timeout=30)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['success_count'], 0)
+        self.assertIn('already imported', job['messages'][0]['message'])
+
+        # An overlapping statement only adds its new rows
+        overlap_path = os.path.join(self.tmp_dir, 'jan-feb.csv')
+        with open(overlap_path, 'w', encoding='utf-8') as f:
+            f.write("Date,Description,Amount\n2023-01-16,Uber ride,12.00\n2023-02-01,Netflix,15.99\n")
+        job = wait_for_import(submit_import(overlap_path, 'jan-feb.csv', self.transactions_file), timeout=30)
+        self.assertTrue(job['saved'])
+        self.assertEqual((job['success_count'], job['duplicate_count']), (2, 1))
+        self.assertEqual([m['category'] for m in job['messages']], ['success', 'info'])
+        self.assertEqual(len(load_transactions_jsonl(self.transactions_file, use_cache=False)), 3)
+
+    def test_excel_import_runs_in_process_pool(self):
+        xlsx_path = os.path.join(self.tmp_dir, 'upload.xlsx')
+        pd.DataFrame({'Date': ['2023-02-01'], 'Description': ['Netflix'], 'Amount': [15.99]}).to_excel(xlsx_path, index=False)
+        job = wait_for_import(submit_import(xlsx_path, 'upload.xlsx', self.transactions_file), timeout=60)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['success_count'], 1)
+        self.assertEqual(load_transactions_jsonl(self.transactions_file, use_cache=False)[0]['description'], 'Netflix')
+
+    def test_long_pdf_is_split_across_the_process_pool(self):
+        pdf_path = os.path.join(self.tmp_dir, 'statement.pdf')
+        write_statement_pdf(pdf_path, [_ruled_table(40, 100, [80, 200, 70], ([HEADER] if n == 0 else []) +
+                                                    [[f'0{day}/0{n + 1}/2023', f'Purchase {n}-{day}', '1.00'] for day in (1, 2)])
+                                       for n in range(4)])
+        with mock.patch.object(pdf_parser, 'PDF_PARALLEL_MIN_PAGES', 2), \
+                mock.patch.object(import_jobs, 'parse_pdf', wraps=import_jobs.parse_pdf) as parse:
+            job = wait_for_import(submit_import(pdf_path, 'statement.pdf', self.transactions_file), timeout=60)
+        self.assertIs(parse.call_args.kwargs['executor'], import_jobs._process_executor())
+        self.assertEqual((job['status'], job['success_count']), ('done', 8))
+        self.assertEqual(load_transactions_jsonl(self.transactions_file, use_cache=False)[-1]['description'], 'Purchase 3-2')
+
+    def test_streaming_imports_parse_concurrently(self):
+        paths = {}
+        for name, day in (('slow.csv', 15), ('fast.csv', 16)):
+            paths[name] = os.path.join(self.tmp_dir, name)
+            with open(paths[name], 'w', encoding='utf-8') as f:
+                f.write(f"Date,Description,Amount\n2023-01-{day},{name},1.00\n")
+        release = threading.Event()
+        iter_csv = import_jobs.iter_csv_transactions
+
+        def stalling_iter_csv(file_path, result=None):
+            if file_path == paths['slow.csv']:
+                release.wait(30) # Still parsing: nothing has been handed to storage yet
+            yield from iter_csv(file_path, result)
+
+        with mock.patch.object(import_jobs, 'iter_csv_transactions', stalling_iter_csv):
+            slow_id = submit_import(paths['slow.csv'], 'slow.csv', self.transactions_file)
+            try:
+                fast = wait_for_import(submit_import(paths['fast.csv'], 'fast.csv', self.transactions_file), timeout=10)
+                self.assertEqual(fast['status'], 'done')
+                self.assertFalse(get_import_job(slow_id)['done'])
+            finally:
+                release.set()
+            slow = wait_for_import(slow_id, timeout=30)
+        self.assertEqual(slow['status'], 'done')
+        self.assertEqual([tx['description'] for tx in load_transactions_jsonl(self.transactions_file, use_cache=False)],
+                         ['fast.csv', 'slow.csv'])
+
+    def test_unreadable_pdf_reports_no_data(self):
+        job = wait_for_import(submit_import(os.path.join(self.tmp_dir, 'gone.pdf'), 'gone.pdf', self.transactions_file), timeout=60)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual([m['category'] for m in job['messages']], ['info'])
+        self.assertFalse(os.path.exists(self.transactions_file))
+
+    def test_unsupported_type_marks_job_failed(self):
+        job = wait_for_import(submit_import(os.path.join(self.tmp_dir, 'notes.txt'), 'notes.txt', self.transactions_file), timeout=30)
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('Unsupported file type', job['error'])
+
+    def test_job_state_is_visible_to_other_workers(self):
+        csv_path = os.path.join(self.tmp_dir, 'upload.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("Date,Description,Amount\n2023-01-15,Coffee at Starbucks,4.50\n")
+        job_id = submit_import(csv_path, 'upload.csv', self.transactions_file)
+        finished = wait_for_import(job_id, timeout=30)
+        # Another worker process only has the state file
+        with import_jobs._JOBS_LOCK:
+            del import_jobs._JOBS[job_id]
+        self.assertEqual(get_import_job(job_id), finished)
+        self.assertEqual(finished['success_count'], 1)
+
+    def test_unknown_job(self):
+        self.assertIsNone(get_import_job('no-such-job'))
+        self.assertIsNone(get_import_job('../../etc/passwd'))
+        self.assertIsNone(get_import_job('0' * 32))
+        self.assertIsNone(wait_for_import('no-such-job'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# tests/test_jsonl_writer.py
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils import jsonl_writer
+from spendwise.utils.jsonl_writer import (TransactionLogWriter, encode_transactions, batch_header, is_header_line,
+                                          repair_torn_tail)
+from spendwise.utils.data_storage import load_transactions_jsonl, save_transactions_jsonl, clear_transactions_cache
+
+
+def _append_rows(args):
+    path, worker = args
+    for batch in range(20):
+        rows = [{'date': '2023-01-01', 'description': f'w{worker} b{batch} r{row} ' + 'x' * 200, 'amount': 1.0}
+                for row in range(50)]
+        with TransactionLogWriter(path) as log, log.locked():
+            log.append(rows)
+    return True
+
+
+class TestJsonlWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'transactions.jsonl')
+        clear_transactions_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _data_lines(self):
+        with open(self.path, 'rb') as f:
+            return [line for line in f if not is_header_line(line)]
+
+    def test_append_writes_header_and_rows(self):
+        rows = [{'date': '2023-01-01', 'description': 'Café', 'amount': 3.5}, {'date': '2023-01-02', 'description': 'Bus', 'amount': 2.0}]
+        with TransactionLogWriter(self.path) as log, log.locked():
+            log.append(rows)
+        with open(self.path, 'rb') as f:
+            header = f.readline()
+        self.assertTrue(header.startswith(b'#batch 2 '))
+        self.assertEqual(load_transactions_jsonl(self.path), rows)
+
+    def test_append_requires_lock(self):
+        with TransactionLogWriter(self.path) as log:
+            with self.assertRaises(RuntimeError):
+                log.append([{'date': '2023-01-01', 'description': 'x', 'amount': 1.0}])
+
+    def test_large_saves_are_split_into_batches(self):
+        rows = [{'date': '2023-01-01', 'description': f'row {i}', 'amount': 1.0} for i in range(100)]
+        original = jsonl_writer.MAX_BATCH_BYTES
+        jsonl_writer.MAX_BATCH_BYTES = 500
+        try:
+            with TransactionLogWriter(self.path) as log, log.locked():
+                offsets = log.append(rows)
+        finally:
+            jsonl_writer.MAX_BATCH_BYTES = original
+        with open(self.path, 'rb') as f:
+            headers = [line for line in f if is_header_line(line)]
+            # Each returned offset is the start of that row's line, past any batch headers
+            for offset, row in zip(offsets, rows):
+                f.seek(offset)
+                self.assertEqual(json.loads(f.readline())['description'], row['description'])
+        self.assertGreater(len(headers), 1)
+        self.assertEqual(sum(int(h.split()[1]) for h in headers), 100)
+        self.assertEqual(len(load_transactions_jsonl(self.path)), 100)
+
+    def test_torn_batch_is_truncated_on_load(self):
+        kept = [{'date': '2023-01-01', 'description': 'Kept', 'amount': 1.0}]
+        save_transactions_jsonl(kept, self.path)
+        size = os.path.getsize(self.path)
+        body = encode_transactions([{'date': '2023-01-02', 'description': 'Lost', 'amount': 2.0},
+                                    {'date': '2023-01-03', 'description': 'Lost too', 'amount': 3.0}])
+        with open(self.path, 'ab') as f: # A writer that died after the first row
+            f.write(batch_header(2, body) + body[:body.index(b'\n') + 1])
+        self.assertEqual(load_transactions_jsonl(self.path), kept)
+        self.assertEqual(os.path.getsize(self.path), size)
+        # The next save appends after the repaired tail
+        save_transactions_jsonl([{'date': '2023-01-04', 'description': 'Next', 'amount': 4.0}], self.path)
+        self.assertEqual([tx['description'] for tx in load_transactions_jsonl(self.path)], ['Kept', 'Next'])
+
+    def test_rows_appended_without_header_are_left_alone(self):
+        save_transactions_jsonl([{'date': '2023-01-01', 'description': 'Batch', 'amount': 1.0}], self.path)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'date': '2023-01-02', 'description': 'Hand-written', 'amount': 2.0}) + '\n')
+        self.assertFalse(repair_torn_tail(self.path))
+        self.assertEqual(len(load_transactions_jsonl(self.path)), 2)
+
+    def test_concurrent_processes_never_interleave(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            self.assertTrue(all(executor.map(_append_rows, [(self.path, worker) for worker in range(4)])))
+        lines = self._data_lines()
+        self.assertEqual(len(lines), 4 * 20 * 50)
+        for line in lines:
+            json.loads(line)
+        self.assertFalse(repair_torn_tail(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+# tests/test_main.py
+import unittest
+import os
+import sys
+import base64
+import json
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from spendwise.utils import import_jobs
+from spendwise.utils.data_storage import save_transactions_jsonl, clear_transactions_cache
+from spendwise.utils.import_jobs import submit_import, wait_for_import
+
+def _tx(day, description, amount, category='Shopping'):
+    return {'date': day.isoformat(), 'date_ordinal': day.toordinal(), 'description': description, 'amount': amount,
+            'category': category}
+
+ROWS = [
+    _tx(date(2023, 1, 15), 'STARBUCKS #12', 5.0, 'Food & Dining'),
+    _tx(date(2023, 2, 1), 'Star Market', 40.0, 'Groceries'),
+    _tx(date(2023, 1, 20), 'Refund', -10.0),
+    _tx(date(2023, 2, 10), 'Amazon Marketplace', 12.5),
+    {'date': 'pending', 'date_ordinal': None, 'description': 'Card hold', 'amount': 3.0, 'category': 'Shopping'},
+]
+
+def _cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+class ApiTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.transactions_file = os.path.join(self.tmp_dir, 'transactions.jsonl')
+        save_transactions_jsonl(ROWS, self.transactions_file)
+        self.config = dict(main.app.config)
+        main.app.config.update(STORAGE_BACKEND='jsonl', STORAGE_PATH=self.transactions_file)
+        self.client = main.app.test_client()
+
+    def tearDown(self):
+        main.app.config.update(self.config)
+        clear_transactions_cache()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class TestTransactionsApi(ApiTestCase):
+
+    def test_pages_follow_the_cursor_to_the_last_page(self):
+        descriptions, url = [], '/api/transactions?sort=amount&order=desc&limit=2'
+        for expected_cursor in (True, True, False):
+            body = self.client.get(url).get_json()
+            self.assertEqual((body['total'], body['limit']), (5, 2))
+            self.assertEqual(body['next_cursor'] is not None, expected_cursor)
+            descriptions.extend(tx['description'] for tx in body['transactions'])
+            url = f"/api/transactions?sort=amount&order=desc&limit=2&cursor={body['next_cursor']}"
+        self.assertEqual(descriptions, ['Star Market', 'Amazon Marketplace', 'STARBUCKS #12', 'Card hold', 'Refund'])
+
+    def test_full_last_page_has_no_cursor(self):
+        body = self.client.get('/api/transactions?category=Shopping&limit=3').get_json()
+        self.assertEqual((len(body['transactions']), body['total'], body['next_cursor']), (3, 3, None))
+        body = self.client.get('/api/transactions?offset=3&limit=2').get_json()
+        self.assertEqual((len(body['transactions']), body['next_cursor']), (2, None))
+
+    def test_filters_by_date_and_query(self):
+        body = self.client.get('/api/transactions?date_from=2023-02-01&date_to=2023-02-28&q=mark&sort=description').get_json()
+        self.assertEqual([tx['description'] for tx in body['transactions']], ['Amazon Marketplace', 'Star Market'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for query in (f"cursor={_cursor([1])}", f"cursor={_cursor({'sort': 'date', 'order': 'desc'})}",
+                      f"cursor={_cursor({'sort': 'date', 'order': 'desc', 'row': 'x'})}", 'cursor=%%%',
+                      f"sort=amount&cursor={_cursor({'sort': 'date', 'order': 'desc', 'row': 1})}",
+                      'order=up', 'limit=ten', 'date_from=01/02/2023', 'sort=colour'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/transactions?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Invalid query', response.get_json()['error'])
+
+    def test_without_parameters_returns_every_transaction(self):
+        self.assertEqual(len(self.client.get('/api/transactions').get_json()), 5)
+
+
+class TestSearchAndMonthApi(ApiTestCase):
+
+    def test_search(self):
+        body = self.client.get('/api/transactions/search?q=star&limit=1').get_json()
+        self.assertEqual((body['total'], body['limit']), (2, 1))
+        self.assertEqual([tx['description'] for tx in body['transactions']], ['Star Market'])
+        self.assertEqual(self.client.get('/api/transactions/search?q=+').status_code, 400)
+        self.assertEqual(self.client.get('/api/transactions/search?q=star&offset=x').status_code, 400)
+
+    def test_month_drilldown(self):
+        body = self.client.get('/api/transactions/month/2023-01').get_json()
+        self.assertEqual(body['month'], '2023-01')
+        self.assertEqual([tx['description'] for tx in body['transactions']], ['STARBUCKS #12', 'Refund'])
+        self.assertEqual(body['total_spent'], 5.0)
+        self.assertEqual(self.client.get('/api/transactions/month/2023-1x').status_code, 400)
+
+
+class TestStreamApi(ApiTestCase):
+
+    def test_ndjson_export(self):
+        response = self.client.get('/api/transactions/stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual(response.headers['Content-Disposition'], 'attachment; filename=transactions.ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([(tx['date'], tx['description'], tx['amount']) for tx in rows],
+                         [(tx['date'], tx['description'], tx['amount']) for tx in ROWS])
+
+    def test_csv_export(self):
+        response = self.client.get('/api/transactions/stream?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertEqual(response.headers['Content-Disposition'], 'attachment; filename=transactions.csv')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'date,description,amount,category')
+        self.assertEqual(lines[1:3], ['2023-01-15,STARBUCKS #12,5.0,Food & Dining', '2023-02-01,Star Market,40.0,Groceries'])
+        self.assertEqual(len(lines), 6)
+
+    def test_date_range_streams_only_that_range_in_date_order(self):
+        response = self.client.get('/api/transactions/stream?format=csv&date_from=2023-01-16&date_to=2023-02-05')
+        self.assertEqual(response.get_data(as_text=True).splitlines()[1:],
+                         ['2023-01-20,Refund,-10.0,Shopping', '2023-02-01,Star Market,40.0,Groceries'])
+
+    def test_export_is_sent_in_chunks(self):
+        with mock.patch.object(main, 'EXPORT_CHUNK_BYTES', 64):
+            chunks = list(main.iter_export_chunks(ROWS, 'ndjson'))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([json.loads(line)['description'] for line in ''.join(chunks).splitlines()],
+                         [tx['description'] for tx in ROWS])
+
+    def test_invalid_parameters_are_rejected(self):
+        for query in ('format=xml', 'date_from=2023-13-01', 'date_to=yesterday'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/transactions/stream?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.get_json())
+
+
+class TestImportStatusApi(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.jobs_dir = import_jobs.JOBS_DIR
+        import_jobs.JOBS_DIR = os.path.join(self.tmp_dir, 'jobs')
+
+    def tearDown(self):
+        import_jobs.JOBS_DIR = self.jobs_dir
+        super().tearDown()
+
+    def test_reports_job_state(self):
+        csv_path = os.path.join(self.tmp_dir, 'upload.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("Date,Description,Amount\n2023-03-01,Netflix,15.99\n")
+        job_id = submit_import(csv_path, 'upload.csv', self.transactions_file)
+        wait_for_import(job_id, timeout=30)
+        body = self.client.get(f'/api/imports/{job_id}').get_json()
+        self.assertEqual((body['status'], body['success_count']), ('done', 1))
+        self.assertNotIn('future', body)
+
+    def test_unknown_job_is_404(self):
+        self.assertEqual(self.client.get('/api/imports/' + '0' * 32).status_code, 404)
+        self.assertEqual(self.client.get('/api/imports/..%2Fsecrets').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# tests/test_parquet_dataset.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils import data_storage
+from spendwise.utils.storage_backends import JSONLBackend, ParquetBackend
+
+try:
+    from spendwise.utils import parquet_dataset
+except ImportError:
+    parquet_dataset = None
+
+def _tx(day, description, amount, category='Shopping'):
+    return {'date': day.isoformat(), 'date_ordinal': day.toordinal(), 'description': description, 'amount': amount,
+            'category': category}
+
+ROWS = [
+    _tx(date(2023, 1, 15), 'Coffee', 5.0, 'Food & Dining'),
+    _tx(date(2023, 2, 1), 'Groceries', 40.0, 'Groceries'),
+    _tx(date(2023, 1, 20), 'Refund', -10.0),
+    _tx(date(2023, 2, 10), 'Shoes', 12.5),
+    {'date': 'pending', 'date_ordinal': None, 'description': 'Card hold', 'amount': 3.0, 'category': 'Shopping'},
+]
+
+
+@unittest.skipIf(parquet_dataset is None, 'pyarrow is not installed')
+class TestParquetDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp_dir, 'transactions.jsonl')
+        data_storage.save_transactions_jsonl(ROWS, self.log)
+
+    def tearDown(self):
+        data_storage.clear_transactions_cache()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _part_files(self):
+        root = parquet_dataset.dataset_path(self.log)
+        return sorted(os.path.relpath(os.path.join(folder, name), root)
+                      for folder, _, names in os.walk(root) for name in names if name.endswith('.parquet'))
+
+    def test_sync_mirrors_log_by_month(self):
+        manifest = data_storage.sync_parquet_dataset(self.log)
+        self.assertEqual((manifest['rows'], manifest['covered']), (5, os.path.getsize(self.log)))
+        self.assertEqual(sorted(manifest['months']), ['2023-01', '2023-02', 'undated'])
+        table = data_storage.query_transactions_parquet(['id', 'date', 'amount', 'month'], file_path=self.log)
+        self.assertEqual(table.to_pylist()[:2], [{'id': 0, 'date': '2023-01-15', 'amount': 5.0, 'month': '2023-01'},
+                                                 {'id': 2, 'date': '2023-01-20', 'amount': -10.0, 'month': '2023-01'}])
+        self.assertEqual(table.num_rows, 5)
+
+    def test_saves_keep_an_existing_dataset_in_step(self):
+        data_storage.save_transactions_jsonl([_tx(date(2023, 3, 1), 'Early', 1.0)], self.log)
+        self.assertFalse(os.path.exists(parquet_dataset.dataset_path(self.log))) # Only created on first use
+        data_storage.sync_parquet_dataset(self.log)
+        data_storage.save_transactions_jsonl([_tx(date(2023, 2, 20), 'Late', 2.0)], self.log)
+        manifest = parquet_dataset.read_manifest(self.log, os.stat(self.log).st_ino)
+        self.assertEqual((manifest['rows'], manifest['covered']), (7, os.path.getsize(self.log)))
+        self.assertIn('month=2023-02/part-000000000006-000000000007.parquet', self._part_files())
+
+    def test_filters_are_pushed_down_and_months_pruned(self):
+        data_storage.sync_parquet_dataset(self.log)
+        with mock.patch.object(parquet_dataset.ds, 'dataset', wraps=parquet_dataset.ds.dataset) as opened:
+            table = data_storage.query_transactions_parquet(['description'], date(2023, 2, 5), date(2023, 2, 28),
+                                                            'Shopping', file_path=self.log)
+        self.assertEqual(table.column_names, ['description'])
+        self.assertEqual(table.to_pylist(), [{'description': 'Shoes'}])
+        self.assertEqual([os.path.basename(os.path.dirname(path)) for path in opened.call_args[0][0]], ['month=2023-02'])
+        empty = data_storage.query_transactions_parquet(['amount'], date(2024, 1, 1), file_path=self.log)
+        self.assertEqual(empty.num_rows, 0)
+
+    def test_spending_totals_match_the_jsonl_table(self):
+        jsonl, parquet = JSONLBackend(self.log), ParquetBackend(self.log)
+        for filters in ({'date_from': date(2023, 1, 16)}, {'date_to': '2023-01-31'}, {'category': 'Shopping'},
+                        {'category': 'Nope'}, {}):
+            self.assertAlmostEqual(parquet.total_spent(**filters), jsonl.total_spent(**filters))
+            self.assertEqual(parquet.monthly_totals(**filters), jsonl.monthly_totals(**filters))
+            self.assertEqual(parquet.category_totals(**filters), jsonl.category_totals(**filters))
+        self.assertTrue(os.path.isdir(parquet_dataset.dataset_path(self.log)))
+
+    def test_parts_are_merged(self):
+        data_storage.sync_parquet_dataset(self.log)
+        for n in range(parquet_dataset.MAX_PARTITION_FILES - 1):
+            data_storage.save_transactions_jsonl([_tx(date(2023, 1, 1), f'Extra {n}', 1.0)], self.log)
+        manifest = parquet_dataset.read_manifest(self.log, os.stat(self.log).st_ino)
+        self.assertEqual(manifest['months']['2023-01'], [[0, 5 + parquet_dataset.MAX_PARTITION_FILES - 1]])
+        self.assertEqual(len([path for path in self._part_files() if path.startswith('month=2023-01')]), 1)
+        totals = data_storage.load_spending_totals(file_path=self.log)
+        self.assertEqual(totals['monthly']['2023-01'], 5.0 + parquet_dataset.MAX_PARTITION_FILES - 1)
+
+    def test_rewritten_log_rebuilds_dataset(self):
+        data_storage.sync_parquet_dataset(self.log)
+        os.remove(self.log)
+        data_storage.clear_transactions_cache()
+        data_storage.save_transactions_jsonl(ROWS[:1], self.log)
+        manifest = data_storage.sync_parquet_dataset(self.log)
+        self.assertEqual((manifest['rows'], list(manifest['months'])), (1, ['2023-01']))
+        self.assertEqual(self._part_files(), ['month=2023-01/part-000000000000-000000000001.parquet'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+# tests/test_pdf_parser.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils import pdf_parser
+from spendwise.utils.pdf_parser import PdfLayoutCache, _parse_page, _merge_range, parse_pdf
+
+
+class FakeTable:
+    def __init__(self, rows, bbox=(50, 100, 400, 700)):
+        self.rows = rows
+        self.bbox = bbox
+
+    def extract(self):
+        return self.rows
+
+
+class FakePage:
+    """Stands in for a pdfplumber page with pre-extracted tables and text."""
+
+    def __init__(self, tables, text='', bbox=(0, 0, 600, 800)):
+        self.tables = tables
+        self.text = text
+        self.bbox = bbox
+        self.crops = []
+        self.table_settings = []
+
+    def find_tables(self, table_settings=None):
+        self.table_settings.append(table_settings)
+        return [FakeTable(rows) for rows in self.tables]
+
+    def extract_text(self):
+        return self.text
+
+    def crop(self, bbox):
+        self.crops.append(bbox)
+        return self
+
+
+HEADER = ['Date', 'Details', 'Amount']
+FIRST_PAGE = [[HEADER, ['01/11/2023', 'Coffee at Starbucks', '4.50'], ['02/11/2023', 'Uber ride home', '12.00']]]
+CONTINUATION_PAGE = [[['03/11/2023', 'Groceries Walmart', '55.10'], ['04/11/2023', 'Netflix monthly', '15.99']]]
+
+
+def _pdf_text(value):
+    return value.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def _ruled_table(x0, top, widths, rows, row_height=20):
+    """PDF content drawing `rows` as a ruled table whose top-left corner is at (x0, top) in page points from the top."""
+    height = 800
+    x_edges = [x0]
+    for width in widths:
+        x_edges.append(x_edges[-1] + width)
+    y_edges = [height - top - i * row_height for i in range(len(rows) + 1)]
+    ops = ['0.5 w']
+    ops += [f'{x_edges[0]} {y} m {x_edges[-1]} {y} l S' for y in y_edges]
+    ops += [f'{x} {y_edges[0]} m {x} {y_edges[-1]} l S' for x in x_edges]
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            ops.append(f'BT /F1 9 Tf {x_edges[c] + 3} {y_edges[r] - 14} Td ({_pdf_text(cell)}) Tj ET')
+    return '\n'.join(ops)
+
+def write_statement_pdf(path, pages):
+    """Writes a minimal PDF (600x800 points, Helvetica) with one content stream per page."""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for content in pages:
+        stream = content.encode('latin-1')
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{content}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 600 800] /Resources << /Font << /F1 3 0 R >> >> '
+                       f'/Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def empty_result():
+    return {'transactions': [], 'success_count': 0, 'skipped_count': 0}
+
+
+class TestPdfLayoutCache(unittest.TestCase):
+
+    def test_repeated_header_reuses_layout(self):
+        layouts = PdfLayoutCache()
+        first = layouts.resolve(FIRST_PAGE[0])
+        self.assertEqual(first, ({'date': 0, 'description': 1, 'amount': 2}, 1))
+        self.assertIs(layouts.resolve([HEADER, ['05/11/2023', 'Shell gas', '40.00']]), first)
+
+    def test_continuation_page_inherits_column_map(self):
+        result = empty_result()
+        layouts = PdfLayoutCache()
+        _parse_page(FakePage(FIRST_PAGE), 0, result, layouts)
+        _parse_page(FakePage(CONTINUATION_PAGE), 1, result, layouts)
+        self.assertEqual(result['success_count'], 4)
+        self.assertEqual(result['skipped_count'], 0)
+        self.assertEqual([tx['date'] for tx in result['transactions']],
+                         ['01/11/2023', '02/11/2023', '03/11/2023', '04/11/2023'])
+
+    def test_unknown_layout_without_deferral_is_skipped(self):
+        result = empty_result()
+        _parse_page(FakePage(CONTINUATION_PAGE), 0, result, PdfLayoutCache())
+        self.assertEqual(result['success_count'], 0)
+        self.assertEqual(result['skipped_count'], 2)
+
+    def test_deferred_tables_resolve_in_page_order(self):
+        # Two ranges as parallel workers would return them; the second starts on a continuation page.
+        first = dict(empty_result(), deferred=[])
+        first_layouts = PdfLayoutCache()
+        _parse_page(FakePage(FIRST_PAGE), 0, first, first_layouts, first['deferred'])
+        first['layouts'] = first_layouts.by_width
+
+        second = dict(empty_result(), deferred=[])
+        second_layouts = PdfLayoutCache()
+        _parse_page(FakePage(CONTINUATION_PAGE), 1, second, second_layouts, second['deferred'])
+        _parse_page(FakePage(FIRST_PAGE), 2, second, second_layouts, second['deferred'])
+        second['layouts'] = second_layouts.by_width
+        self.assertEqual(len(second['deferred']), 1)
+
+        result = empty_result()
+        layouts = PdfLayoutCache()
+        _merge_range(result, first, layouts)
+        _merge_range(result, second, layouts)
+        self.assertEqual(result['success_count'], 6)
+        self.assertEqual(result['skipped_count'], 0)
+        self.assertEqual([tx['date'] for tx in result['transactions']],
+                         ['01/11/2023', '02/11/2023', '03/11/2023', '04/11/2023', '01/11/2023', '02/11/2023'])
+
+
+class TestParallelPdfParsing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmp_dir, 'statement.pdf')
+        widths = [80, 200, 70]
+        pages = []
+        for page_num in range(7):
+            rows = [[f'{day:02d}/0{page_num + 1}/2023', f'Purchase {page_num}-{day}', f'{page_num * 10 + day}.25']
+                    for day in range(1, 4)]
+            if page_num == 4:
+                rows.append(['05/05/2023', 'Broken amount', 'n/a'])
+            content = _ruled_table(40, 100, widths, [HEADER] + rows if page_num == 0 else rows)
+            if page_num in (2, 4):
+                # A side table outside the band of the first page's transaction table, which the learned crop drops.
+                content += '\n' + _ruled_table(430, 100, [55, 60, 40], [HEADER, ['09/09/2023', 'Side note', '99.99']])
+            pages.append(content)
+        write_statement_pdf(self.pdf_path, pages)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_parallel_matches_serial(self):
+        serial = parse_pdf(self.pdf_path, workers=1)
+        self.assertEqual((serial['success_count'], serial['skipped_count']), (21, 1))
+        self.assertNotIn('Side note', [tx['description'] for tx in serial['transactions']])
+        with mock.patch.object(pdf_parser, 'PDF_PARALLEL_MIN_PAGES', 2):
+            parallel = parse_pdf(self.pdf_path, workers=2)
+            # The second range starts on page 4 (continuation table, side table present).
+            spread = parse_pdf(self.pdf_path, workers=3)
+        for result in (parallel, spread):
+            self.assertEqual(result['transactions'], serial['transactions'])
+            self.assertEqual((result['success_count'], result['skipped_count']),
+                             (serial['success_count'], serial['skipped_count']))
+
+    def test_shared_executor_parses_every_range(self):
+        from concurrent.futures import ProcessPoolExecutor
+        serial = parse_pdf(self.pdf_path)
+        with ProcessPoolExecutor(max_workers=2) as executor, \
+                mock.patch.object(pdf_parser, 'PDF_PARALLEL_MIN_PAGES', 2):
+            self.assertEqual(parse_pdf(self.pdf_path, workers=2, executor=executor), serial)
+            with mock.patch.object(pdf_parser, 'PDF_PARALLEL_MIN_PAGES', 100): # Short document: one range
+                self.assertEqual(parse_pdf(self.pdf_path, workers=2, executor=executor), serial)
+
+
+class TestPdfTableProfiles(unittest.TestCase):
+
+    def test_crop_learned_from_first_page(self):
+        layouts = PdfLayoutCache()
+        first, second = FakePage(FIRST_PAGE), FakePage(CONTINUATION_PAGE)
+        _parse_page(first, 0, empty_result(), layouts)
+        _parse_page(second, 1, empty_result(), layouts)
+        self.assertEqual(first.crops, [])
+        self.assertEqual(second.crops, [(44.0, 0.0, 406.0, 800.0)])
+        self.assertEqual(second.table_settings, [{'vertical_strategy': 'lines', 'horizontal_strategy': 'lines'}])
+
+    def test_text_lines_fallback_when_no_tables(self):
+        text = ("Statement period 01/11/2023 to 30/11/2023\n"
+                "01/11/2023 Coffee at Starbucks #12 4.50 1,200.00\n"
+                "Opening balance 1,204.50\n"
+                "02 Nov 2023 Uber ride home 12.00\n"
+                "03/11/2023 Card fee waived")
+        result = empty_result()
+        _parse_page(FakePage([], text), 0, result, PdfLayoutCache())
+        self.assertEqual(result['success_count'], 2)
+        self.assertEqual(result['skipped_count'], 1)
+        self.assertEqual(result['transactions'][0]['description'], 'Coffee at Starbucks #12')
+        self.assertEqual(result['transactions'][0]['amount'], 4.50)
+        self.assertEqual(result['transactions'][1]['date'], '02 Nov 2023')
+
+    def test_text_profile_skips_table_detection(self):
+        page = FakePage(FIRST_PAGE, "05/11/2023 Shell gas 40.00")
+        result = empty_result()
+        _parse_page(page, 0, result, PdfLayoutCache('text'))
+        self.assertEqual(page.table_settings, [])
+        self.assertEqual(result['success_count'], 1)
+
+    def test_text_lines_parenthesized_amounts_are_negative(self):
+        text = ("Date Description Amount\n"
+                "04/11/2023 Refund from Amazon (500.00)\n"
+                "05/11/2023 Shell gas 40.00 (1,460.00)")
+        result = empty_result()
+        _parse_page(FakePage([], text), 0, result, PdfLayoutCache())
+        self.assertEqual([tx['amount'] for tx in result['transactions']], [-500.00, 40.00])
+
+    def test_text_fallback_ignores_summary_pages(self):
+        cover = "Account summary\n01/31/2023 Closing balance 1,234.56\nThank you for banking with us"
+        result = empty_result()
+        _parse_page(FakePage([], cover), 0, result, PdfLayoutCache())
+        self.assertEqual((result['success_count'], result['skipped_count']), (0, 0))
+        _parse_page(FakePage([], cover), 0, result, PdfLayoutCache('text')) # The profile says the page is a listing
+        self.assertEqual(result['transactions'][0]['amount'], 1234.56)
+
+    def test_unknown_profile_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_pdf('non_existent.pdf', profile='bogus')
+
+
+if __name__ == '__main__':
+    unittest.main()
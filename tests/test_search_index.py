@@ -0,0 +1,41 @@
+# tests/test_search_index.py
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils.search_index import SearchIndex, tokenize, encode_varints, decode_varints
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('POS STARBUCKS #1234, Seattle'), ['pos', 'starbucks', '1234', 'seattle'])
+        self.assertEqual(tokenize('Café Straße'), ['café', 'strasse'])
+        self.assertEqual(tokenize(None), [])
+
+    def test_varint_round_trip(self):
+        values = [0, 1, 127, 128, 300, 16384, 2 ** 40]
+        encoded = encode_varints(values)
+        self.assertEqual(len(encoded), 1 + 1 + 1 + 1 + 2 + 2 + 6) # Gaps: 0, 1, 126, 1, 172, 16084, ~2**40
+        self.assertEqual(decode_varints(encoded).tolist(), values)
+        self.assertEqual(decode_varints(encode_varints([5, 9], previous=3), previous=3).tolist(), [5, 9])
+        self.assertEqual(decode_varints(b'').tolist(), [])
+
+    def test_prefix_and_multi_term_lookup(self):
+        index = SearchIndex()
+        index.add([{'description': 'STARBUCKS #12'}, {'description': 'Star Market'}, {'description': 'Amazon Marketplace'},
+                   {'description': None}], [0, 10, 20, 30])
+        index.add([{'description': 'Starbucks Reserve'}], [40])
+        self.assertEqual(index.lookup('starbucks').tolist(), [0, 4])
+        self.assertEqual(index.lookup('star').tolist(), [0, 1, 4])
+        self.assertEqual(index.lookup('mark').tolist(), [1, 2])
+        self.assertEqual(index.lookup('STAR mark').tolist(), [1])
+        self.assertEqual(index.lookup('star nowhere').tolist(), [])
+        self.assertEqual(index.lookup('  #  ').tolist(), [])
+        self.assertEqual(index.row_offsets[4], 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
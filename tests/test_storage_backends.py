@@ -0,0 +1,161 @@
+# tests/test_storage_backends.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils.data_storage import save_transactions_jsonl, record_file_import
+from spendwise.utils.storage_backends import (JSONLBackend, ParquetBackend, SQLiteBackend, as_storage_backend,
+                                              get_storage_backend, migrate_jsonl_to_sqlite)
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+def _tx(day, description, amount, category='Shopping'):
+    return {'date': day.isoformat(), 'date_ordinal': day.toordinal(), 'description': description, 'amount': amount,
+            'category': category}
+
+ROWS = [
+    _tx(date(2023, 1, 15), 'STARBUCKS #12', 5.0, 'Food & Dining'),
+    _tx(date(2023, 2, 1), 'Star Market', 40.0, 'Groceries'),
+    _tx(date(2023, 1, 20), 'Refund', -10.0),
+    _tx(date(2023, 2, 10), 'Amazon Marketplace', 12.5),
+    {'date': 'pending', 'date_ordinal': None, 'description': 'Card hold', 'amount': 3.0, 'category': 'Shopping'},
+]
+
+
+class BackendContract:
+    """Behaviour every storage backend shares; mixed into one TestCase per backend."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backend = self.make_backend(self.tmp_dir)
+
+    def tearDown(self):
+        if isinstance(self.backend, SQLiteBackend):
+            self.backend.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_saves_and_drops_duplicates(self):
+        result = {}
+        self.assertTrue(self.backend.save_transactions(ROWS, result=result))
+        self.assertEqual(self.backend.save_transaction_stream(ROWS[:2] + [_tx(date(2023, 3, 1), 'New', 1.0)], batch_size=2,
+                                                              result=result), 1)
+        self.assertEqual(result['duplicate_count'], 2)
+        self.assertEqual(len(self.backend.all_transactions()), 6)
+        self.assertEqual(self.backend.all_transactions()[0],
+                         {'date': '2023-01-15', 'description': 'STARBUCKS #12', 'amount': 5.0, 'category': 'Food & Dining'})
+
+    def test_totals_with_and_without_filters(self):
+        self.backend.save_transactions(ROWS)
+        self.assertAlmostEqual(self.backend.total_spent(), 60.5)
+        self.assertEqual(self.backend.monthly_totals(), {'2023-01': 5.0, '2023-02': 52.5})
+        self.assertEqual(self.backend.category_totals(), {'Food & Dining': 5.0, 'Groceries': 40.0, 'Shopping': 15.5})
+        february = {'date_from': date(2023, 2, 1), 'date_to': date(2023, 2, 28)}
+        self.assertAlmostEqual(self.backend.total_spent(**february), 52.5)
+        self.assertEqual(self.backend.category_totals(category='Shopping', **february), {'Shopping': 12.5})
+        self.assertEqual(self.backend.monthly_totals(category='Nope'), {})
+
+    def test_query_page_sorts_filters_and_pages_by_cursor(self):
+        self.backend.save_transactions(ROWS)
+        records, total = self.backend.query_page(sort='amount', descending=True, limit=2)
+        self.assertEqual(total, 5)
+        self.assertEqual([r['description'] for r in records], ['Star Market', 'Amazon Marketplace'])
+        records, _ = self.backend.query_page(sort='amount', descending=True, limit=2, after_row=records[-1]['id'])
+        self.assertEqual([r['description'] for r in records], ['STARBUCKS #12', 'Card hold'])
+        records, total = self.backend.query_page(sort='description', query='mark', date_from=date(2023, 2, 1))
+        self.assertEqual(([r['description'] for r in records], total), (['Amazon Marketplace', 'Star Market'], 2))
+        with self.assertRaises(ValueError):
+            self.backend.query_page(sort='colour')
+
+    def test_date_range_and_search(self):
+        self.backend.save_transactions(ROWS)
+        january = list(self.backend.iter_transactions(date(2023, 1, 1), date(2023, 1, 31)))
+        self.assertEqual([tx['description'] for tx in january], ['STARBUCKS #12', 'Refund'])
+        self.assertEqual(len(list(self.backend.iter_transactions())), 5)
+        results = self.backend.search('star')
+        self.assertEqual((results['total'], [tx['description'] for tx in results['transactions']]),
+                         (2, ['Star Market', 'STARBUCKS #12']))
+        self.assertEqual(self.backend.search('star mark')['total'], 1)
+        self.assertEqual(self.backend.search('nothing')['transactions'], [])
+
+    def test_imported_files(self):
+        self.backend.save_transactions(ROWS[:1])
+        self.assertIsNone(self.backend.file_already_imported('abc'))
+        self.assertTrue(self.backend.record_file_import('abc', 'jan.csv', 1))
+        self.assertEqual(self.backend.file_already_imported('abc')['filename'], 'jan.csv')
+
+
+class TestJSONLBackend(BackendContract, unittest.TestCase):
+
+    def make_backend(self, tmp_dir):
+        return JSONLBackend(os.path.join(tmp_dir, 'transactions.jsonl'))
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestParquetBackend(BackendContract, unittest.TestCase):
+
+    def make_backend(self, tmp_dir):
+        return ParquetBackend(os.path.join(tmp_dir, 'transactions.jsonl'))
+
+
+class TestSQLiteBackend(BackendContract, unittest.TestCase):
+
+    def make_backend(self, tmp_dir):
+        return SQLiteBackend(os.path.join(tmp_dir, 'transactions.sqlite3'))
+
+    def test_database_uses_wal_and_indexes(self):
+        self.backend.save_transactions(ROWS)
+        connection = self.backend._connection()
+        self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        plan = ' '.join(row[3] for row in connection.execute(
+            'EXPLAIN QUERY PLAN SELECT SUM(amount) FROM transactions WHERE category = ? AND date_ordinal BETWEEN 1 AND ?',
+            ('Shopping', 738580)))
+        self.assertIn('idx_transactions_category', plan)
+
+    def test_legacy_rows_are_normalized_on_insert(self):
+        self.backend.save_transactions([{'date': '01/15/2023', 'description': 'Old', 'amount': 2.0}])
+        self.assertEqual(list(self.backend.iter_transactions(date(2023, 1, 1), date(2023, 1, 31)))[0]['date'], '2023-01-15')
+
+    def test_databases_with_old_dedup_keys_are_rekeyed(self):
+        connection = self.backend._connection()
+        with connection:
+            connection.execute("INSERT INTO transactions (date, date_ordinal, description, amount, category, dedup_key) "
+                               "VALUES ('01/15/2023', 738535, 'Coffee', 4.5, 'Food & Dining', 12345)")
+            connection.execute("PRAGMA user_version = 1")
+        self.backend.close()
+        result = {}
+        self.backend.save_transactions([_tx(date(2023, 1, 15), 'Coffee', 4.5, 'Food & Dining')], result=result)
+        self.assertEqual(result['duplicate_count'], 1)
+        self.assertEqual(len(self.backend.all_transactions()), 1)
+
+    def test_migrate_jsonl_into_sqlite(self):
+        jsonl_path = os.path.join(self.tmp_dir, 'transactions.jsonl')
+        save_transactions_jsonl(ROWS, jsonl_path)
+        record_file_import('abc', 'jan.csv', 5, jsonl_path)
+        self.assertEqual(migrate_jsonl_to_sqlite([jsonl_path], self.backend), {'rows': 5, 'saved': 5, 'duplicate_count': 0})
+        self.assertEqual(migrate_jsonl_to_sqlite([jsonl_path], self.backend), {'rows': 5, 'saved': 0, 'duplicate_count': 5})
+        self.assertEqual(self.backend.file_already_imported('abc')['filename'], 'jan.csv')
+        self.assertEqual(self.backend.monthly_totals(), JSONLBackend(jsonl_path).monthly_totals())
+
+
+class TestBackendSelection(unittest.TestCase):
+
+    def test_selects_backend_by_name_or_path(self):
+        self.assertIsInstance(get_storage_backend('jsonl'), JSONLBackend)
+        self.assertIsInstance(get_storage_backend('parquet'), ParquetBackend)
+        self.assertIs(get_storage_backend('sqlite', 'x.sqlite3'), get_storage_backend('sqlite', 'x.sqlite3'))
+        self.assertIsInstance(as_storage_backend('ledger.jsonl'), JSONLBackend)
+        self.assertIsInstance(as_storage_backend('ledger.db'), SQLiteBackend)
+        with self.assertRaises(ValueError):
+            get_storage_backend('csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# tests/test_tokenizer.py
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils.tokenizer import clean_text, looks_like_date, parse_amount, token_cache_info
+
+
+class TestTokenizer(unittest.TestCase):
+
+    def test_parse_amount_formats(self):
+        cases = {
+            '$1,234.56': 1234.56,
+            '1.234,56 EUR': 1234.56,
+            '£ 12.00': 12.0,
+            '-45.10': -45.10,
+            'USD 3,000': 3000.0,
+            'Total: $19.99 due': 19.99,
+            'Coffee': None,
+            '': None,
+            None: None,
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_amount(text), expected)
+
+    def test_parse_amount_non_string_cell(self):
+        self.assertEqual(parse_amount(42), 42.0)
+
+    def test_looks_like_date(self):
+        for text in ('2023-11-01', '01/11/2023', '1-2-23', '01 Nov 2023', ' 05/06/2024\n'):
+            with self.subTest(text=text):
+                self.assertTrue(looks_like_date(text))
+        for text in ('Nov 2023', 'Amount', None, ''):
+            with self.subTest(text=text):
+                self.assertFalse(looks_like_date(text))
+
+    def test_clean_text(self):
+        self.assertEqual(clean_text(' Uber\nTrip '), 'Uber Trip')
+        self.assertEqual(clean_text(None), '')
+
+    def test_repeated_cells_are_memoized(self):
+        parse_amount('$987.65')
+        hits = token_cache_info()['parse_amount'].hits
+        parse_amount('$987.65')
+        self.assertEqual(token_cache_info()['parse_amount'].hits, hits + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
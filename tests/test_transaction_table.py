@@ -0,0 +1,75 @@
+# tests/test_transaction_table.py
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spendwise.utils.transaction_table import TransactionTable, date_to_ordinal, UNKNOWN_DATE
+
+SAMPLE_TRANSACTIONS = [
+    {'date': '2023-01-15', 'description': 'Coffee', 'amount': 5.0, 'category': 'Food & Dining'},
+    {'date': '01/20/2023', 'description': 'Refund', 'amount': -3.0, 'category': 'Shopping'},
+    {'date': '2023-02-01', 'description': 'Bus', 'amount': 2.5, 'category': 'Transport'},
+    {'date': 'not a date', 'description': 'Bus', 'amount': 1.5, 'category': 'Transport'},
+]
+
+
+class TestTransactionTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TransactionTable.from_transactions(SAMPLE_TRANSACTIONS)
+
+    def test_round_trip_records(self):
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(self.table.to_records(), SAMPLE_TRANSACTIONS)
+
+    def test_descriptions_are_dictionary_encoded(self):
+        self.assertEqual(self.table.descriptions, ['Coffee', 'Refund', 'Bus'])
+        self.assertEqual(list(self.table.description_codes), [0, 1, 2, 2])
+
+    def test_aggregations_count_only_spending(self):
+        self.assertAlmostEqual(self.table.total_spent(), 9.0)
+        self.assertEqual(self.table.group_by_month(), {'2023-01': 5.0, '2023-02': 2.5})
+        self.assertEqual(self.table.group_by_category(), {'Food & Dining': 5.0, 'Transport': 4.0})
+
+    def test_filters(self):
+        mask = self.table.filter_mask(date_from='2023-01-16', date_to='2023-12-31')
+        self.assertEqual(list(mask), [False, True, True, False])
+        self.assertEqual(self.table.group_by_category(self.table.filter_mask(category='Transport')), {'Transport': 4.0})
+        self.assertFalse(self.table.filter_mask(category='Unknown').any())
+
+    def test_extended_leaves_original_untouched(self):
+        bigger = self.table.extended([{'date': '2023-03-01', 'description': 'Coffee', 'amount': 4.0, 'category': 'Food & Dining'}])
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(len(bigger), 5)
+        self.assertEqual(bigger.group_by_month()['2023-03'], 4.0)
+
+    def test_query_filter(self):
+        self.assertEqual(list(self.table.filter_mask(query='BUS')), [False, False, True, True])
+
+    def test_page_with_offset_and_cursor(self):
+        row_ids, total = self.table.page(sort='amount', descending=True, limit=2)
+        self.assertEqual(total, 4)
+        self.assertEqual(list(row_ids), [0, 2])
+        next_ids, _ = self.table.page(sort='amount', descending=True, limit=2, after_row=row_ids[-1])
+        self.assertEqual(list(next_ids), [3, 1])
+        self.assertEqual(list(self.table.page(sort='amount', descending=True, offset=2, limit=2)[0]), [3, 1])
+
+    def test_page_sorts_strings_case_insensitively_within_filter(self):
+        table = self.table.extended([{'date': '2023-03-01', 'description': 'apple', 'amount': 1.0, 'category': 'Transport'}])
+        row_ids, total = table.page(table.filter_mask(category='Transport'), sort='description')
+        self.assertEqual(total, 3)
+        self.assertEqual(table.to_records(row_ids)[0]['description'], 'apple')
+
+    def test_page_rejects_unknown_sort(self):
+        with self.assertRaises(ValueError):
+            self.table.page(sort='nope')
+
+    def test_date_to_ordinal(self):
+        self.assertEqual(date_to_ordinal('2023-01-15'), date_to_ordinal('01/15/2023'))
+        self.assertEqual(date_to_ordinal('garbage'), UNKNOWN_DATE)
+
+
+if __name__ == '__main__':
+    unittest.main()